@@ -9,6 +9,9 @@ collision detection between sprite groups. Also Subclassing and super.
 this example is tested using python 3.4 and pygame
 """
 import pygame 
+import fonts
+import handles
+import specs
 import math
 import random
 #import menu1
@@ -16,29 +19,27 @@ import random
 import operator
 import math
 import vectorclass2d as v
+import broadphase
+import ccd
+import timestep
+import profiler
+try:
+    import particles # needs numpy
+except ImportError:
+    particles = None
 import os
 
 def make_text(msg="pygame is cool", fontcolor=(255, 0, 255), fontsize=42, font=None):
-    """returns pygame surface with text. You still need to blit the surface."""
-    myfont = pygame.font.SysFont(font, fontsize)
-    mytext = myfont.render(msg, True, fontcolor)
-    mytext = mytext.convert_alpha()
-    return mytext
+    """returns pygame surface with text. You still need to blit the surface.
+       the surface is shared (fonts.render), do not paint on it"""
+    return fonts.render(msg, fontcolor, fontsize, font)
 
 
 
 def write(background, text, x=50, y=150, color=(0,0,0),
           fontsize=None, center=False):
-        """write text on pygame surface. """
-        if fontsize is None:
-            fontsize = 24
-        font = pygame.font.SysFont('mono', fontsize, bold=True)
-        fw, fh = font.size(text)
-        surface = font.render(text, True, color)
-        if center: # center text around x,y
-            background.blit(surface, (x-fw//2, y-fh//2))
-        else:      # topleft corner is x,y
-            background.blit(surface, (x,y))
+        """write text on pygame surface. returns the painted rect"""
+        return fonts.write(background, text, x, y, color, fontsize, center)
     
 def elastic_collision(sprite1, sprite2):
         """elasitc collision between 2 VectorSprites (calculated as disc's).
@@ -87,81 +88,44 @@ def elastic_collision(sprite1, sprite2):
 
 class VectorSprite(pygame.sprite.Sprite):
     """base class for sprites. this class inherits from pygames sprite class"""
-    number = 0
-    numbers = {} # { number, Sprite }
+    numbers = handles.HandleTable() # { number: Sprite }, only living sprites
+    
+    # default values for missing keywords, merged once per class by specs.spec_of
+    defaults = {"leftside": False,
+                "rightside": False,
+                "pos": specs.computed(lambda sprite: v.Vec2d(50,50)),
+                "move": specs.computed(lambda sprite: v.Vec2d(0,0)),
+                "radius": 50,
+                "width": specs.computed(lambda sprite: sprite.radius * 2),
+                "height": specs.computed(lambda sprite: sprite.radius * 2),
+                "color": specs.computed(lambda sprite: (random.randint(0,255), random.randint(0,255), random.randint(0,255))),
+                "hitpoints": 100,
+                "mass": 15,
+                "damage": 10,
+                "bounce_on_edge": False,
+                "kill_on_edge": False,
+                "angle": 0, # facing right?
+                "max_age": None,
+                "max_distance": None,
+                "picture": None,
+                "bossnumber": None,
+                "kill_with_boss": False,
+                "sticky_with_boss": False,
+                "friction": None,
+                "upkey": None,
+                "downkey": None,
+                "rightkey": None,
+                "leftkey": None,
+                "target": None}
     
     def __init__(self, **kwargs):
         """create a (black) surface and paint a blue ball on it"""
-        for key, arg in kwargs.items():
-            setattr(self, key, arg)
-        if "layer" not in kwargs:
-            self._layer = 4
-        
-        #self._layer = layer   # pygame Sprite layer
+        # get unlimited named arguments and turn them into attributes, default values from defaults
+        specs.spec_of(type(self)).apply(self, kwargs)
+        self._layer = kwargs.get("layer", 4)   # pygame Sprite layer
         pygame.sprite.Sprite.__init__(self, self.groups) #call parent class. NEVER FORGET !
-        self.number = VectorSprite.number # unique number for each sprite
-        VectorSprite.number += 1 
-        VectorSprite.numbers[self.number] = self 
-        # get unlimited named arguments and turn them into attributes
-        
-        
-
-        # --- default values for missing keywords ----
-        if "leftside" not in kwargs:
-            self.leftside = False
-        if "rightside" not in kwargs:
-            self.rightside = False
-        if "pos" not in kwargs:
-            self.pos = v.Vec2d(50,50)
-        if "move" not in kwargs:
-            self.move = v.Vec2d(0,0)
-        if "radius" not in kwargs:
-            self.radius = 50
-        if "width" not in kwargs:
-            self.width = self.radius * 2
-        if "height" not in kwargs:
-            self.height = self.radius * 2
-        if "color" not in kwargs:
-            self.color = (random.randint(0,255), random.randint(0,255), random.randint(0,255))
-        if "hitpoints" not in kwargs:
-            self.hitpoints = 100
+        self.number = VectorSprite.numbers.add(self) # unique number for each sprite, never reused
         self.hitpointsfull = self.hitpoints # makes a copy
-        if "mass" not in kwargs:
-            self.mass = 10
-        if "damage" not in kwargs:
-            self.damage = 10
-        if "bounce_on_edge" not in kwargs:
-            self.bounce_on_edge = False
-        if "kill_on_edge" not in kwargs:
-            self.kill_on_edge = False
-        if "angle" not in kwargs:
-            self.angle = 0 # facing right?
-        if "max_age" not in kwargs:
-            self.max_age = None
-        if "max_distance" not in kwargs:
-            self.max_distance = None
-        if "picture" not in kwargs:
-            self.picture = None
-        if "bossnumber" not in kwargs:
-            self.bossnumber = None
-        if "kill_with_boss" not in kwargs:
-            self.kill_with_boss = False
-        if "sticky_with_boss" not in kwargs:
-            self.sticky_with_boss = False
-        if "mass" not in kwargs:
-            self.mass = 15
-        if "friction" not in kwargs:
-            self.friction = None
-        if "upkey" not in kwargs:
-            self.upkey = None
-        if "downkey" not in kwargs:
-            self.downkey = None
-        if "rightkey" not in kwargs:
-            self.rightkey = None
-        if "leftkey" not in kwargs:
-            self.leftkey = None
-        if "target" not in kwargs:
-            self.target = None
         self.endOfSpeedBonusTime = 0
         # ---
         self.age = 0 # in seconds
@@ -455,7 +419,7 @@ class Ball(VectorSprite):
                 m = v.Vec2d (random.randint(150,250),0)
                 w=random.randint(0,360)
                 m.rotate(w)
-                Fragment(radius = 5, pos = v.Vec2d(self.pos.x, self.pos.y),
+                Fragment.spawn(radius = 5, pos = v.Vec2d(self.pos.x, self.pos.y),
                                               move = v.Vec2d(m.x, m.y),
                                               max_age=random.random()+0.5, 
                                               color = self.color)
@@ -568,6 +532,17 @@ class Expander(VectorSprite):
         
         
 class Fragment(VectorSprite):
+    particles = None # a particles.ParticleSystem, set in PygView.paint()
+
+    @classmethod
+    def spawn(cls, **kwargs):
+        """emit a fragment particle into Fragment.particles, or create a Fragment sprite if there is none"""
+        if cls.particles is None:
+            return cls(**kwargs)
+        pos = kwargs["pos"]
+        move = kwargs.get("move", v.Vec2d(0,0))
+        cls.particles.emit(pos.x, pos.y, move.x, move.y, max_age=kwargs.get("max_age", 1),
+                           color=kwargs.get("color", (255,255,255)), radius=kwargs.get("radius", 5))
     
     def create_image(self):
         if self.picture is not None:
@@ -598,7 +573,7 @@ class PygView(object):
     width = 0
     height = 0
   
-    def __init__(self, width=640, height=400, fps=30):
+    def __init__(self, width=640, height=400, fps=30, hz=30, profile=None):
         """Initialize pygame, window, background, font,...
            default arguments """
         pygame.mixer.pre_init(44100, -16, 2, 2048) # setup mixer to avoid sound lag
@@ -610,7 +585,11 @@ class PygView(object):
         self.background = pygame.Surface(self.screen.get_size()).convert()  
         self.background.fill((255,255,255)) # fill background white
         self.clock = pygame.time.Clock()
+        self.profiler = profiler.install(self, profile) # PROFILER=1: F3 profiler overlay, F4 save it as csv
         self.fps = fps
+        # physics steps per second, independent of fps. 30 = the old frame
+        # rate: friction and key acceleration are per update, not per second
+        self.timestep = timestep.FixedStep(hz)
         self.playtime = 0.0
         self.paint() 
         PygView.speedlimit = 100
@@ -672,6 +651,12 @@ class PygView(object):
         Expander.groups = self.allgroup, self.expandergroup
         #Cannon.groups = self.allgroup, self.cannongroup
         VectorSprite.groups = self.allgroup
+        # ---- fragments as particles instead of sprites ----
+        if particles is not None:
+            self.particles = particles.ParticleSystem()
+        else:
+            self.particles = None
+        Fragment.particles = self.particles
         
         self.ball1 = Ball(pos=v.Vec2d(PygView.width//2-200,PygView.height//2), move=v.Vec2d(0,0), bounce_on_edge=True, upkey=pygame.K_w, downkey=pygame.K_s, leftkey=pygame.K_a, rightkey=pygame.K_d, mass=500, color=(255,100,100), leftside=True, rightside = False) # creating a Ball Sprite
         #self.cannon1 = Cannon(bossnumber = self.ball1.number)
@@ -690,12 +675,148 @@ class PygView(object):
                             color = (0,200,0), radius = 15)
         self.seeker2 = Ball(pos = v.Vec2d(PygView.width, PygView.height),target = self.ball3, mass = 2000,
                             color = (0,100,0), radius = 15)
+        # ---- fast balls: contacts during the frame, see ccd.py ----
+        self.sweep = ccd.Sweep()
+        self.sweep.add_circles(self.ballgroup, self.ballgroup, elastic_collision)
+        self.sweep.add_boxes((self.ball3,), self.goalgroup, self.ball3_in_goal)
+        self.crossed_goal = None # goal the fast ball3 touched during the step
+        self.collider = broadphase.GroupCollider() # balls against bonus groups
 
         self.goal1 = Goal(pos=v.Vec2d(25, PygView.height//2), side="left", width=50, height=250, color=(200,50,50))
         self.goal2 = Goal(pos=v.Vec2d(PygView.width - 25, PygView.height//2), side="right", width=50, height=250, color=(200,200,50
         ))
         #self.b1 = Bonus(radius = 25)
 
+    # ---- on_hit for self.sweep ----
+    def ball3_in_goal(self, ball3, goal, nx, ny):
+        """a fast ball3 touches a goal during the step (it could be behind
+           it at the end of the step)"""
+        if self.crossed_goal is None:
+            self.crossed_goal = goal
+
+    # ---- on_hit for self.collider.collide_groups ----
+    def speedbonus_hit(self, ball, speedbonus):
+        if ball == self.ball1:
+            self.ball1.endOfSpeedBonusTime = self.ball1.age + 15
+            c = (random.randint(100,255),0,0)
+        elif ball == self.ball2:
+            self.ball2.endOfSpeedBonusTime = self.ball2.age + 15
+            c = (0,0,random.randint(100,255))
+            
+            self.powerupsound.play()
+            
+        for w in range (0,360,1):
+            m = v.Vec2d (random.randint(50,250),0)
+            m.rotate(w)
+            c = (random.randint(100,255),0,0)
+            Fragment.spawn(radius = 5, pos = v.Vec2d(speedbonus.pos.x, speedbonus.pos.y),
+                                  move = v.Vec2d(m.x, m.y),
+                                  max_age=random.random()+0.5, 
+                                  color = c)
+            
+        Flytext(ball.pos.x, ball.pos.y, '!!!SPEEDBONUS!!!', ball.color, fontsize = 20, duration = 3 )
+        
+        #-----------------------------------
+        speedbonus.kill()
+
+    def bonus_hit(self, ball, bonus):
+        self.powerupsound.play()
+        
+        if ball == self.ball1:
+            self.score2 -= 1
+            self.score1 += 1
+            c = (random.randint(100,255),0,0)
+        elif ball == self.ball2:
+            self.score2 += 1
+            self.score1 -= 1
+            c = (0,0,random.randint(100,255))
+        
+        #--------grafphical effect----------
+        for w in range (0,360,1):
+            m = v.Vec2d (random.randint(50,250),0)
+            m.rotate(w)
+            Fragment.spawn(radius = 5, pos = v.Vec2d(bonus.pos.x, bonus.pos.y),
+                                  move = v.Vec2d(m.x, m.y),
+                                  max_age=random.random()+0.5, 
+                                  color = c)
+        Flytext(ball.pos.x,ball.pos.y,'!!!BONUS!!!', ball.color, fontsize = 25, duration = 3 )
+        
+        #-----------------------------------
+        bonus.kill()
+
+    def expander_hit(self, ball, bonus):
+        self.powerupsound.play()
+        
+        if ball == self.ball2:
+            PygView.leftlimitpercent -=0.1
+            
+        elif ball == self.ball1:
+            PygView.rightlimitpercent +=0.1
+            
+        #-----------graphical effect-------------------    
+        for w in range (0,360,1):
+            m = v.Vec2d (random.randint(50,250),0)
+            m.rotate(w)
+            c = (random.randint(100,255),0,0)
+            Fragment.spawn(radius = 5, pos = v.Vec2d(self.ex1.pos.x, self.ex1.pos.y),
+                                  move = v.Vec2d(m.x, m.y),
+                                  max_age=random.random()+0.5, 
+                                  color = c)
+        Flytext(ball.pos.x,ball.pos.y,'!!!EXPANDER!!!', ball.color, fontsize = 25, duration = 3 )
+        
+        #---------------------------
+        self.ex1.kill()
+
+    def physics(self, seconds):
+        """move all sprites and handle collisions, once per step"""
+        self.crossed_goal = None
+        self.sweep.run(seconds) # fast balls would jump through other balls and goals
+        self.allgroup.update(seconds) # would also work with ballgroup
+
+        # ---------- collision detection between balls and bonus sprites ---
+        self.collider.new_frame() # sprites have moved
+        players = [self.ball1, self.ball2]
+        self.collider.collide_groups(players, self.speedbonusgroup, "circle",
+                                     on_hit=self.speedbonus_hit)
+        self.collider.collide_groups(players, self.bonusgroup, "circle",
+                                     on_hit=self.bonus_hit)
+        self.collider.collide_groups(players, self.expandergroup, "circle",
+                                     on_hit=self.expander_hit, dokill=True)
+                  
+        # --------- collision detection between ball3 and goalgroup --------
+        crash = self.crossed_goal or pygame.sprite.spritecollideany(self.ball3, self.goalgroup)
+                #collided = collide_mask) 
+        if crash is not None:
+            
+            if crash.side == "left":
+                self.score2 += 1
+                c = (0,0,random.randint(100,255))
+                self.torblausound.play() 
+            elif crash.side == "right":
+                self.score1 += 1
+                c = (random.randint(100,255),0,0)
+                self.torrotsound.play()
+                
+            for w in range (0,360,1):
+                
+                m = v.Vec2d (random.randint(50,300),0)
+                m.rotate(w)
+                Fragment.spawn(radius = random.randint(1,10), pos = v.Vec2d(crash.pos.x, crash.pos.y), 
+                                        move = v.Vec2d(m.x, m.y), 
+                                        max_age = random.random()+1,
+                                        color = c)
+            for b in [self.ball1, self.ball2, self.ball3]:
+                b.move = v.Vec2d(0,0)
+            self.ball1.pos = v.Vec2d(PygView.width//2 - 100, PygView.height //2)
+            self.ball2.pos = v.Vec2d(PygView.width//2 + 100, PygView.height //2)
+            self.ball3.pos = v.Vec2d(PygView.width//2, PygView.height //2)
+                
+        
+        # --------- collision detection between ball and other balls
+        # broadphase returns every pair only once (no self-collision, no double calculation)
+        for ball, otherball in broadphase.collide_pairs(self.ballgroup):
+            elastic_collision(ball, otherball) # change dx and dy of both sprites
+
     def run(self):
         """The mainloop"""
         self.score1 = 0
@@ -817,144 +938,12 @@ class PygView(object):
             write(self.screen, "FPS: {:6.3}  PLAYTIME: {:6.3} SECONDS".format(
                            self.clock.get_fps(), self.playtime))
             
-            self.allgroup.update(seconds) # would also work with ballgroup
-                       
-                       
-    
-            # ---------- collision detection between balls and speedbonusgroup ---
-            for ball in [self.ball1, self.ball2]:
-                
-                crashgroup = pygame.sprite.spritecollide(ball, self.speedbonusgroup, False, pygame.sprite.collide_circle)
-                for speedbonus in crashgroup:
-                    
-                   
-    
-                    
-                    if ball == self.ball1:
-                        self.ball1.endOfSpeedBonusTime = self.ball1.age + 15
-                        c = (random.randint(100,255),0,0)
-                    elif ball == self.ball2:
-                        self.ball2.endOfSpeedBonusTime = self.ball2.age + 15
-                        c = (0,0,random.randint(100,255))
-                        
-                        self.powerupsound.play()
-                        
-                    for w in range (0,360,1):
-                        m = v.Vec2d (random.randint(50,250),0)
-                        m.rotate(w)
-                        c = (random.randint(100,255),0,0)
-                        Fragment(radius = 5, pos = v.Vec2d(speedbonus.pos.x, speedbonus.pos.y),
-                                              move = v.Vec2d(m.x, m.y),
-                                              max_age=random.random()+0.5, 
-                                              color = c)
-                        
-                    Flytext(ball.pos.x, ball.pos.y, '!!!SPEEDBONUS!!!', ball.color, fontsize = 20, duration = 3 )
-                    
-                    #-----------------------------------
-                    speedbonus.kill()
-                       
-            
-            # ---------- collision detection between balls and bonusgroup ------
-            for ball in [self.ball1, self.ball2]:
-        
-                crashgroup = pygame.sprite.spritecollide(ball, self.bonusgroup, False, pygame.sprite.collide_circle)
-                for bonus in crashgroup:
-                    self.powerupsound.play()
-                    
-                    if ball == self.ball1:
-                        self.score2 -= 1
-                        self.score1 += 1
-                        c = (random.randint(100,255),0,0)
-                    elif ball == self.ball2:
-                        self.score2 += 1
-                        self.score1 -= 1
-                        c = (0,0,random.randint(100,255))
-                    
-                    
-                    #--------grafphical effect----------
-                     
-                   
-                    for w in range (0,360,1):
-                        m = v.Vec2d (random.randint(50,250),0)
-                        m.rotate(w)
-                        Fragment(radius = 5, pos = v.Vec2d(bonus.pos.x, bonus.pos.y),
-                                              move = v.Vec2d(m.x, m.y),
-                                              max_age=random.random()+0.5, 
-                                              color = c)
-                    Flytext(ball.pos.x,ball.pos.y,'!!!BONUS!!!', ball.color, fontsize = 25, duration = 3 )
-                       
-                     
-                    #-----------------------------------
-                    bonus.kill()
-                   
-            #--------------collision dedection between balls and Expandergroup-----------
-                    
-                    
-            for ball in [self.ball1, self.ball2]:
-                
-        
-                crashgroup = pygame.sprite.spritecollide(ball, self.expandergroup, True, pygame.sprite.collide_circle)
-                for bonus in crashgroup:
-                    self.powerupsound.play()
-                    
-                    
-                    if ball == self.ball2:
-                        PygView.leftlimitpercent -=0.1
-                        
-                    elif ball == self.ball1:
-                        PygView.rightlimitpercent +=0.1
-                        
-                    #-----------graphical effect-------------------    
-                        
-                        
-                    for w in range (0,360,1):
-                        m = v.Vec2d (random.randint(50,250),0)
-                        m.rotate(w)
-                        c = (random.randint(100,255),0,0)
-                        Fragment(radius = 5, pos = v.Vec2d(self.ex1.pos.x, self.ex1.pos.y),
-                                              move = v.Vec2d(m.x, m.y),
-                                              max_age=random.random()+0.5, 
-                                              color = c)
-                    Flytext(ball.pos.x,ball.pos.y,'!!!EXPANDER!!!', ball.color, fontsize = 25, duration = 3 )
-                    
-                    #---------------------------
-                    self.ex1.kill()
-                      
-            # --------- collision detection between ball3 and goalgroup --------
-            crash = pygame.sprite.spritecollideany(self.ball3, self.goalgroup)
-                    #collided = collide_mask) 
-            if crash is not None:
-                
-                if crash.side == "left":
-                    self.score2 += 1
-                    c = (0,0,random.randint(100,255))
-                    self.torblausound.play() 
-                elif crash.side == "right":
-                    self.score1 += 1
-                    c = (random.randint(100,255),0,0)
-                    self.torrotsound.play()
-                    
-                for w in range (0,360,1):
-                    
-                    m = v.Vec2d (random.randint(50,300),0)
-                    m.rotate(w)
-                    Fragment(radius = random.randint(1,10), pos = v.Vec2d(crash.pos.x, crash.pos.y), 
-                                            move = v.Vec2d(m.x, m.y), 
-                                            max_age = random.random()+1,
-                                            color = c)
-                for b in [self.ball1, self.ball2, self.ball3]:
-                    b.move = v.Vec2d(0,0)
-                self.ball1.pos = v.Vec2d(PygView.width//2 - 100, PygView.height //2)
-                self.ball2.pos = v.Vec2d(PygView.width//2 + 100, PygView.height //2)
-                self.ball3.pos = v.Vec2d(PygView.width//2, PygView.height //2)
-                    
-            
-            # --------- collision detection between ball and other balls
-            for ball in self.ballgroup:
-                crashgroup = pygame.sprite.spritecollide(ball, self.ballgroup, False, pygame.sprite.collide_circle)
-                for otherball in crashgroup:
-                    if ball.number > otherball.number:     # make sure no self-collision or calculating collision twice
-                        elastic_collision(ball, otherball) # change dx and dy of both sprites
+            # ---- physics in steps of always the same time, see timestep.py ----
+            for step in range(self.timestep.advance(seconds)):
+                timestep.snapshot(self.allgroup) # position before the step, for interpolate
+                self.physics(self.timestep.dt) # fast balls are handled by self.sweep
+            if self.particles is not None:
+                self.particles.update(seconds)
             
             #-------- bonus-------------------
             if random.random() < 0.001:
@@ -962,22 +951,23 @@ class PygView(object):
                  pos = v.Vec2d(random.randint(0,self.width),
                                                  random.randint(0,self.height)),
                                 max_age = random.randint(2,9))
-            self.allgroup.draw(self.screen)
             #---------speedbonus------------
             if random.random() < 0.001:
                 SpeedBonus(radius = 25,pos = v.Vec2d(random.randint(0,self.width),
                            random.randint(0,self.height)),
                                 max_age = random.randint(2,9))
-            self.allgroup.draw(self.screen) 
             
             #-------------expander-------------
             if random.random() < 0.1:
                 self.ex1 = Expander(radius = 25, pos = v.Vec2d(random.randint(0,self.width), random.randint(0,self.height)),
                                 max_age = random.randint(2,10))
                                 
-                                
-                
+            # draw the sprites between their last two positions
+            moved = timestep.interpolate(self.allgroup, self.timestep.alpha)
             self.allgroup.draw(self.screen)
+            timestep.restore(moved) # collision detection uses the real rects
+            if self.particles is not None:
+                self.particles.draw(self.screen)
             
             
                       
@@ -993,6 +983,7 @@ class PygView(object):
 
             pygame.display.flip()
             
+        profiler.uninstall()
         pygame.quit()
 
 if __name__ == '__main__':
@@ -0,0 +1,554 @@
+"""
+many ballwars or airhockey arenas in numpy arrays, stepping all together
+idea: training and testing the ai needs a lot of games. a PygView with
+      sprites plays about 400 steps per second, even headless (batch.py).
+      here an arena is not a PygView with sprites but one row in a few
+      numpy arrays (structure of arrays, like particles.py):
+          pos, move                        (k, bodies, 2)
+          radius, mass, alive, age, ...    (k, bodies)
+      the bodies have the same slot in every arena:
+          0 player1, 1 player2, 2 the ball (lazyball1 / ball3),
+          airhockey only: 3 and 4 the seekers,
+          then the shots (no shot is fired while all shot slots are in use,
+          a dead shot has the position nan)
+      the bouncers and goalkeepers of ballwars have their own arrays, they
+      only touch the lazyball.
+      step() does one step of 1/hz seconds in all k arenas, with the rules
+      of PygView.control and PygView.physics (ballwars) or of the mainloop
+      of airhockey:
+      - shooting, aiming and ramming of the ai (ballwars), the corner cannons
+      - the blocks in front of the ballwars goals reflect the balls
+      - moving, friction and bouncing on the screen edge like
+        VectorSprite.update (also at the top edge, where pos.y is not set back)
+      - a shot more than MARGIN pixels outside the screen is gone: in the
+        games it flies on until max_age, but out there is nothing it could
+        hit that is visible (players and ball stay on the screen, a shot
+        would have to hit another shot to come back). its slot is free for
+        the next shot, like a new sprite in the game
+      - goal: the ball touches a goal (rect test), the score changes and
+        the ball and the players go back to their start positions
+      - lazyball against bouncers: elastic_collision, then 6 * bouncefactor faster
+      - balls against balls: collision.elastic_collision_many for the
+        touching pairs of all arenas at once, the same as elastic_collision
+        for each pair. the pairs are found with sweep and prune: the bodies
+        of each arena are sorted by their left edge, the candidates of a
+        body are the next ones in this order that start before it ends.
+        their number is counted for all arenas at once, then all candidate
+        pairs are made and tested in one go (no python loop over the
+        candidates). the order of the last step is sorted again: it is
+        nearly sorted already, that costs a sixth of a new sort.
+      players without ai are moved by actions, (k, 2, 4) numbers like the
+      keys and buttons: move x and move y (-1...1, times playerspeed),
+      fire (> 0: shoot, like the joystick button with 0.3 seconds reload)
+      and the cannon angle in degree (like Cannon.angle, ballwars only).
+      an arena is reset when one player has maxgoal goals, and the next
+      match starts in the same step (wins counts the matches).
+      not in the arenas: ccd (the fast lazyball can jump through a bouncer,
+      like in ballwars before ccd.py), the bonus sprites of airhockey,
+      particles, sound and drawing.
+      observe() gives views into the arrays, not copies: they change with
+      the next step, copy them to keep them.
+usage:
+    arenas = arena.VecArena(1024, "ballwars", seed=1)   # ai against ai
+    observation = arenas.observe()    # {"pos": (k, bodies, 2) array, ...}
+    for step in range(1000):
+        scored, done = arenas.step()  # scored: +1 player1, -1 player2
+    # player1 played by an agent:
+    arenas = arena.VecArena(1024, "ballwars", ai=(False, True))
+    actions = arenas.actions()        # zeros
+    actions[:, arena.PLAYER1, arena.MOVE_X] = 1
+    scored, done = arenas.step(actions)
+    python3 arena.py --arenas 1024 --steps 600     # speed test
+needs numpy (pip install numpy)
+this module must be in the same directory as the game files.
+"""
+import argparse
+import time
+import numpy as np
+import collision  # collision.py must be in same directory as this file
+
+# width, height, steps per second, as in the __main__ part of each game
+GAMES = {"ballwars": (1400, 800, 60),
+         "airhockey": (1430, 800, 30)}
+
+PLAYER1, PLAYER2, BALL = 0, 1, 2
+MARGIN = 100        # a shot this far outside the screen is gone (2 * biggest radius)
+MOVE_X, MOVE_Y, FIRE, ANGLE = 0, 1, 2, 3
+
+
+class VecArena(object):
+    """k arenas of one game, all bodies in numpy arrays"""
+
+    def __init__(self, k, game="ballwars", shots=32, ai=None, difficulty=1,
+                 playerspeed=10, playermass=1000, bouncefactor=1, maxgoal=5,
+                 width=None, height=None, hz=None, seed=None):
+        if game not in GAMES:
+            raise ValueError("no arena for {}, only for {}".format(game, ", ".join(sorted(GAMES))))
+        if ai is None:
+            ai = (game == "ballwars", game == "ballwars")
+        if game != "ballwars" and any(ai):
+            raise ValueError("{} has no ai, give actions to step()".format(game))
+        w, h, hertz = GAMES[game]
+        self.k = k
+        self.game = game
+        self.width = width or w
+        self.height = height or h
+        self.hz = hz or hertz
+        self.dt = 1.0 / self.hz
+        self.ai = tuple(ai)
+        self.difficulty = difficulty
+        self.playerspeed = playerspeed if game == "ballwars" else 5
+        self.playermass = playermass
+        self.bouncefactor = bouncefactor
+        self.maxgoal = maxgoal
+        self.rng = np.random.default_rng(seed)
+        self.first_shot = 3 if game == "ballwars" else 5
+        n = self.bodies = self.first_shot + shots
+        # ---- bodies ----
+        self.pos = np.zeros((k, n, 2))
+        self.move = np.zeros((k, n, 2))
+        self.radius = np.zeros((k, n))
+        self.mass = np.zeros((k, n))
+        self.alive = np.zeros((k, n), bool)
+        self.age = np.zeros((k, n))
+        self.max_age = np.full((k, n), np.inf)
+        self.distance = np.zeros((k, n))
+        self.max_distance = np.full((k, n), np.inf)
+        self.static = np.zeros(k * n, bool)            # no ball is static
+        self.order = np.tile(np.arange(n), (k, 1))     # bodies by left edge, last step
+        # the same for a slot in every arena
+        self.friction = np.ones(n)                      # per 1/60 second, 1: no friction
+        # ---- players ----
+        self.score = np.zeros((k, 2), int)
+        self.wins = np.zeros((k, 2), int)
+        self.angle = np.zeros((k, 2))                   # cannon1, cannon3
+        self.ready = np.zeros((k, 2))                   # readyToFire, in seconds of the match
+        self.time = np.zeros(k)                         # seconds of the match
+        self.steps = 0
+        # ---- bouncers and goalkeepers (ballwars) ----
+        self.bouncer_pos = np.zeros((k, 4, 2))
+        self.bouncer_move = np.zeros((k, 4, 2))
+        if game == "ballwars":
+            self.bouncer_radius = np.array([50.0, 50.0, 18.0, 18.0])
+            self.bouncer_mass = np.array([10000.0, 10000.0, 999999.0, 999999.0])
+            self.bouncer_bounce = np.array([True, True, False, False])
+            self.radius[:, :3] = (50, 50, 20)
+            self.mass[:, :3] = (playermass, playermass, 500)
+            self.friction[:3] = 0.99
+            goal = (20, 250)
+            self.blocks = [(0, self.height // 2 - 123), (0, self.height // 2 + 123),
+                           (self.width, self.height // 2 - 125), (self.width, self.height // 2 + 125)]
+        else:
+            self.radius[:, :5] = (50, 50, 30, 15, 15)
+            self.mass[:, :5] = (500, 333, 15, 2000, 2000)
+            self.seekspeed = np.zeros((k, 2))
+            self.speedlimit = 100
+            self.leftlimit = self.width * 0.45
+            self.rightlimit = self.width * 0.55
+            goal = (50, 250)
+            self.blocks = []
+        self.alive[:, :self.first_shot] = True
+        # goal rects (left, top, right, bottom) like pygame.Rect(center=pos)
+        x = goal[0] // 2 if game == "airhockey" else 0
+        self.goals = [self.rect(x, self.height // 2, goal[0], goal[1]),
+                      self.rect(self.width - x, self.height // 2, goal[0], goal[1])]
+        self.observation = {"pos": self.pos, "move": self.move, "alive": self.alive,
+                            "radius": self.radius, "score": self.score,
+                            "angle": self.angle, "bouncers": self.bouncer_pos}
+        self.reset()
+
+    @staticmethod
+    def rect(x, y, width, height):
+        left = x - width // 2
+        top = y - height // 2
+        return left, top, left + width, top + height
+
+    def reset(self, arenas=None):
+        """start a new match in all arenas, or in the arenas of a bool mask"""
+        if arenas is None:
+            arenas = np.ones(self.k, bool)
+        w, h = self.width, self.height
+        self.score[arenas] = 0
+        self.time[arenas] = 0
+        self.ready[arenas] = 0
+        self.angle[arenas] = (0, 180)
+        shots = (arenas, slice(self.first_shot, None))
+        self.alive[shots] = False
+        self.pos[shots] = np.nan
+        self.move[shots] = 0
+        self.start_positions(arenas)
+        if self.game == "ballwars":
+            self.bouncer_pos[arenas] = ((800, 0), (60, h), (80, h // 2), (w - 80, h // 2))
+            self.bouncer_move[arenas] = ((5, 0), (5, 0), (0, 40), (0, 40))
+        else:
+            self.pos[arenas, 3] = (0, 0)
+            self.pos[arenas, 4] = (w, h)
+            self.move[arenas, 3:5] = 0
+            self.seekspeed[arenas] = self.rng.integers(20, 61, (int(np.count_nonzero(arenas)), 2))
+        self.age[arenas, :self.first_shot] = 0
+        self.distance[arenas, :self.first_shot] = 0
+
+    def start_positions(self, arenas):
+        """players and ball back to the start, after a goal"""
+        w, h = self.width, self.height
+        distance = 300 if self.game == "ballwars" else 100
+        self.pos[arenas, PLAYER1] = (w // 2 - distance, h // 2)
+        self.pos[arenas, PLAYER2] = (w // 2 + distance, h // 2)
+        self.pos[arenas, BALL] = (w // 2, h // 2)
+        self.move[arenas, :3] = 0
+
+    def actions(self):
+        """zeros for step(): (k, 2 players, move x, move y, fire, angle)"""
+        actions = np.zeros((self.k, 2, 4))
+        actions[:, :, ANGLE] = self.angle
+        return actions
+
+    def observe(self):
+        """{ name: array } views of the arrays, no copies"""
+        return self.observation
+
+    # ---- one step ----
+    def step(self, actions=None):
+        """one step of all arenas. returns (scored, done): scored is +1 where
+           player1 made a goal, -1 for player2, 0 else; done is True where a
+           match ended (the arena is reset already)"""
+        dt = self.dt
+        if self.game == "ballwars":
+            self.control(actions)
+            self.hit_blocks()
+            self.update(dt)
+            self.players(actions)
+            self.update_bouncers(dt)
+            scored = self.hit_goals()
+            self.hit_bouncers()
+        else:
+            self.fire_airhockey(actions)
+            self.update(dt)
+            self.players(actions)
+            scored = self.hit_goals()
+        self.collide()
+        self.time += dt
+        self.steps += 1
+        done = self.score.max(axis=1) >= self.maxgoal
+        if done.any():
+            self.wins[done, np.argmax(self.score[done], axis=1)] += 1
+            self.reset(done)
+        return scored, done
+
+    def spawn(self, arenas, x, y, move_x, move_y, radius, mass, max_age=np.inf, max_distance=np.inf):
+        """new shots in the arenas of the mask, x ... move_y are (k,) arrays"""
+        free = ~self.alive[:, self.first_shot:]
+        arenas = np.flatnonzero(arenas & free.any(axis=1))
+        if len(arenas) == 0:
+            return
+        slots = self.first_shot + free[arenas].argmax(axis=1)
+        self.pos[arenas, slots, 0] = x[arenas]
+        self.pos[arenas, slots, 1] = y[arenas]
+        self.move[arenas, slots, 0] = move_x[arenas]
+        self.move[arenas, slots, 1] = move_y[arenas]
+        self.radius[arenas, slots] = radius
+        self.mass[arenas, slots] = mass
+        self.max_age[arenas, slots] = max_age
+        self.max_distance[arenas, slots] = max_distance
+        self.age[arenas, slots] = 0
+        self.distance[arenas, slots] = 0
+        self.alive[arenas, slots] = True
+
+    def fire(self, player, arenas):
+        """shot of the cannon of player, with knockback"""
+        radians = np.radians(self.angle[:, player])
+        dx = np.cos(radians)                   # Vec2d(60,0).rotated(-angle), normalized
+        dy = -np.sin(radians)
+        pos = self.pos[:, player]
+        move = self.move[:, player]
+        self.spawn(arenas, pos[:, 0] + 60 * dx, pos[:, 1] + 60 * dy,
+                   dx * 420 + move[:, 0], dy * 420 + move[:, 1], 10, 100, max_age=4)
+        move[arenas, 0] -= dx[arenas] * 10
+        move[arenas, 1] -= dy[arenas] * 10
+
+    def control(self, actions):
+        """PygView.control of ballwars: ai, buttons, corner cannons"""
+        rng = self.rng
+        k = self.k
+        for player in (PLAYER2, PLAYER1):
+            if self.ai[player]:
+                self.fire(player, rng.random(k) < 0.08)
+        for player in (PLAYER1, PLAYER2):
+            if not self.ai[player] and actions is not None:
+                self.angle[:, player] = actions[:, player, ANGLE]
+                fire = (actions[:, player, FIRE] > 0) & (self.time >= self.ready[:, player])
+                self.ready[fire, player] = self.time[fire] + 0.3
+                self.fire(player, fire)
+        # ---- ai aiming and ramming ----
+        for player in (PLAYER2, PLAYER1):
+            if self.ai[player]:
+                diff = self.pos[:, player] - self.pos[:, 1 - player]
+                self.angle[:, player] = -np.degrees(np.arctan2(diff[:, 1], diff[:, 0])) - 180
+                ram = rng.random(k) < 0.02
+                self.move[ram, player] -= diff[ram] * self.difficulty
+        # ---- corner cannons: aim at what is near, lazyball first ----
+        y = self.height // 2
+        everything = np.arange(k)
+        for cx, cy, color in ((0, y - 300, 0), (self.width, y - 300, 1),
+                              (0, y + 300, 0), (self.width, y + 300, 1)):
+            near = np.hypot(self.pos[:, :3, 0] - cx, self.pos[:, :3, 1] - cy) < 600
+            second = near[:, PLAYER2] & (~near[:, PLAYER1] | (rng.random(k) < 0.5))
+            target = np.where(near[:, BALL], BALL, np.where(second, PLAYER2, PLAYER1))
+            aiming = near.any(axis=1)
+            dx = self.pos[everything, target, 0] - cx
+            dy = self.pos[everything, target, 1] - cy
+            length = np.hypot(dx, dy)
+            length[length == 0] = 1.0
+            dx /= length
+            dy /= length
+            self.spawn(aiming & (rng.random(k) < 0.02), cx + 60 * dx, cy + 60 * dy,
+                       dx * 150, dy * 150, 5, 200, max_distance=540)
+
+    def fire_airhockey(self, actions):
+        """the fire buttons of airhockey: a shot in the direction of the move"""
+        if actions is None:
+            return
+        for player in (PLAYER1, PLAYER2):
+            fire = (actions[:, player, FIRE] > 0) & (self.time >= self.ready[:, player])
+            if not fire.any():
+                continue
+            self.ready[fire, player] = self.time[fire] + 0.3
+            pos = self.pos[:, player]
+            move = self.move[:, player]
+            length = np.hypot(move[:, 0], move[:, 1])
+            still = length == 0
+            dx = np.where(still, 1.0, move[:, 0] / np.where(still, 1.0, length))
+            dy = np.where(still, 0.0, move[:, 1] / np.where(still, 1.0, length))
+            self.spawn(fire, pos[:, 0] + 60 * dx, pos[:, 1] + 60 * dy,
+                       dx * 30, dy * 30, 10, 15, max_age=4)
+
+    def hit_blocks(self):
+        """balls touching a block in front of a goal bounce back
+           (the rect test of PygView.physics, with the block width for y too)"""
+        x = self.pos[:, :, 0]
+        near = np.flatnonzero(((x < 100) | (x > self.width - 100)).ravel())
+        if len(near) == 0:
+            return
+        pos = self.pos.reshape(-1, 2)
+        move = self.move.reshape(-1, 2)
+        r = self.radius.ravel()[near]
+        for bx, by in self.blocks:
+            bw, bh = 100, 15
+            left, top, right, bottom = self.rect(bx, by, bw, bh)
+            px, py = pos[near, 0], pos[near, 1]
+            mx, my = move[near, 0], move[near, 1]
+            cx, cy = np.round(px), np.round(py)
+            hit = (cx - r < right) & (cx + r > left) & (cy - r < bottom) & (cy + r > top)
+            if not hit.any():
+                continue
+            inside_x = (px - r > bx - bw // 2) & (px + r < bx + bw // 2)
+            inside_y = (py - r > by - bw // 2) & (py + r < by + bw // 2)
+            up = hit & (my < 0) & inside_x
+            down = hit & (my > 0) & inside_x
+            vertical = up | down
+            leftward = hit & ~vertical & (mx < 0) & inside_y
+            rightward = hit & ~vertical & (mx > 0) & inside_y
+            pos[near[up], 1] = by + bh // 2 + r[up] + 1
+            pos[near[down], 1] = by - bh // 2 - r[down] - 1
+            pos[near[leftward], 0] = bx + bw // 2 + r[leftward] + 1
+            pos[near[rightward], 0] = bx - bw // 2 - r[rightward] - 1
+            move[near[vertical], 1] *= -1
+            move[near[leftward | rightward], 0] *= -1
+
+    def update(self, dt):
+        """VectorSprite.update for all balls"""
+        dead = self.alive & ((self.age > self.max_age) | (self.distance > self.max_distance))
+        shots = self.pos[:, self.first_shot:]
+        if self.alive[:, self.first_shot:].any():
+            x, y = shots[:, :, 0], shots[:, :, 1]
+            dead[:, self.first_shot:] |= ((x < -MARGIN) | (x > self.width + MARGIN) |
+                                          (y < -MARGIN) | (y > self.height + MARGIN))
+        if dead.any():
+            self.alive[dead] = False
+            self.pos[dead] = np.nan
+            self.move[dead] = 0
+        self.pos += self.move * dt
+        if self.game == "ballwars":
+            self.move *= (self.friction ** (dt * 60))[:, None]
+        self.distance += np.hypot(self.move[:, :, 0], self.move[:, :, 1]) * dt
+        self.age += dt
+        if self.game == "airhockey":
+            # players stay on their side
+            x = self.pos[:, PLAYER1, 0]
+            over = x + 50 > self.rightlimit
+            x[over] = self.rightlimit - 50
+            self.move[over, PLAYER1, 0] = 0
+            x = self.pos[:, PLAYER2, 0]
+            over = x - 50 < self.leftlimit
+            x[over] = self.leftlimit + 50
+            self.move[over, PLAYER2, 0] = 0
+        # players and ball bounce on the edge, the shots fly out
+        self.bounce_on_edge(self.pos[:, :3], self.move[:, :3], self.radius[:, :3],
+                            only_up=self.game == "airhockey")
+
+    def bounce_on_edge(self, pos, move, radius, only_up=False):
+        """the screen edge of VectorSprite.update, pos and move are changed
+           in place (views, or copies written back by the caller)"""
+        x, y = pos[..., 0], pos[..., 1]
+        mx, my = move[..., 0], move[..., 1]
+        out = x - radius < 0
+        x[out] = radius[out]
+        mx[out] *= -1
+        out = y - radius < 0                       # pos.y is not set back here, like in the games
+        if only_up:
+            out &= my < 0
+        my[out] *= -1
+        out = x + radius > self.width
+        x[out] = self.width - radius[out]
+        mx[out] *= -1
+        out = y + radius > self.height
+        y[out] = self.height - radius[out]
+        my[out] *= -1
+        return pos, move
+
+    def players(self, actions):
+        """Ball.update after moving: keys (actions), the random kicks of the
+           ai, the seekers and the speedlimit of airhockey"""
+        rng = self.rng
+        k = self.k
+        for player in (PLAYER1, PLAYER2):
+            move = self.move[:, player]
+            if self.ai[player]:
+                direction = rng.integers(1, 5, k)
+                kick = rng.integers(10, 21, k)
+                move[direction == 1, 1] -= kick[direction == 1]
+                move[direction == 2, 1] += kick[direction == 2]
+                move[direction == 3, 0] -= kick[direction == 3]
+                move[direction == 4, 0] += kick[direction == 4]
+            elif actions is not None:
+                move += np.clip(actions[:, player, :2], -1, 1) * self.playerspeed
+        if self.game == "airhockey":
+            for seeker in (0, 1):
+                diff = self.pos[:, BALL] - self.pos[:, 3 + seeker]
+                length = np.hypot(diff[:, 0], diff[:, 1])
+                length[length == 0] = 1.0
+                self.move[:, 3 + seeker] = diff / length[:, None] * self.seekspeed[:, seeker, None]
+                change = rng.random(k) < 0.01
+                self.seekspeed[change, seeker] = rng.integers(20, 61, int(np.count_nonzero(change)))
+            length = np.hypot(self.move[:, :, 0], self.move[:, :, 1])
+            fast = length > self.speedlimit
+            self.move[fast] *= (self.speedlimit / length[fast])[:, None]
+
+    def update_bouncers(self, dt):
+        """Bouncer.update: bouncers on the edges, goalkeepers up and down"""
+        self.bouncer_pos += self.bouncer_move * dt
+        y = self.bouncer_pos[:, :, 1]
+        my = self.bouncer_move[:, :, 1]
+        upper = self.height // 2 - 100
+        lower = self.height // 2 + 100
+        out = (my < 0) & (y < upper)
+        y[out] = upper
+        my[out] *= -1
+        out = (my > 0) & (y > lower)
+        y[out] = lower
+        my[out] *= -1
+        edge = np.flatnonzero(self.bouncer_bounce)
+        radius = np.broadcast_to(self.bouncer_radius[edge], (self.k, len(edge))).copy()
+        pos, move = self.bounce_on_edge(self.bouncer_pos[:, edge], self.bouncer_move[:, edge], radius)
+        self.bouncer_pos[:, edge] = pos
+        self.bouncer_move[:, edge] = move
+
+    def hit_goals(self):
+        """the ball touches a goal: score, back to the start positions"""
+        half = self.radius[0, BALL]
+        cx = np.round(self.pos[:, BALL, 0])
+        cy = np.round(self.pos[:, BALL, 1])
+        scored = np.zeros(self.k, np.int8)
+        for number, (left, top, right, bottom) in enumerate(self.goals):
+            hit = (cx - half < right) & (cx + half > left) & (cy - half < bottom) & (cy + half > top)
+            hit &= scored == 0
+            scored[hit] = -1 if number == 0 else 1     # goal1 is the goal of player1
+        goal = scored != 0
+        if goal.any():
+            self.score[goal, np.where(scored[goal] > 0, 0, 1)] += 1
+            self.start_positions(goal)
+        return scored
+
+    def hit_bouncers(self):
+        """lazyball against bouncers and goalkeepers, PygView.bounce_lazyball"""
+        ball = self.pos[:, BALL]
+        for number in range(4):
+            diff = ball - self.bouncer_pos[:, number]
+            r = self.radius[:, BALL] + self.bouncer_radius[number]
+            arenas = np.flatnonzero(diff[:, 0] ** 2 + diff[:, 1] ** 2 <= r * r)
+            n = len(arenas)
+            if n == 0:
+                continue
+            pos = np.concatenate((self.pos[arenas, BALL], self.bouncer_pos[arenas, number]))
+            move = np.concatenate((self.move[arenas, BALL], self.bouncer_move[arenas, number]))
+            mass = np.concatenate((self.mass[arenas, BALL], np.full(n, self.bouncer_mass[number])))
+            static = np.arange(2 * n) >= n
+            pairs = np.column_stack((np.arange(n), np.arange(n, 2 * n)))
+            collision.elastic_collision_many(pos, move, mass, static, pairs)
+            self.move[arenas, BALL] = move[:n] * (6.0 * self.bouncefactor)
+
+    def pairs(self):
+        """touching (index1, index2) pairs into pos.reshape(-1, 2), sweep and
+           prune along x in every arena"""
+        k, n = self.k, self.bodies
+        x = self.pos[:, :, 0]
+        left = x - self.radius                     # nan for dead shots: sorted to the end
+        # the order of the last step, sorted again (nearly sorted: cheap)
+        order = np.take_along_axis(self.order, np.argsort(np.take_along_axis(left, self.order, axis=1),
+                                                          axis=1, kind="stable"), axis=1)
+        self.order = order
+        flat = order + (np.arange(k) * n)[:, None]  # body of each place in the order
+        lefts = left.ravel()[flat]
+        rights = (x + self.radius).ravel()[flat]
+        # the candidates of a body are the next bodies in the order that
+        # start before it ends: count them, d places apart at a time
+        counts = np.zeros((k, n), np.intp)
+        for d in range(1, n):
+            starts_before = lefts[:, d:] <= rights[:, :-d]
+            if not starts_before.any():
+                break                              # then also for every d after
+            counts[:, :-d] += starts_before
+        # all candidate pairs at once: (place, place + 1 ... place + count)
+        counts = counts.ravel()
+        places = np.repeat(np.arange(k * n), counts)
+        firsts = np.cumsum(counts) - counts
+        others = places + 1 + np.arange(len(places)) - np.repeat(firsts, counts)
+        flat = flat.ravel()
+        a = flat[places]
+        b = flat[others]
+        pos = self.pos.reshape(-1, 2)
+        radius = self.radius.ravel()
+        dx = pos[a, 0] - pos[b, 0]
+        dy = pos[a, 1] - pos[b, 1]
+        r = radius[a] + radius[b]
+        touching = dx * dx + dy * dy <= r * r
+        return np.column_stack((a[touching], b[touching]))
+
+    def collide(self):
+        """elastic collision of all touching balls in all arenas"""
+        pairs = self.pairs()
+        if len(pairs):
+            collision.elastic_collision_many(self.pos.reshape(-1, 2), self.move.reshape(-1, 2),
+                                             self.mass.ravel(), self.static, pairs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="speed test of many arenas, ai against ai")
+    parser.add_argument("--game", choices=sorted(GAMES), default="ballwars")
+    parser.add_argument("--arenas", type=int, default=1024)
+    parser.add_argument("--steps", type=int, default=600)
+    parser.add_argument("--shots", type=int, default=32, help="shot slots per arena")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    arenas = VecArena(args.arenas, args.game, shots=args.shots, seed=args.seed)
+    actions = None if args.game == "ballwars" else arenas.actions()
+    goals = 0
+    start = time.perf_counter()
+    for step in range(args.steps):
+        scored, done = arenas.step(actions)
+        goals += int(np.count_nonzero(scored))
+    seconds = time.perf_counter() - start
+    print("{} arenas x {} steps in {:.2f} s = {:.0f} arena-steps per ms, {} goals, {} matches, "
+          "{:.1f} shots alive per arena".format(
+          args.arenas, args.steps, seconds, args.arenas * args.steps / seconds / 1000, goals,
+          int(arenas.wins.sum()), arenas.alive[:, arenas.first_shot:].sum() / args.arenas))
@@ -0,0 +1,222 @@
+"""
+cache directory of scaled images, stored as raw pixels
+idea: at a big resolution (3840x2160 in menu1.Settings) most of the time
+      before the first frame goes into pygame.image.load (decoding the jpg)
+      and transform.scale to the window size. the result is the same at
+      every start, so it is saved once as raw pixels in the folder cache:
+          <content hash of the image file>-<width>x<height>-<format>.raw
+      the next start maps this file into memory (mmap) and makes a
+      surface from it with pygame.image.frombuffer: no decoding, no
+      scaling, and the pixels are already in the byte order of the screen
+      (format BGRA or RGBA), so convert() only copies them.
+      - another image file (new content) or another size is another file
+        name: the cache is rebuilt by itself, the files of an old content
+        of the same image are deleted
+      - the content hash of an image is calculated once and kept in
+        cache/index.json with the modification time and size of the file
+      - files are written under a temporary name and renamed, a game that
+        is killed while writing leaves no broken cache file
+usage:
+    self.background = assetcache.load(os.path.join("data", "autumn.jpg"), (width, height))
+    Tank.image = assetcache.load(os.path.join("data", "tank1.png"), (65, 45), alpha=True)
+    print(assetcache.cache.stats())
+    python3 assetcache.py --size 3840x2160   # time to load: no cache, cold cache, warm cache
+this module must be in the same directory as the game files.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import weakref
+import pygame
+
+# pygame < 2.1.3 only knows tostring
+_tobytes = getattr(pygame.image, "tobytes", None) or pygame.image.tostring
+
+
+class AssetCache(object):
+    """scaled images as raw pixel files in folder"""
+
+    def __init__(self, folder="cache"):
+        self.folder = folder
+        self.lock = threading.Lock()            # index, files: backgrounds.py loads in a thread
+        self._index = None                      # { path: [mtime_ns, size, hash] }
+        self._buffers = weakref.WeakKeyDictionary()  # { surface: mmap } for not converted surfaces
+        # ---- counters ----
+        self.hits = 0
+        self.builds = 0
+        self.seconds = 0.0
+
+    # ---- content hash ----
+    def index(self):
+        if self._index is None:
+            try:
+                with open(os.path.join(self.folder, "index.json")) as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def content_hash(self, path):
+        """hash of the file content, calculated again only when the file changed"""
+        stat = os.stat(path)
+        with self.lock:
+            entry = self.index().get(path)
+        if entry is not None and entry[:2] == [stat.st_mtime_ns, stat.st_size]:
+            return entry[2]
+        with open(path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()[:20]
+        with self.lock:
+            index = self.index()
+            if entry is not None and entry[2] != digest:
+                self.remove(entry[2])           # old content of this file
+            index[path] = [stat.st_mtime_ns, stat.st_size, digest]
+            os.makedirs(self.folder, exist_ok=True)
+            self.write(os.path.join(self.folder, "index.json"), json.dumps(index).encode())
+        return digest
+
+    def remove(self, digest):
+        for name in os.listdir(self.folder):
+            if name.startswith(digest + "-"):
+                os.remove(os.path.join(self.folder, name))
+
+    def write(self, filename, data):
+        """write under a temporary name, then rename (atomic)"""
+        temporary = "{}.{}-{}.tmp".format(filename, os.getpid(), threading.get_ident())
+        with open(temporary, "wb") as f:
+            f.write(data)
+        os.replace(temporary, filename)
+
+    # ---- pixel format ----
+    @staticmethod
+    def pixel_format(alpha):
+        """BGRA when the screen keeps its pixels as blue, green, red (most
+           systems), else RGBA. without a screen: RGBA"""
+        screen = pygame.display.get_surface()
+        if screen is not None and screen.get_bitsize() == 32 and screen.get_masks()[:3] == (0xff0000, 0xff00, 0xff):
+            return "BGRA"
+        return "RGBA"
+
+    # ---- loading ----
+    def build(self, path, size, alpha):
+        """load and scale like the games do"""
+        image = pygame.image.load(path)
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha() if alpha else image.convert()
+        if size is not None and image.get_size() != size:
+            image = pygame.transform.scale(image, size)
+        return image
+
+    def load(self, path, size=None, alpha=False, convert=True):
+        """like pygame.image.load + pygame.transform.scale(image, size) +
+           convert / convert_alpha, from the cache when possible.
+           convert: True for the format of the screen, a Surface for its
+           format, False for the surface on the mapped file itself (copy on
+           write, no copy at all)"""
+        start = time.perf_counter()
+        size = tuple(size) if size is not None else None
+        fmt = self.pixel_format(alpha)
+        digest = self.content_hash(path)
+        name = None
+        if size is not None:
+            name = os.path.join(self.folder, "{}-{}x{}-{}{}.raw".format(
+                   digest, size[0], size[1], fmt, "a" if alpha else ""))
+        surface = None
+        if name is not None and os.path.exists(name):
+            with open(name, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+            surface = pygame.image.frombuffer(buffer, size, fmt)
+            self._buffers[surface] = buffer
+            if not alpha:
+                surface.set_alpha(None)         # opaque, like convert()
+            self.hits += 1
+        else:
+            surface = self.build(path, size, alpha)
+            if size is None:
+                size = surface.get_size()
+                name = os.path.join(self.folder, "{}-{}x{}-{}{}.raw".format(
+                       digest, size[0], size[1], fmt, "a" if alpha else ""))
+            os.makedirs(self.folder, exist_ok=True)
+            self.write(name, _tobytes(surface, fmt))
+            self.builds += 1
+            convert = convert and not isinstance(convert, bool)   # built ones are converted already
+        if convert is True and pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha() if alpha else surface.convert()
+        elif isinstance(convert, pygame.Surface):
+            surface = surface.convert_alpha(convert) if alpha else surface.convert(convert)
+        self.seconds += time.perf_counter() - start
+        return surface
+
+    def clear(self):
+        """delete all cache files"""
+        with self.lock:
+            shutil.rmtree(self.folder, ignore_errors=True)
+            self._index = None
+
+    def stats(self):
+        return "assetcache: {} from cache, {} built, {:.1f} ms".format(
+               self.hits, self.builds, self.seconds * 1000)
+
+
+# ---- one cache for all games ----
+cache = AssetCache()
+load = cache.load
+
+# the images of the games, with their size (None: the size of the window)
+ASSETS = (("autumn-2918906.jpg", None, False),
+          ("panorama-1993645.jpg", None, False),
+          ("tank1.png", (65, 45), True),
+          ("trollface.png", (10, 10), True))
+
+
+def startup(mode, size, folder):
+    """time from pygame.init to all ASSETS loaded, in one process"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    start = time.perf_counter()
+    pygame.init()
+    pygame.display.set_mode(size)
+    assets = AssetCache(folder)
+    for filename, assetsize, alpha in ASSETS:
+        path = os.path.join("data", filename)
+        assetsize = assetsize or size
+        if mode == "none":
+            image = pygame.image.load(path)
+            image = image.convert_alpha() if alpha else image.convert()
+            pygame.transform.scale(image, assetsize)
+        else:
+            assets.load(path, assetsize, alpha)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="startup time with and without the asset cache")
+    parser.add_argument("--size", default="3840x2160", help="window size, like 2560x1440")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--mode", choices=("none", "cold", "warm"), help=argparse.SUPPRESS)
+    parser.add_argument("--folder", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    size = tuple(int(number) for number in args.size.split("x"))
+    if args.mode is not None:
+        print(startup(args.mode, size, args.folder))
+        sys.exit()
+    results = {"none": [], "cold": [], "warm": []}
+    for run in range(args.runs):
+        folder = tempfile.mkdtemp(prefix="assetcache")
+        try:
+            for mode in ("none", "cold", "warm"):   # every run in a new process
+                output = subprocess.run([sys.executable, __file__, "--mode", mode, "--size", args.size,
+                                         "--folder", folder], capture_output=True, text=True).stdout
+                results[mode].append(float(output.split()[-1]) * 1000)
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+    print("{}: pygame.init, set_mode and {} images".format(args.size, len(ASSETS)))
+    for mode, label in (("none", "no cache"), ("cold", "cold cache"), ("warm", "warm cache")):
+        print("    {:10} best {:7.1f} ms   mean {:7.1f} ms".format(
+              label, min(results[mode]), sum(results[mode]) / len(results[mode])))
@@ -0,0 +1,165 @@
+"""
+background images, loaded ahead of time by a worker thread
+idea: a background is a big jpg from the folder data. pygame.image.load,
+      transform.scale to the window size and convert take 30...200 ms, in
+      the mainloop this stops the game for some frames when a new wave
+      starts. (and a background that is not converted to the pixel format
+      of the screen makes every blit of it slower.)
+      - prefetch(filename) only puts the file into a queue. a worker thread
+        loads, scales and converts it while the game goes on (pygame lets
+        other threads run while it decodes and scales). convert uses a
+        1x1 template surface in the format of the screen.
+      - get(filename) returns the finished background. if the worker is
+        still busy with it, get waits for the rest; a file that was never
+        prefetched is loaded at once, like before. so is a file the worker
+        failed on (any exception): the worker goes on with the next job,
+        and the error comes from get(), in the mainloop.
+      - finished backgrounds are kept in a least recently used cache
+        (imagecache.SurfaceCache with a budget in bytes), the key is
+        (filename, size): going back to an old background costs nothing
+      - a background goes into the cache only when it is complete, the game
+        gets a finished surface or waits, never a half painted one
+      - loading goes through assetcache: from the second start on, the
+        scaled background comes from a raw pixel file in the folder cache
+      get() remembers how long the mainloop had to wait (latency), the
+      worker how long loading took, see stats(). never paint on a
+      background from get(), it is shared.
+usage:
+    self.backgrounds = backgrounds.BackgroundLoader(self.screen.get_size())
+    self.background = self.backgrounds.get("autumn.jpg")    # for this wave
+    self.backgrounds.prefetch("panorama.jpg")               # for the next wave
+    print(self.backgrounds.stats())
+    python3 backgrounds.py     # longest frame while loading: in the mainloop / prefetched
+this module must be in the same directory as the game files.
+"""
+import collections
+import os
+import queue
+import threading
+import time
+import pygame
+import imagecache  # imagecache.py must be in same directory as this file
+import assetcache  # assetcache.py must be in same directory as this file
+
+
+class BackgroundLoader(object):
+    """loads, scales and converts backgrounds on a worker thread"""
+
+    def __init__(self, size, folder="data", budget=64 * 1024 * 1024, color=(255, 255, 255)):
+        self.size = tuple(size)
+        self.folder = folder
+        self.color = color                      # for a missing file
+        self.cache = imagecache.SurfaceCache(budget)
+        self.lock = threading.Lock()            # for cache and pending
+        self.pending = {}                       # { key: threading.Event } queued or loading
+        self.jobs = queue.Queue()
+        if pygame.display.get_surface() is not None:
+            self.template = pygame.Surface((1, 1)).convert()
+        else:
+            self.template = None                # no screen yet: not converted
+        # ---- counters, in milliseconds ----
+        self.latency = collections.deque(maxlen=100)    # waited in get()
+        self.loadtimes = collections.deque(maxlen=100)  # worker, per background
+        self.loaded_now = 0                     # get() without prefetch
+        self.worker = threading.Thread(target=self.work, name="backgrounds", daemon=True)
+        self.worker.start()
+
+    def key(self, filename, size):
+        return (filename, tuple(size or self.size))
+
+    def load(self, filename, size):
+        """load, scale and convert one background (in any thread)"""
+        try:
+            if filename is None:
+                raise pygame.error("no background file")
+            return assetcache.load(os.path.join(self.folder, filename), size,
+                                   convert=self.template or False)
+        except (pygame.error, OSError):
+            image = pygame.Surface(size)
+            image.fill(self.color)
+        if self.template is not None:
+            image = image.convert(self.template)
+        return image
+
+    def work(self):
+        while True:
+            key = self.jobs.get()
+            start = time.perf_counter()
+            try:
+                surface = self.load(*key)
+                with self.lock:
+                    self.cache.put(key, surface)
+                    self.loadtimes.append((time.perf_counter() - start) * 1000)
+            except Exception:
+                pass        # not in the cache: get() loads it again, and raises there
+            finally:
+                with self.lock:
+                    done = self.pending.pop(key)
+                done.set()  # never leave get() waiting
+
+    def prefetch(self, filename, size=None):
+        """start loading filename on the worker thread, returns at once"""
+        key = self.key(filename, size)
+        with self.lock:
+            if key in self.cache or key in self.pending:
+                return
+            self.pending[key] = threading.Event()
+        self.jobs.put(key)
+
+    def get(self, filename, size=None):
+        """the finished background, waits for the worker if needed"""
+        key = self.key(filename, size)
+        start = time.perf_counter()
+        with self.lock:
+            done = self.pending.get(key)
+        if done is not None:
+            done.wait()
+        with self.lock:
+            surface = self.cache.surfaces.get(key)
+            if surface is not None:
+                self.cache.hits += 1
+                self.cache.surfaces.move_to_end(key)
+        if surface is None:
+            self.loaded_now += 1
+            self.cache.misses += 1
+            surface = self.load(*key)
+            with self.lock:
+                self.cache.put(key, surface)
+        self.latency.append((time.perf_counter() - start) * 1000)
+        return surface
+
+    def stats(self):
+        def summary(values):
+            if not values:
+                return "-"
+            return "last {:.1f} ms, max {:.1f} ms".format(values[-1], max(values))
+        return "backgrounds: get {} | worker {} | {} loaded without prefetch | {}".format(
+               summary(self.latency), summary(self.loadtimes), self.loaded_now, self.cache.stats())
+
+
+if __name__ == "__main__":
+    # the longest frame of a 60 fps loop while the backgrounds are changed
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    screen = pygame.display.set_mode((1430, 800))
+    filenames = sorted(f for f in os.listdir("data") if f.endswith((".jpg", ".jpeg")))
+    if not filenames:
+        print("no .jpg files in data")
+    for prefetching in (False, True):
+        loader = BackgroundLoader(screen.get_size())
+        longest = 0.0
+        background = loader.get(None)
+        for wave in range(len(filenames)):
+            if prefetching:
+                loader.prefetch(filenames[wave])
+            for frame in range(30):         # half a second per wave
+                start = time.perf_counter()
+                if frame == 29:             # the wave ends
+                    background = loader.get(filenames[wave])
+                screen.blit(background, (0, 0))
+                pygame.display.flip()
+                longest = max(longest, (time.perf_counter() - start) * 1000)
+                time.sleep(max(0.0, 1 / 60 - (time.perf_counter() - start)))
+        print("{}: longest frame {:.1f} ms".format(
+              "prefetched" if prefetching else "loaded in the mainloop", longest))
+        print("    " + loader.stats())
@@ -15,6 +15,9 @@ We would be happy for bug reports!
 """
 
 import pygame 
+import fonts  # fonts.py must be in same directory as this file
+import handles  # handles.py must be in same directory as this file
+import specs  # specs.py must be in same directory as this file
 import math
 import random
 #import menu1
@@ -22,15 +25,24 @@ import os
 import operator
 import math
 import vectorclass2d as v  # vectorclass2d.py must be in same directory as this file
+import broadphase  # broadphase.py must be in same directory as this file
+import dirtyrects  # dirtyrects.py must be in same directory as this file
+import pool  # pool.py must be in same directory as this file
+import timestep  # timestep.py must be in same directory as this file
+import ccd  # ccd.py must be in same directory as this file
+import profiler  # profiler.py must be in same directory as this file
+import subsystems  # subsystems.py must be in same directory as this file
 import textscroller_vertical as ts
+try:
+    import particles # needs numpy
+except ImportError:
+    particles = None
 
 
 def make_text(msg="pygame is cool", fontcolor=(255, 0, 255), fontsize=42, font=None):
-    """returns pygame surface with text. You still need to blit the surface."""
-    myfont = pygame.font.SysFont(font, fontsize)
-    mytext = myfont.render(msg, True, fontcolor)
-    mytext = mytext.convert_alpha()
-    return mytext
+    """returns pygame surface with text. You still need to blit the surface.
+       the surface is shared (fonts.render), do not paint on it"""
+    return fonts.render(msg, fontcolor, fontsize, font)
 
 
 
@@ -51,16 +63,8 @@ def draw_examples(background):
 
 def write(background, text, x=50, y=150, color=(0,0,0),
           fontsize=None, center=False):
-        """write text on pygame surface. """
-        if fontsize is None:
-            fontsize = 24
-        font = pygame.font.SysFont('mono', fontsize, bold=True)
-        fw, fh = font.size(text)
-        surface = font.render(text, True, color)
-        if center: # center text around x,y
-            background.blit(surface, (x-fw//2, y-fh//2))
-        else:      # topleft corner is x,y
-            background.blit(surface, (x,y))
+        """write text on pygame surface. returns the painted rect"""
+        return fonts.write(background, text, x, y, color, fontsize, center)
     
 def elastic_collision(sprite1, sprite2):
         """elasitc collision between 2 VectorSprites (calculated as disc's).
@@ -131,86 +135,60 @@ def elastic_collision(sprite1, sprite2):
 
 class VectorSprite(pygame.sprite.Sprite):
     """base class for sprites. this class inherits from pygames sprite class"""
-    number = 0
-    numbers = {} # { number, Sprite }
+    numbers = handles.HandleTable() # { number: Sprite }, only living sprites
+    pool = None  # a pool.SpritePool, if this sprite can be reused after kill()
+    # default values for missing keywords, merged once per class by specs.spec_of
+    defaults = {"ai": False,
+                "playerspeed": 0,
+                "static": False,
+                "pos": specs.computed(lambda sprite: v.Vec2d(50,50)),
+                "move": specs.computed(lambda sprite: v.Vec2d(0,0)),
+                "radius": 50,
+                "width": specs.computed(lambda sprite: sprite.radius * 2),
+                "height": specs.computed(lambda sprite: sprite.radius * 2),
+                "color": specs.computed(lambda sprite: (random.randint(0,255), random.randint(0,255), random.randint(0,255))),
+                "hitpoints": 100,
+                "mass": 15,
+                "damage": 10,
+                "bounce_on_edge": False,
+                "kill_on_edge": False,
+                "angle": 0, # facing right?
+                "max_age": None,
+                "max_distance": None,
+                "picture": None,
+                "bossnumber": None,
+                "kill_with_boss": False,
+                "sticky_with_boss": False,
+                "friction": None,
+                "upkey": None,
+                "downkey": None,
+                "leftkey": None,
+                "rightkey": None}
     
     def __init__(self, layer=4, **kwargs):
         """create a (black) surface and paint a blue ball on it"""
         self._layer = layer   # pygame Sprite layer
         pygame.sprite.Sprite.__init__(self, self.groups) #call parent class. NEVER FORGET !
         # self groups is set in PygView.paint()
-        self.number = VectorSprite.number # unique number for each sprite
-        VectorSprite.number += 1 
-        VectorSprite.numbers[self.number] = self 
-        # get unlimited named arguments and turn them into attributes
-     
-        for key, arg in kwargs.items():
-            setattr(self, key, arg)
-        # --- default values for missing keywords ----
-        if "ai" not in kwargs:
-            self.ai = False
-        if "playerspeed" not in kwargs:
-            self.playerspeed = 0
-        if "static" not in kwargs:
-            self.static = False
-        if "pos" not in kwargs:
-            self.pos = v.Vec2d(50,50)
-        if "move" not in kwargs:
-            self.move = v.Vec2d(0,0)
-        if "radius" not in kwargs:
-            self.radius = 50
-        if "width" not in kwargs:
-            self.width = self.radius * 2
-        if "height" not in kwargs:
-            self.height = self.radius * 2
-        if "color" not in kwargs:
-            self.color = (random.randint(0,255), random.randint(0,255), random.randint(0,255))
-        if "hitpoints" not in kwargs:
-            self.hitpoints = 100
+        self.reset(**kwargs)
+        self.create_image()
+        self.rect.center = (-300,-300) # avoid blinking image in topleft corner
+        
+    def reset(self, **kwargs):
+        """set all attributes, for a new sprite or one reused from a pool"""
+        self.number = VectorSprite.numbers.add(self) # unique number for each sprite, never reused
+        # get unlimited named arguments and turn them into attributes, default values from defaults
+        specs.spec_of(type(self)).apply(self, kwargs)
         self.hitpointsfull = self.hitpoints # makes a copy
-        if "mass" not in kwargs:
-            self.mass = 10
-        if "damage" not in kwargs:
-            self.damage = 10
-        if "bounce_on_edge" not in kwargs:
-            self.bounce_on_edge = False
-        if "kill_on_edge" not in kwargs:
-            self.kill_on_edge = False
-        if "angle" not in kwargs:
-            self.angle = 0 # facing right?
-        if "max_age" not in kwargs:
-            self.max_age = None
-        if "max_distance" not in kwargs:
-            self.max_distance = None
-        if "picture" not in kwargs:
-            self.picture = None
-        if "bossnumber" not in kwargs:
-            self.bossnumber = None
-        if "kill_with_boss" not in kwargs:
-            self.kill_with_boss = False
-        if "sticky_with_boss" not in kwargs:
-            self.sticky_with_boss = False
-        if "mass" not in kwargs:
-            self.mass = 15
-        if "friction" not in kwargs:
-            self.friction = None
-        if "upkey" not in kwargs:
-            self.upkey = None
-        if "downkey" not in kwargs:
-            self.downkey = None
-        if "leftkey" not in kwargs:
-            self.leftkey = None
-        if "rightkey" not in kwargs:
-            self.rightkey = None
         # ---
         self.age = 0 # in seconds
         self.distance_traveled = 0 # in pixel
-        self.create_image()
-        self.rect.center = (-300,-300) # avoid blinking image in topleft corner
         
     def kill(self):
         del VectorSprite.numbers[self.number] # remove Sprite from numbers dict
         pygame.sprite.Sprite.kill(self)
+        if self.pool is not None:
+            self.pool.release(self) # can be reused by the next shot
         
     def create_image(self):
         
@@ -263,7 +241,8 @@ class VectorSprite(pygame.sprite.Sprite):
                 self.pos = v.Vec2d(boss.pos.x, boss.pos.y)   
         self.pos += self.move * seconds
         if self.friction is not None:
-            self.move *= self.friction # friction between 1.0 and 0.1
+            # friction between 1.0 and 0.1, per 1/60 second (with any step length)
+            self.move *= self.friction ** (seconds * 60)
         self.distance_traveled += self.move.length * seconds
         self.age += seconds
   
@@ -350,8 +329,8 @@ class Cannon(VectorSprite):
 class Ball(VectorSprite):
     """it's a pygame Sprite!"""
         
-    def __init__(self, layer=4, **kwargs):
-        VectorSprite.__init__(self, layer, **kwargs)
+    def reset(self, **kwargs):
+        VectorSprite.reset(self, **kwargs)
         self.readyToFire = 0
 
     def update(self, seconds):
@@ -399,6 +378,19 @@ class Ball(VectorSprite):
         self.image0 = self.image.copy()
         self.mask = pygame.mask.from_surface(self.image)
 class Wreck(VectorSprite):
+    particles = None # a particles.ParticleSystem, set in PygView.paint()
+
+    @classmethod
+    def spawn(cls, **kwargs):
+        """emit a wreck particle into Wreck.particles, or create a Wreck sprite if there is none"""
+        if cls.particles is None:
+            return cls(**kwargs)
+        pos = kwargs["pos"]
+        move = kwargs.get("move", v.Vec2d(0,0))
+        gravity = kwargs.get("gravity", v.Vec2d(0,0))
+        c = ( random.randint(0,255),random.randint(0,255),random.randint(1,255) )
+        cls.particles.emit(pos.x, pos.y, move.x, move.y, max_age=kwargs.get("max_age", 1),
+                           color=c, radius=random.randint(2,6), gravity=(gravity.x, gravity.y))
     
     def update(self, seconds):
         
@@ -460,7 +452,8 @@ class Bouncer(VectorSprite):
                 self.pos = v.Vec2d(boss.pos.x, boss.pos.y)   
         self.pos += self.move * seconds
         if self.friction is not None:
-            self.move *= self.friction # friction between 1.0 and 0.1
+            # friction between 1.0 and 0.1, per 1/60 second (with any step length)
+            self.move *= self.friction ** (seconds * 60)
         self.distance_traveled += self.move.length * seconds
         self.age += seconds
     
@@ -596,33 +589,51 @@ class Goal(VectorSprite):
     
     
     
+# the pygame subsystems of ballwars (no sound), see subsystems.init
+SUBSYSTEMS = ("display", "font", "joystick")
+
+
 class PygView(object):
     width = 0
     height = 0
   
     def __init__(self, width=640, height=400, fps=60, tolerance=5, bouncefactor = 1,
-                 maxgoal=5, playerspeed = 10, playermass = 1000, ai = True, difficulty = 1):
+                 maxgoal=5, playerspeed = 10, playermass = 1000, ai = True, difficulty = 1,
+                 dirty = False, hz = 60, ai1 = False, profile = None):
         """Initialize pygame, window, background, font,...
            default arguments """
-        pygame.init()
+        subsystems.init(*SUBSYSTEMS)
         PygView.width = width    # make global readable
         PygView.height = height
         self.screen = pygame.display.set_mode((self.width, self.height), pygame.DOUBLEBUF)
         self.background = pygame.Surface(self.screen.get_size()).convert()  
         self.background.fill((255,255,255)) # fill background white
         self.clock = pygame.time.Clock()
+        self.profiler = profiler.install(self, profile) # PROFILER=1: F3 profiler overlay, F4 save it as csv
         self.fps = fps
+        self.timestep = timestep.FixedStep(hz) # physics steps per second, independent of fps
         self.playtime = 0.0
         self.tolerance = tolerance
         self.playerspeed = playerspeed
         self.playermass = playermass
         PygView.bouncefactor = bouncefactor
         PygView.maxgoal = maxgoal
-        self.ai = ai
+        self.ai = ai   # player2 is played by the computer
+        self.ai1 = ai1 # player1 too: ai against ai, see batch.py
         self.difficulty = difficulty
         print("boucefactor ist {}",PygView.bouncefactor)
         #self.font = pygame.font.SysFont('mono', 24, bold=True)
         self.paint() 
+        # ---- opt-in: repaint only the changed parts of the screen ----
+        if dirty:
+            self.renderer = dirtyrects.DirtyRenderer(self.screen, self.background)
+        else:
+            self.renderer = None
+
+    def mark(self, rects):
+        """remember painted rects for the dirty rect renderer"""
+        if self.renderer is not None:
+            self.renderer.mark(rects)
         
     def paint(self):
         """painting on the surface and create sprites"""
@@ -641,6 +652,7 @@ class PygView(object):
         self.blockgroup = pygame.sprite.Group()
         self.lazygroup = pygame.sprite.Group()
         Ball.groups = self.allgroup, self.ballgroup # each Ball object belong to those groups
+        self.shots = pool.SpritePool(Ball) # killed shots are reused for the next shot
         Goal.groups = self.allgroup, self.goalgroup
         Block.groups = self.allgroup, self.blockgroup
         #Bullet.groups = self.allgroup, self.bulletgroup
@@ -651,6 +663,12 @@ class PygView(object):
         VectorSprite.groups = self.allgroup
         Bouncer.groups = self.allgroup, self.bouncergroup 
         Wall.group =self.allgroup,self.wallgroup
+        # ---- wrecks as particles instead of sprites ----
+        if particles is not None:
+            self.particles = particles.ParticleSystem()
+        else:
+            self.particles = None
+        Wreck.particles = self.particles
         #Hitpointbar.groups = self.allgroup
         
         x = PygView.width // 2
@@ -675,7 +693,7 @@ class PygView(object):
                             upkey=pygame.K_w, downkey=pygame.K_s, 
                             leftkey=pygame.K_a, rightkey=pygame.K_d, 
                             mass=self.playermass,color=(150,0,0),
-                            friction=0.99, ai = False, playerspeed = self.playerspeed) # creating a Ball Sprite
+                            friction=0.99, ai = self.ai1, playerspeed = self.playerspeed) # creating a Ball Sprite
         self.cannon1 = Cannon(bossnumber = self.player1.number,maxrange=300)
         #self.ball2 = Ball(pos=v.Vec2d(600,350), move=v.Vec2d(0,0), bounce_on_edge=True,mass=5000,color=(0,255,0)) #upkey=pygame.K_UP, downkey=pygame.K_DOWN, leftkey=pygame.K_LEFT, rightkey=pygame.K_RIGHT, mass=500)
         #self.cannon2 = Cannon(bossnumber = self.ball2.number)
@@ -718,6 +736,13 @@ class PygView(object):
         self.block2= Block(pos = v.Vec2d(0,y+123), width = 100, height = 15, color=(0,255,0))
         self.block3= Block(pos = v.Vec2d(PygView.width ,y-125), width = 100, height = 15, color =(0,255,0))
         self.block4= Block(pos = v.Vec2d(PygView.width,y+125), width = 100, height = 15, color = (0,255,0))
+        # ---- fast balls: contacts during the step, see ccd.py ----
+        self.sweep = ccd.Sweep()
+        self.sweep.add_circles(self.ballgroup, self.ballgroup, elastic_collision)
+        self.sweep.add_circles((self.lazyball1,), self.bouncergroup, self.bounce_lazyball)
+        self.sweep.add_boxes(self.ballgroup, self.blockgroup) # reflect
+        self.sweep.add_boxes((self.lazyball1,), self.goalgroup, self.lazyball_in_goal)
+        self.crossed_goal = None # goal the fast lazyball touched during the step
         
         
         #for a in range(3):
@@ -742,6 +767,242 @@ class PygView(object):
         for j in self.joysticks:
             j.init()
                     
+    def bounce_lazyball(self, lazyball, bouncer):
+        """lazyball touches a bouncer or goalkeeper"""
+        elastic_collision(lazyball, bouncer)
+        lazyball.move.x *= 6.0*PygView.bouncefactor
+        lazyball.move.y *= 6.0*PygView.bouncefactor
+
+    def lazyball_in_goal(self, lazyball, goal, nx, ny):
+        """a fast lazyball touches a goal during the step (it could be
+           behind it at the end of the step)"""
+        if self.crossed_goal is None:
+            self.crossed_goal = goal
+
+    def fire(self, player, cannon):
+        """player shoots a ball out of its cannon and is pushed back"""
+        m = v.Vec2d(60,0) # lenght of cannon
+        m = m.rotated(-cannon.angle)
+        p = v.Vec2d(player.pos.x, player.pos.y) + m
+        self.shots.get(pos=p, move=m.normalized()*420+player.move, radius=10,color=(255,0,0),mass=100, kill_on_edge=True, max_age=4)
+        #knockbackeffect
+        player.move+=m.normalized()*-10
+
+    def control(self):
+        """ai, pressed keys and joysticks, once per physics step"""
+        if self.ai and random.random() < 0.08:
+            self.fire(self.player2, self.cannon3)
+        if self.ai1 and random.random() < 0.08:
+            self.fire(self.player1, self.cannon1)
+         
+        # ------ joystick 0 , player1 -------
+        for number, j in enumerate(self.joysticks):
+            if number == 0:
+               x = j.get_axis(0)
+               y = j.get_axis(1)
+               #x1= j.get_axis(2)
+               #y1= j.get_axis(1)
+               #print(x,y)
+               self.player1.move.x += x  *self.playerspeed
+               self.player1.move.y += y  *self.playerspeed
+               #if x1 > 0:
+               #    self.cannon1.rotate(5)
+               #elif x1<0:
+               #    self.cannon1.rotate(-5)
+               buttons = j.get_numbuttons()
+               for b in range(buttons):
+                   #old_pushed = j.get_button( b ) 
+
+                   pushed = j.get_button( b )
+                   if b == 4 and pushed:
+                       self.cannon1.rotate(5)
+                        #Rocket(random.choice(ground), pos3, ex=8)
+                   if b == 5 and pushed:
+                       self.cannon1.rotate(-5)
+                        #Rocket(random.choice(ground), pos3, ex=9)
+                   if b == 1 and pushed:
+                       if self.player1.age < self.player1.readyToFire:
+                           Flytext(50, 150, "Realoding", color = (0,0,1), fontsize = 30)
+                       else:
+                           self.fire(self.player1, self.cannon1)
+                           self.player1.readyToFire = self.player1.age + 0.3
+        
+        ########----- joystick 2, player 2 -----------
+        for number, j in enumerate(self.joysticks):
+            if number == 1:
+               x = j.get_axis(0)
+               y = j.get_axis(1)
+               #x1= j.get_axis(2)
+               #y1= j.get_axis(1)
+               #print(x,y)
+               self.player2.move.x += x  *self.playerspeed
+               self.player2.move.y += y  *self.playerspeed
+               #if x1 > 0:
+               #    self.cannon1.rotate(5)
+               #elif x1<0:
+               #    self.cannon1.rotate(-5)
+               buttons = j.get_numbuttons()
+               for b in range(buttons):
+                   #old_pushed = j.get_button( b ) 
+
+                   pushed = j.get_button( b )
+                   if b == 4 and pushed:
+                       self.cannon3.rotate(5)
+                        #Rocket(random.choice(ground), pos3, ex=8)
+                   if b == 5 and pushed:
+                       self.cannon3.rotate(-5)
+                        #Rocket(random.choice(ground), pos3, ex=9)
+                   if b == 1 and pushed:
+                       if self.player2.age < self.player2.readyToFire:
+                           Flytext(PygView.width-50,150, "Realoding", color = (0,0,1), fontsize = 30)
+                       else:
+                           self.fire(self.player2, self.cannon3)
+                           self.player2.readyToFire = self.player2.age + 0.3
+                            
+        # ------------ pressed keys ------
+        pressed_keys = pygame.key.get_pressed()
+        if pressed_keys[pygame.K_x]:
+            self.cannon1.rotate(5)
+        if pressed_keys[pygame.K_y]:
+            self.cannon1.rotate(-5)
+        if not self.ai:
+            if pressed_keys[pygame.K_k]:
+                self.cannon3.rotate(5)
+            if pressed_keys[pygame.K_l]:
+                self.cannon3.rotate(-5)
+                                        
+        else:
+            #ai control
+            target = self.player1
+            vectordiff =self.cannon3.pos - target.pos
+            self.cannon3.set_angle(-vectordiff.get_angle()-180)
+            #ramming
+            if random.random() < 0.02:
+                self.player2.move -= vectordiff *self.difficulty
+        if self.ai1:
+            #ai control for player1
+            target = self.player2
+            vectordiff =self.cannon1.pos - target.pos
+            self.cannon1.set_angle(-vectordiff.get_angle()-180)
+            #ramming
+            if random.random() < 0.02:
+                self.player1.move -= vectordiff *self.difficulty
+        # ----- auto shooting for corner cannons -------
+                    # corner cannon auto aim
+        for c in [self.cannon5,self.cannon6,self.cannon7,self.cannon8]:
+            d1 = c.pos.get_distance(self.player1.pos)
+            d2 = c.pos.get_distance(self.player2.pos)
+            d3 = c.pos.get_distance(self.lazyball1.pos)
+            targetlist = []
+            if d1< c.max_distance:
+                targetlist.append(self.player1)
+            if d2< c.max_distance:
+                targetlist.append(self.player2)
+            if d3< c.max_distance:
+                targetlist.append(self.lazyball1)
+                # lazyball has highest priority
+                targetlist = [self.lazyball1]
+            if len(targetlist)>0:
+                target = random.choice(targetlist)
+                vectordiff=c.pos-target.pos
+                c.set_angle(-vectordiff.get_angle()-180)
+                #----auto shoot
+                if random.random()<0.02:
+                    m = v.Vec2d(60,0) # lenght of cannon
+                    m = m.rotated(-c.angle)
+                    p = v.Vec2d(c.pos.x, c.pos.y) + m
+                    self.shots.get(pos=p, move=m.normalized()*150+c.move,mass=200,radius=5, max_distance = c.max_distance-60, color=c.color)
+
+    def physics(self, seconds):
+        """move all sprites and handle collisions, once per step"""
+        # ---- collision detection between balls and blocks
+        for bo in self.blockgroup:
+            crashgroup = pygame.sprite.spritecollide(bo, self.ballgroup,
+                         False, pygame.sprite.collide_rect)
+            for ba in crashgroup:
+                if ba.move.y < 0 and ((ba.pos.x-ba.radius) > (bo.pos.x-bo.width //2) and
+                                      (ba.pos.x+ba.radius) < (bo.pos.x+bo.width //2)):
+                    # moving up
+                    ba.pos.y = bo.pos.y + bo.height // 2 + ba.radius + 1 
+                    ba.move.y *= -1
+                elif ba.move.y > 0 and ((ba.pos.x-ba.radius) > (bo.pos.x-bo.width//2) and
+                                      (ba.pos.x+ba.radius) < (bo.pos.x+bo.width //2)):
+                    # moving down
+                    ba.pos.y = bo.pos.y - bo.height // 2 - ba.radius - 1
+                    ba.move.y *= -1
+                elif ba.move.x < 0 and ((ba.pos.y-ba.radius) > (bo.pos.y - bo.width//2) and
+                                      (ba.pos.y+ba.radius) < (bo.pos.y + bo.width//2)):
+                    # moving left
+                    ba.pos.x = bo.pos.x + bo.width // 2 + ba.radius + 1
+                    ba.move.x *= -1
+                elif ba.move.x > 0 and ((ba.pos.y-ba.radius) > (bo.pos.y - bo.width//2) and
+                                      (ba.pos.y+ba.radius) < (bo.pos.y + bo.width//2)):
+                    # moving right
+                    ba.pos.x = bo.pos.x - bo.width // 2 - ba.radius - 1
+                    ba.move.x *= -1
+
+        # fast balls would jump through blocks, bouncers, goals and other balls
+        self.crossed_goal = None
+        self.sweep.run(seconds)
+        self.allgroup.update(seconds) # would also work with ballgroup
+
+        # ---- collision detection for lazyball1
+        g = self.crossed_goal or pygame.sprite.spritecollideany(self.lazyball1, self.goalgroup)
+        if g is not None:
+            if g.number == self.goal1.number:
+                for p in range(100):
+                    m = v.Vec2d(random.randint(50,100),0)
+                    m.rotate(random.randint(0,360))
+                    Wreck.spawn(pos=v.Vec2d(self.lazyball1.pos.x,self.lazyball1.pos.y),
+                    move = m, gravity = v.Vec2d(0,50),max_age = random.random()*3+1)
+                self.p2score += 1
+                Flytext(PygView.width// 2, PygView.height// 2, "Goaaaaaal!!!", color = (100,100,100), fontsize = 99)
+                #print(g)
+                #print("collision! x {}     y {}".format(self.lazyball1.pos.x, self.lazyball1.pos.y))
+            else:
+                for p in range(100):
+                    m = v.Vec2d(random.randint(50,100),0)
+                    m.rotate(random.randint(0,360))
+                    Wreck.spawn(pos=v.Vec2d(self.lazyball1.pos.x,self.lazyball1.pos.y),
+                    move = m, gravity = v.Vec2d(0,50),max_age = random.random()*3+1)
+                self.p1score += 1
+                Flytext(PygView.width// 2, PygView.height// 2, "Goaaaaaal!!!", color = (100,0,0), fontsize = 99)
+            #--reset lazyball ---
+            self.lazyball1.pos = v.Vec2d(self.width//2, self.height//2)
+            self.lazyball1.move = v.Vec2d(0,0)
+            #--reset ball1
+            self.player1.pos = v.Vec2d(self.width//2 - 300, self.height//2)
+            self.player1.move = v.Vec2d(0,0)
+            #--reset ball3                
+            self.player2.pos = v.Vec2d(self.width//2 +300, self.height//2)
+            self.player2.move = v.Vec2d(0,0)
+        # -- - - - - - - - - -- collision detection between lazyball and bouncer- - - - - -- - -
+        #g = pygame.sprite.spritecollideany(self.lazyball1, self.bouncergroup)
+        crashgroup = pygame.sprite.spritecollide(self.lazyball1, self.bouncergroup, False, pygame.sprite.collide_circle)
+        #if g is not None:
+        for b in crashgroup:
+            self.bounce_lazyball(self.lazyball1, b)
+        # - - - - - - - - - - -collision detection between lazyball and hwall- - - - - - - - - 
+        crashgroup = pygame.sprite.spritecollide(self.lazyball1, self.hwallgroup, False, pygame.sprite.collide_mask)
+        for w in crashgroup:
+            elastic_collision(w,self.lazyball1)
+        # --------- collision detection between ball and other balls
+        # broadphase returns every pair only once (no self-collision, no double calculation)
+        for ball, otherball in broadphase.collide_pairs(self.ballgroup):
+            elastic_collision(ball, otherball) # change dx and dy of both sprites
+        # ---------- collision detection between bullet and other bullets
+        #for bullet in self.bulletgroup:
+            #crashgroup = pygame.sprite.spritecollide(bullet, self.bulletgroup, False, pygame.sprite.collide_circle)
+            #for otherbullet in crashgroup:
+                #if bullet.number > otherbullet.number:
+                     #elastic_collision(bullet, otherball) # change dx and dy of both sprites
+        #-----collision detection between ball and goal-----
+                        
+        # -------- remove dead -----
+        #for sprite in self.ballgroup:
+        #    if sprite.hitpoints < 1:
+        #        sprite.kill()
+
     def run(self):
         """The mainloop"""
         
@@ -786,168 +1047,31 @@ class PygView(object):
                         
                         
                     if event.key == pygame.K_c:
-                        m = v.Vec2d(60,0) # lenght of cannon
-                        m = m.rotated(-self.cannon1.angle)
-                        p = v.Vec2d(self.player1.pos.x, self.player1.pos.y) + m
-                        Ball(pos=p, move=m.normalized()*420+self.player1.move, radius=10,color=(255,0,0),mass=100, kill_on_edge=True, max_age=4) # move=v.Vec2d(0,0),
-                        #knockbackeffect
-                        self.player1.move+=m.normalized()*-10 
+                        self.fire(self.player1, self.cannon1)
                     if event.key == pygame.K_m:
-                        m = v.Vec2d(60,0) # lenght of cannon
-                        m = m.rotated(-self.cannon3.angle)
-                        p = v.Vec2d(self.player2.pos.x, self.player2.pos.y) + m
-                        Ball(pos=p, move=m.normalized()*420+self.player2.move, radius=10,color=(255,0,0),mass=100, kill_on_edge=True, max_age=4) # move=v.Vec2d(0,0),
-                        #knockbackeffect
-                        self.player2.move+=m.normalized()*-10
+                        self.fire(self.player2, self.cannon3)
 
                     if event.key == pygame.K_LEFT:
                         self.player1.rotate(1) #
                         
                        
-            if self.ai and random.random() < 0.08:
-                        m = v.Vec2d(60,0) # lenght of cannon
-                        m = m.rotated(-self.cannon3.angle)
-                        p = v.Vec2d(self.player2.pos.x, self.player2.pos.y) + m
-                        Ball(pos=p, move=m.normalized()*420+self.player2.move, radius=10,color=(255,0,0),mass=100, kill_on_edge=True, max_age=4) # move=v.Vec2d(0,0),
-                        #knockbackeffect
-                        self.player2.move+=m.normalized()*-10
-             
-            # ------ joystick 0 , player1 -------
-            for number, j in enumerate(self.joysticks):
-                if number == 0:
-                   x = j.get_axis(0)
-                   y = j.get_axis(1)
-                   #x1= j.get_axis(2)
-                   #y1= j.get_axis(1)
-                   #print(x,y)
-                   self.player1.move.x += x  *self.playerspeed
-                   self.player1.move.y += y  *self.playerspeed
-                   #if x1 > 0:
-                   #    self.cannon1.rotate(5)
-                   #elif x1<0:
-                   #    self.cannon1.rotate(-5)
-                   buttons = j.get_numbuttons()
-                   for b in range(buttons):
-                       #old_pushed = j.get_button( b ) 
-
-                       pushed = j.get_button( b )
-                       if b == 4 and pushed:
-                           self.cannon1.rotate(5)
-                            #Rocket(random.choice(ground), pos3, ex=8)
-                       if b == 5 and pushed:
-                           self.cannon1.rotate(-5)
-                            #Rocket(random.choice(ground), pos3, ex=9)
-                       if b == 1 and pushed:
-                           if self.player1.age < self.player1.readyToFire:
-                               Flytext(50, 150, "Realoding", color = (0,0,1), fontsize = 30)
-                           else:
-                               m = v.Vec2d(60,0) # lenght of cannon
-                               m = m.rotated(-self.cannon1.angle)
-                               p = v.Vec2d(self.player1.pos.x, self.player1.pos.y) + m
-                               Ball(pos=p, move=m.normalized()*420+self.player1.move, radius=10,color=(255,0,0),mass=100, kill_on_edge=True, max_age=4) # move=v.Vec2d(0,0),
-                               #knockbackeffect
-                               self.player1.move+=m.normalized()*-10
-                               self.player1.readyToFire = self.player1.age + 0.3
-            
-            ########----- joystick 2, player 2 -----------
-            for number, j in enumerate(self.joysticks):
-                if number == 1:
-                   x = j.get_axis(0)
-                   y = j.get_axis(1)
-                   #x1= j.get_axis(2)
-                   #y1= j.get_axis(1)
-                   #print(x,y)
-                   self.player2.move.x += x  *self.playerspeed
-                   self.player2.move.y += y  *self.playerspeed
-                   #if x1 > 0:
-                   #    self.cannon1.rotate(5)
-                   #elif x1<0:
-                   #    self.cannon1.rotate(-5)
-                   buttons = j.get_numbuttons()
-                   for b in range(buttons):
-                       #old_pushed = j.get_button( b ) 
-
-                       pushed = j.get_button( b )
-                       if b == 4 and pushed:
-                           self.cannon3.rotate(5)
-                            #Rocket(random.choice(ground), pos3, ex=8)
-                       if b == 5 and pushed:
-                           self.cannon3.rotate(-5)
-                            #Rocket(random.choice(ground), pos3, ex=9)
-                       if b == 1 and pushed:
-                           if self.player2.age < self.player2.readyToFire:
-                               Flytext(PygView.width-50,150, "Realoding", color = (0,0,1), fontsize = 30)
-                           else:
-                               m = v.Vec2d(60,0) # lenght of cannon
-                               m = m.rotated(-self.cannon3.angle)
-                               p = v.Vec2d(self.player2.pos.x, self.player2.pos.y) + m
-                               Ball(pos=p, move=m.normalized()*420+self.player2.move, radius=10,color=(255,0,0),mass=100, kill_on_edge=True, max_age=4) # move=v.Vec2d(0,0),
-                               #knockbackeffect
-                               self.player2.move+=m.normalized()*-10
-                               self.player2.readyToFire = self.player2.age + 0.3
-                                
-            # ------------ pressed keys ------
-            pressed_keys = pygame.key.get_pressed()
-            if pressed_keys[pygame.K_x]:
-                self.cannon1.rotate(5)
-            if pressed_keys[pygame.K_y]:
-                self.cannon1.rotate(-5)
-            if not self.ai:
-                if pressed_keys[pygame.K_k]:
-                    self.cannon3.rotate(5)
-                if pressed_keys[pygame.K_l]:
-                    self.cannon3.rotate(-5)
-                                            
-            else:
-                #ai control
-                target = self.player1
-                vectordiff =self.cannon3.pos - target.pos
-                self.cannon3.set_angle(-vectordiff.get_angle()-180)
-                #ramming
-                if random.random() < 0.02:
-                    self.player2.move -= vectordiff *self.difficulty
-            # ----- auto shooting for corner cannons -------
-                        # corner cannon auto aim
-            for c in [self.cannon5,self.cannon6,self.cannon7,self.cannon8]:
-                d1 = c.pos.get_distance(self.player1.pos)
-                d2 = c.pos.get_distance(self.player2.pos)
-                d3 = c.pos.get_distance(self.lazyball1.pos)
-                targetlist = []
-                if d1< c.max_distance:
-                    targetlist.append(self.player1)
-                if d2< c.max_distance:
-                    targetlist.append(self.player2)
-                if d3< c.max_distance:
-                    targetlist.append(self.lazyball1)
-                    # lazyball has highest priority
-                    targetlist = [self.lazyball1]
-                if len(targetlist)>0:
-                    target = random.choice(targetlist)
-                    vectordiff=c.pos-target.pos
-                    c.set_angle(-vectordiff.get_angle()-180)
-                    #----auto shoot
-                    if random.random()<0.02:
-                        m = v.Vec2d(60,0) # lenght of cannon
-                        m = m.rotated(-c.angle)
-                        p = v.Vec2d(c.pos.x, c.pos.y) + m
-                        Ball(pos=p, move=m.normalized()*150+c.move,mass=200,radius=5, max_distance = c.max_distance-60, color=c.color)
-                    
-         
-          
             # delete everything on screen
-            self.screen.blit(self.background, (0, 0)) 
+            if self.renderer is None:
+                self.screen.blit(self.background, (0, 0)) 
+            else:
+                self.renderer.clear() # only where something was painted
             
             # write text below sprites
-            write(self.screen, "FPS: {:6.3}  PLAYTIME: {:6.3} SECONDS".format(
-                           self.clock.get_fps(), self.playtime), x=self.width//2, y=50, center=True,)
+            self.mark(write(self.screen, "FPS: {:6.3}  PLAYTIME: {:6.3} SECONDS".format(
+                           self.clock.get_fps(), self.playtime), x=self.width//2, y=50, center=True,))
             #--- score player1 ----- 
-            write(self.screen, "{}".format(self.p1score), color=(200,0,0),
+            self.mark(write(self.screen, "{}".format(self.p1score), color=(200,0,0),
                   center=True, fontsize=155, x=PygView.width //3, 
-                  y=PygView.height // 2)
+                  y=PygView.height // 2))
             #--- score player2 ----
-            write(self.screen, "{}".format(self.p2score), color=(200,0,0),
+            self.mark(write(self.screen, "{}".format(self.p2score), color=(200,0,0),
                   center=True, fontsize=155, x=PygView.width //3 * 2, 
-                  y=PygView.height // 2)
+                  y=PygView.height // 2))
             
             # you can use: pygame.sprite.collide_rect, pygame.sprite.collide_circle, pygame.sprite.collide_mask
             # the False means the colliding sprite is not killed
@@ -960,37 +1084,19 @@ class PygView(object):
             #       elastic_collision(ball, bullet) # change dx and dy of both sprites
             #       ball.hitpoints -= bullet.damage
             
-            # ---- collision detection between balls and blocks
-            for bo in self.blockgroup:
-                crashgroup = pygame.sprite.spritecollide(bo, self.ballgroup,
-                             False, pygame.sprite.collide_rect)
-                for ba in crashgroup:
-                    if ba.move.y < 0 and ((ba.pos.x-ba.radius) > (bo.pos.x-bo.width //2) and
-                                          (ba.pos.x+ba.radius) < (bo.pos.x+bo.width //2)):
-                        # moving up
-                        ba.pos.y = bo.pos.y + bo.height // 2 + ba.radius + 1 
-                        ba.move.y *= -1
-                    elif ba.move.y > 0 and ((ba.pos.x-ba.radius) > (bo.pos.x-bo.width//2) and
-                                          (ba.pos.x+ba.radius) < (bo.pos.x+bo.width //2)):
-                        # moving down
-                        ba.pos.y = bo.pos.y - bo.height // 2 - ba.radius - 1
-                        ba.move.y *= -1
-                    elif ba.move.x < 0 and ((ba.pos.y-ba.radius) > (bo.pos.y - bo.width//2) and
-                                          (ba.pos.y+ba.radius) < (bo.pos.y + bo.width//2)):
-                        # moving left
-                        ba.pos.x = bo.pos.x + bo.width // 2 + ba.radius + 1
-                        ba.move.x *= -1
-                    elif ba.move.x > 0 and ((ba.pos.y-ba.radius) > (bo.pos.y - bo.width//2) and
-                                          (ba.pos.y+ba.radius) < (bo.pos.y + bo.width//2)):
-                        # moving right
-                        ba.pos.x = bo.pos.x - bo.width // 2 - ba.radius - 1
-                        ba.move.x *= -1
-                    
-            
-            
             # ----------- clear, draw , update, flip -----------------  
-            self.allgroup.update(seconds) # would also work with ballgroup
-            self.allgroup.draw(self.screen)  
+            # ---- physics in steps of always the same time, see timestep.py ----
+            for step in range(self.timestep.advance(seconds)):
+                timestep.snapshot(self.allgroup) # position before the step, for interpolate
+                self.control()
+                self.physics(self.timestep.dt) # fast balls are handled by self.sweep
+            # draw the sprites between their last two positions
+            moved = timestep.interpolate(self.allgroup, self.timestep.alpha)
+            self.mark(self.allgroup.draw(self.screen))
+            timestep.restore(moved) # collision detection uses the real rects
+            if self.particles is not None:
+                self.particles.update(seconds)
+                self.mark(self.particles.draw(self.screen))
             
             
              
@@ -998,90 +1104,32 @@ class PygView(object):
                     
                     
             
-            # ---- collision detection for lazyball1
-            g = pygame.sprite.spritecollideany(self.lazyball1, self.goalgroup)
-            if g is not None:
-                if g.number == self.goal1.number:
-                    for p in range(100):
-                        m = v.Vec2d(random.randint(50,100),0)
-                        m.rotate(random.randint(0,360))
-                        Wreck(pos=v.Vec2d(self.lazyball1.pos.x,self.lazyball1.pos.y),
-                        move = m, gravity = v.Vec2d(0,50),max_age = random.random()*3+1)
-                    self.p2score += 1
-                    Flytext(PygView.width// 2, PygView.height// 2, "Goaaaaaal!!!", color = (100,100,100), fontsize = 99)
-                    #print(g)
-                    #print("collision! x {}     y {}".format(self.lazyball1.pos.x, self.lazyball1.pos.y))
-                else:
-                    for p in range(100):
-                        m = v.Vec2d(random.randint(50,100),0)
-                        m.rotate(random.randint(0,360))
-                        Wreck(pos=v.Vec2d(self.lazyball1.pos.x,self.lazyball1.pos.y),
-                        move = m, gravity = v.Vec2d(0,50),max_age = random.random()*3+1)
-                    self.p1score += 1
-                    Flytext(PygView.width// 2, PygView.height// 2, "Goaaaaaal!!!", color = (100,0,0), fontsize = 99)
-                #--reset lazyball ---
-                self.lazyball1.pos = v.Vec2d(self.width//2, self.height//2)
-                self.lazyball1.move = v.Vec2d(0,0)
-                #--reset ball1
-                self.player1.pos = v.Vec2d(self.width//2 - 300, self.height//2)
-                self.player1.move = v.Vec2d(0,0)
-                #--reset ball3                
-                self.player2.pos = v.Vec2d(self.width//2 +300, self.height//2)
-                self.player2.move = v.Vec2d(0,0)
-            # -- - - - - - - - - -- collision detection between lazyball and bouncer- - - - - -- - -
-            #g = pygame.sprite.spritecollideany(self.lazyball1, self.bouncergroup)
-            crashgroup = pygame.sprite.spritecollide(self.lazyball1, self.bouncergroup, False, pygame.sprite.collide_circle)
-            #if g is not None:
-            for b in crashgroup:
-                elastic_collision(self.lazyball1, b)
-                self.lazyball1.move.x *= 6.0*PygView.bouncefactor   
-                self.lazyball1.move.y *= 6.0*PygView.bouncefactor
-            # - - - - - - - - - - -collision detection between lazyball and hwall- - - - - - - - - 
-            crashgroup = pygame.sprite.spritecollide(self.lazyball1, self.hwallgroup, False, pygame.sprite.collide_mask)
-            for w in crashgroup:
-                elastic_collision(w,self.lazyball1)
-            # --------- collision detection between ball and other balls
-            for ball in self.ballgroup:
-                crashgroup = pygame.sprite.spritecollide(ball, self.ballgroup, False, pygame.sprite.collide_circle)
-                for otherball in crashgroup:
-                    if ball.number > otherball.number:     # make sure no self-collision or calculating collision twice
-                        elastic_collision(ball, otherball) # change dx and dy of both sprites
-            # ---------- collision detection between bullet and other bullets
-            #for bullet in self.bulletgroup:
-                #crashgroup = pygame.sprite.spritecollide(bullet, self.bulletgroup, False, pygame.sprite.collide_circle)
-                #for otherbullet in crashgroup:
-                    #if bullet.number > otherbullet.number:
-                         #elastic_collision(bullet, otherball) # change dx and dy of both sprites
-            #-----collision detection between ball and goal-----
-                            
-            # -------- remove dead -----
-            #for sprite in self.ballgroup:
-            #    if sprite.hitpoints < 1:
-            #        sprite.kill()
-                    
-
             # ---- display moving vector for player1 -----
-            pygame.draw.line(self.screen, (0,200,0), 
+            self.mark(pygame.draw.line(self.screen, (0,200,0), 
                              (self.player1.pos.x, self.player1.pos.y),
                              (self.player1.pos.x + self.player1.move.x,
-                              self.player1.pos.y + self.player1.move.y),10)
+                              self.player1.pos.y + self.player1.move.y),10))
             # ---- display moving vector for player1 -----
-            pygame.draw.line(self.screen, (200,0,0), 
+            self.mark(pygame.draw.line(self.screen, (200,0,0), 
                              (self.player2.pos.x, self.player2.pos.y),
                              (self.player2.pos.x + self.player2.move.x,
-                              self.player2.pos.y + self.player2.move.y),10)
+                              self.player2.pos.y + self.player2.move.y),10))
             # ---- display moving vector for lazyball -----
-            pygame.draw.line(self.screen, (200,200,200), 
+            self.mark(pygame.draw.line(self.screen, (200,200,200), 
                              (self.lazyball1.pos.x, self.lazyball1.pos.y),
                              (self.lazyball1.pos.x + self.lazyball1.move.x,
-                              self.lazyball1.pos.y + self.lazyball1.move.y),10)
+                              self.lazyball1.pos.y + self.lazyball1.move.y),10))
     
-            pygame.display.flip()
+            if self.renderer is None:
+                pygame.display.flip()
+            else:
+                self.renderer.update() # only the dirty rects, or flip
             pygame.display.set_caption("Press ESC to quit. Cannon angle: {}".format(self.cannon1.angle))
             if self.p1score >= PygView.maxgoal:
                 running = False
             if self.p2score >= PygView.maxgoal:
                 running = False
+        profiler.uninstall()
 
     pygame.quit()
     
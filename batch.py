@@ -0,0 +1,208 @@
+"""
+batch runner for headless ballwars matches, ai against ai
+idea: to tune difficulty, playerspeed, playermass and bouncefactor of
+      ballwars one had to watch one match after the other in real time.
+      here many matches run at the same time in a multiprocessing pool,
+      without window, without sound and without waiting for the clock
+      (headless.Simulation, draw=False). both players are played by the
+      computer (PygView(ai=True, ai1=True)), every match has its own seed,
+      so a match can be played again (and watched) with the same seed.
+      - the worker processes live for the whole batch: pygame.init, the
+        display and the imports happen once per worker, not once per match
+        (pygame.quit at the end of PygView.run is skipped in the workers,
+        with processes=1 the batch runs in the calling process and
+        pygame.quit is given back at the end) and the profiler is off
+      - the matches are given to the workers in chunks (imap_unordered),
+        every worker runs at full speed on its own core
+      - the results are collected in columns { column: [values] } and
+        written as json, or as csv when the file name ends with .csv
+      a match ends with maxgoal goals for one player or after max_ticks
+      frames (winner 0: a draw).
+usage:
+    python3 batch.py --matches 1000 --difficulty 0.5 1 2 --playerspeed 5 10
+    python3 batch.py --matches 200 --processes 4 --output results.csv
+    python3 batch.py --help
+or from python:
+    columns = batch.run_batch(batch.matches(100, difficulty=(1, 2)))
+this module must be in the same directory as the game files.
+"""
+import argparse
+import collections
+import contextlib
+import csv
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import time
+
+# the settings of PygView that can be tuned, with the defaults of ballwars
+SETTINGS = collections.OrderedDict((("difficulty", 1),
+                                    ("playerspeed", 10),
+                                    ("playermass", 1000),
+                                    ("bouncefactor", 1)))
+
+COLUMNS = (("seed",) + tuple(SETTINGS) +
+           ("p1score", "p2score", "winner", "ticks", "game_seconds",
+            "wallclock", "ticks_per_second", "ai", "update", "collide", "worker"))
+
+
+def matches(number, seed=0, **settings):
+    """list of match dicts: every combination of the settings (lists of
+       values, the defaults of SETTINGS for missing ones), number matches
+       each, with the seeds seed, seed+1, ..."""
+    values = [settings.get(name) or (default,) for name, default in SETTINGS.items()]
+    result = []
+    seeds = itertools.count(seed)
+    for combination in itertools.product(*values):
+        for i in range(number):
+            match = dict(zip(SETTINGS, combination))
+            match["seed"] = next(seeds)
+            result.append(match)
+    return result
+
+
+# ---- inside the worker processes ----
+_modules = {}
+
+
+def _start_worker():
+    """pool initializer: import (and init) pygame and ballwars once"""
+    import pygame
+    import headless      # headless.py must be in same directory as this file
+    import ballwars      # ballwars.py must be in same directory as this file
+    headless.dummy_drivers()
+    pygame.init()
+    _modules["quit"] = pygame.quit
+    pygame.quit = lambda: None      # the next match uses the same pygame
+    _modules["headless"] = headless
+    _modules["ballwars"] = ballwars
+
+
+def _stop_worker():
+    """undo _start_worker, for a batch in the calling process"""
+    import pygame
+    if "quit" in _modules:
+        pygame.quit = _modules["quit"]
+        pygame.quit()
+    _modules.clear()
+
+
+def play(match, max_ticks=20000):
+    """play one match headless, returns one row (dict) of the results"""
+    if not _modules:
+        _start_worker()
+    headless = _modules["headless"]
+    simulation = headless.Simulation("ballwars", max_ticks, None, match["seed"], draw=False)
+    settings = dict((name, match[name]) for name in SETTINGS)
+    with contextlib.redirect_stdout(io.StringIO()):     # ballwars prints the bouncefactor
+        report = simulation.run(ai=True, ai1=True, profile=False, **settings)
+    view = simulation.view
+    if view.p1score > view.p2score:
+        winner = 1
+    elif view.p2score > view.p1score:
+        winner = 2
+    else:
+        winner = 0
+    row = dict(match)
+    row.update(p1score=view.p1score, p2score=view.p2score, winner=winner,
+               ticks=report["ticks"], game_seconds=report["ticks"] * report["dt"],
+               wallclock=report["seconds"], ticks_per_second=report["ticks_per_second"],
+               ai=report["ai"], update=report["update"], collide=report["collide"],
+               worker=os.getpid())
+    return row
+
+
+def _play(args):
+    return play(*args)
+
+
+# ---- batch ----
+def run_batch(match_list, processes=None, max_ticks=20000, chunksize=None, progress=None):
+    """play all matches in a pool of processes (default: one per core),
+       returns the results as columns { column: [values] } in seed order"""
+    processes = processes or multiprocessing.cpu_count()
+    if chunksize is None:
+        chunksize = max(1, len(match_list) // (processes * 8))
+    rows = []
+    jobs = [(match, max_ticks) for match in match_list]
+    if processes == 1:
+        _start_worker()
+        results = map(_play, jobs)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(processes, initializer=_start_worker)
+        results = pool.imap_unordered(_play, jobs, chunksize)
+    try:
+        for row in results:
+            rows.append(row)
+            if progress is not None:
+                progress(len(rows), len(jobs))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        else:
+            _stop_worker()
+    rows.sort(key=lambda row: row["seed"])
+    return dict((column, [row[column] for row in rows]) for column in COLUMNS)
+
+
+def save(columns, path):
+    """write the columns as json, or as csv rows when path ends with .csv"""
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerows(zip(*(columns[column] for column in COLUMNS)))
+    else:
+        with open(path, "w") as f:
+            json.dump(columns, f)
+
+
+def summary(columns):
+    """one line per combination of settings: matches, wins, goals, length"""
+    groups = collections.OrderedDict()
+    for i in range(len(columns["seed"])):
+        key = tuple(columns[name][i] for name in SETTINGS)
+        groups.setdefault(key, []).append(i)
+    lines = []
+    for key, rows in groups.items():
+        n = len(rows)
+        wins1 = sum(1 for i in rows if columns["winner"][i] == 1)
+        wins2 = sum(1 for i in rows if columns["winner"][i] == 2)
+        goals = sum(columns["p1score"][i] + columns["p2score"][i] for i in rows) / n
+        length = sum(columns["game_seconds"][i] for i in rows) / n
+        lines.append("{}: {} matches, player1 {} / player2 {} wins, {:.1f} goals, "
+                     "{:.1f} s per match".format(
+                     ", ".join("{} {}".format(name, value) for name, value in zip(SETTINGS, key)),
+                     n, wins1, wins2, goals, length))
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="play many headless ballwars matches, ai against ai")
+    parser.add_argument("--matches", type=int, default=10, help="matches for every combination of settings")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first match")
+    for name, default in SETTINGS.items():
+        parser.add_argument("--" + name, type=float, nargs="+", default=None,
+                            help="one or more values (default: {})".format(default))
+    parser.add_argument("--max-ticks", type=int, default=20000, help="a match without winner ends after this many frames")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--output", default="batch_results.json", help="results file, .json or .csv")
+    args = parser.parse_args()
+    settings = dict((name, getattr(args, name)) for name in SETTINGS)
+    match_list = matches(args.matches, args.seed, **settings)
+    start = time.perf_counter()
+    columns = run_batch(match_list, args.processes, args.max_ticks,
+                        progress=lambda done, total: print("\r{} / {} matches".format(done, total), end="", flush=True))
+    seconds = time.perf_counter() - start
+    print()
+    save(columns, args.output)
+    for line in summary(columns):
+        print(line)
+    ticks = sum(columns["ticks"])
+    print("{} matches, {} ticks in {:.1f} s = {:.0f} ticks/sec with {} processes, saved as {}".format(
+          len(match_list), ticks, seconds, ticks / seconds,
+          args.processes or multiprocessing.cpu_count(), args.output))
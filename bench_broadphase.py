@@ -0,0 +1,86 @@
+"""
+benchmark: ball vs ball collision detection
+compares the old loop (spritecollide for every ball, n*n tests)
+with broadphase.collide_pairs (spatial hash) for 100 to 10000 balls.
+prints pair tests per frame and milliseconds per frame (detection + elastic_collision).
+no window is opened. start with: python3 bench_broadphase.py
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import random
+import time
+import pygame
+import vectorclass2d as v
+import broadphase
+from ballwars import elastic_collision
+
+WIDTH, HEIGHT = 1400, 800
+SIZES = (100, 300, 1000, 3000, 10000)
+BRUTE_LIMIT = 3000   # the old loop is skipped above this, it would take minutes
+FRAMES = 5
+
+
+class BenchBall(pygame.sprite.Sprite):
+    """just enough of a VectorSprite for collide_circle and elastic_collision"""
+    number = 0
+
+    def __init__(self, radius):
+        pygame.sprite.Sprite.__init__(self)
+        self.number = BenchBall.number
+        BenchBall.number += 1
+        self.radius = radius
+        self.mass = radius * 10
+        self.static = False
+        self.pos = v.Vec2d(random.randint(0, WIDTH), random.randint(0, HEIGHT))
+        self.move = v.Vec2d(random.randint(-100, 100), random.randint(-100, 100))
+        self.rect = pygame.Rect(0, 0, radius * 2, radius * 2)
+        self.rect.center = (round(self.pos.x), round(self.pos.y))
+
+
+def make_group(n):
+    random.seed(n)
+    group = pygame.sprite.Group()
+    for i in range(n):
+        # mostly small projectiles, a few big player balls
+        group.add(BenchBall(50 if i < 2 else random.choice((5, 10))))
+    return group
+
+
+def brute_frame(group):
+    tests = 0
+    for ball in group:
+        crashgroup = pygame.sprite.spritecollide(ball, group, False, pygame.sprite.collide_circle)
+        tests += len(group)
+        for otherball in crashgroup:
+            if ball.number > otherball.number:
+                elastic_collision(ball, otherball)
+    return tests
+
+
+def grid_frame(group, grid):
+    for ball, otherball in broadphase.collide_pairs(group, grid=grid):
+        elastic_collision(ball, otherball)
+    return grid.tests
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        tests = function(*args)
+    return tests, (time.perf_counter() - start) / FRAMES * 1000
+
+
+if __name__ == "__main__":
+    print("{:>6} {:>12} {:>10} {:>12} {:>10} {:>8}".format(
+          "balls", "old tests", "old ms", "grid tests", "grid ms", "speedup"))
+    for n in SIZES:
+        group = make_group(n)
+        grid = broadphase.SpatialHash()
+        gtests, gms = measure(grid_frame, group, grid)
+        if n <= BRUTE_LIMIT:
+            btests, bms = measure(brute_frame, group)
+            print("{:>6} {:>12} {:>10.2f} {:>12} {:>10.2f} {:>7.1f}x".format(
+                  n, btests, bms, gtests, gms, bms / gms))
+        else:
+            print("{:>6} {:>12} {:>10} {:>12} {:>10.2f} {:>8}".format(
+                  n, n * n, "-", gtests, gms, "-"))
@@ -0,0 +1,69 @@
+"""
+benchmark: elastic collision for many pairs
+compares the old loop (elastic_collision for every pair) with
+collision.elastic_collision_sprites (sprites copied to numpy and back)
+and collision.elastic_collision_many (pos and move already in numpy arrays)
+for the pairs the broadphase finds between 1000 and 10000 balls.
+checks that all three give exactly the same move vectors.
+no window is opened. start with: python3 bench_collision.py
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import random
+import time
+import numpy as np
+import broadphase
+import collision
+from ballwars import elastic_collision
+from bench_broadphase import make_group
+
+SIZES = (1000, 3000, 10000)
+
+
+def prepare(n):
+    """the balls of bench_broadphase and their colliding pairs"""
+    group = make_group(n)
+    for ball in list(group)[::7]:
+        ball.static = True
+    return list(group), broadphase.collide_pairs(group)
+
+
+def run_loop(balls, pairs):
+    for ball, otherball in pairs:
+        elastic_collision(ball, otherball)
+
+
+def run_sprites(balls, pairs):
+    collision.elastic_collision_sprites(pairs)
+
+
+if __name__ == "__main__":
+    print("{:>6} {:>8} {:>7} {:>10} {:>12} {:>10} {:>6}".format(
+          "balls", "pairs", "rounds", "loop ms", "sprites ms", "arrays ms", "same"))
+    for n in SIZES:
+        results = []
+        times = []
+        for function in (run_loop, run_sprites):
+            balls, pairs = prepare(n)
+            random.seed(1)
+            start = time.perf_counter()
+            function(balls, pairs)
+            times.append(time.perf_counter() - start)
+            results.append([(b.move.x, b.move.y) for b in balls])
+        # ---- structure of arrays ----
+        balls, pairs = prepare(n)
+        index = dict((ball, i) for i, ball in enumerate(balls))
+        indexpairs = np.array([(index[a], index[b]) for a, b in pairs])
+        pos = np.array([(b.pos.x, b.pos.y) for b in balls], dtype=float)
+        move = np.array([(b.move.x, b.move.y) for b in balls], dtype=float)
+        mass = np.array([b.mass for b in balls], dtype=float)
+        static = np.array([b.static for b in balls])
+        random.seed(1)
+        start = time.perf_counter()
+        collision.elastic_collision_many(pos, move, mass, static, indexpairs)
+        times.append(time.perf_counter() - start)
+        results.append([tuple(row) for row in move.tolist()])
+        rounds = max(collision.rounds(indexpairs.tolist(), n)) + 1
+        same = results[0] == results[1] == results[2]
+        print("{:>6} {:>8} {:>7} {:>10.2f} {:>12.2f} {:>10.2f} {:>6}".format(
+              n, len(pairs), rounds, times[0] * 1000, times[1] * 1000, times[2] * 1000, str(same)))
@@ -0,0 +1,52 @@
+"""
+benchmark: particles.ParticleSystem with many living firework particles
+keeps COUNT particles alive on a 1430x800 surface and measures
+milliseconds per frame for update() and draw().
+no window is opened. start with: python3 bench_particles.py [count]
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import sys
+import time
+import random
+import pygame
+import particles
+
+WIDTH, HEIGHT = 1430, 800
+FRAMES = 90   # 3 seconds at 30 fps
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    system = particles.ParticleSystem(capacity=count, seed=1)
+    random.seed(1)
+    seconds = 1 / 30
+    update_time = draw_time = 0.0
+    peak = 0
+    for frame in range(FRAMES):
+        # new bursts replace the particles that died
+        while len(system) < count:
+            system.burst(random.randint(0, WIDTH), random.randint(0, HEIGHT // 2),
+                         count=500, speed=random.randint(100, 250), max_age=2,
+                         color=(random.randint(100, 255), random.randint(100, 255), 255),
+                         color2=(40, 0, 0), radius=random.choice((1, 2, 3)),
+                         gravity=(0, 60))
+        screen.fill((0, 0, 0))
+        start = time.perf_counter()
+        system.update(seconds)
+        middle = time.perf_counter()
+        system.draw(screen)
+        end = time.perf_counter()
+        update_time += middle - start
+        draw_time += end - middle
+        peak = max(peak, len(system))
+    update_ms = update_time / FRAMES * 1000
+    draw_ms = draw_time / FRAMES * 1000
+    print("particles: {}  (peak {})".format(count, peak))
+    print("update: {:7.2f} ms/frame".format(update_ms))
+    print("draw:   {:7.2f} ms/frame".format(draw_ms))
+    print("total:  {:7.2f} ms/frame = {:.0f} fps possible".format(
+          update_ms + draw_ms, 1000 / (update_ms + draw_ms)))
+    pygame.quit()
@@ -0,0 +1,114 @@
+"""
+benchmark: construction cost of the short living sprites
+creates Smoke, Explosion, Rocket, Flytext (feuerwerk.py), Ball, Fragment,
+Bonus (airhockey.py) and Ball, Wreck (ballwars.py) over and over and prints
+sprites per second for each class. the "defaults" cases only measure the
+keyword / default value handling (feuerwerk _default_parameters,
+ballwars reset) without painting an image.
+every sprite is taken out of its groups and VectorSprite.numbers again,
+without calling kill() (Rocket.kill would start an explosion).
+the display is a dummy, no window is opened.
+start with:
+    python3 bench_sprites.py           # compare with the stored baseline
+    python3 bench_sprites.py --save    # store the results as new baseline
+the baseline is stored in bench_sprites_baseline.json (machine dependent,
+save it again after changing the computer). a case slower than
+baseline * (1 + tolerance) is reported as REGRESSION and the exit code is 1.
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+import timeit
+import pygame
+import benchtools  # benchtools.py must be in same directory as this file
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_sprites_baseline.json")
+
+import feuerwerk
+import airhockey
+import ballwars   # calls pygame.quit() in the body of class PygView
+import pool
+import vectorclass2d as v
+
+pygame.init()
+pygame.display.set_mode((800, 600))
+
+for module in (feuerwerk, airhockey, ballwars):
+    module.VectorSprite.groups = ()
+for module in (feuerwerk, airhockey, ballwars):
+    module.Flytext.groups = ()
+
+
+def discard(sprite):
+    """take a benchmark sprite out of its groups and its numbers table"""
+    pygame.sprite.Sprite.kill(sprite)
+    numbers = getattr(sprite, "numbers", None)
+    if numbers is not None and sprite.number in numbers:
+        del numbers[sprite.number]
+
+
+def construct(cls, *args, **kwargs):
+    def run():
+        discard(cls(*args, **kwargs))
+    return run
+
+
+def feuerwerk_defaults():
+    sprite = feuerwerk.VectorSprite.__new__(feuerwerk.VectorSprite)
+    def run():
+        sprite._default_parameters(pos=pygame.math.Vector2(100, -100), max_age=4)
+    return run
+
+
+def ballwars_reset():
+    sprite = ballwars.Ball(pos=v.Vec2d(100, 100), radius=5, color=(200, 0, 0))
+    def run():
+        sprite.reset(pos=v.Vec2d(100, 100), move=v.Vec2d(300, 0), radius=5,
+                     color=(200, 0, 0), max_age=4, kill_on_edge=True)
+        del ballwars.VectorSprite.numbers[sprite.number]
+    return run
+
+
+def ballwars_pooled():
+    shots = pool.SpritePool(ballwars.Ball)
+    def run():
+        shot = shots.get(pos=v.Vec2d(100, 100), move=v.Vec2d(300, 0), radius=5,
+                         color=(200, 0, 0), max_age=4, kill_on_edge=True)
+        shot.kill()
+    return run
+
+
+def cases():
+    Vector2 = pygame.math.Vector2
+    return {
+        "feuerwerk defaults": feuerwerk_defaults(),
+        "feuerwerk Smoke": construct(feuerwerk.Smoke, pos=Vector2(100, -100),
+                                     gravity=Vector2(0, 4), max_age=4),
+        "feuerwerk Explosion": construct(feuerwerk.Explosion, pos=Vector2(100, -100),
+                                         max_age=2.1, color=(200, 255, 255), radius=20),
+        "feuerwerk Rocket": construct(feuerwerk.Rocket, pos=Vector2(100, -100),
+                                      move=Vector2(0, 100), speed=100, color=(255, 156, 0)),
+        "feuerwerk Flytext": construct(feuerwerk.Flytext, 100, 100, "hallo"),
+        "airhockey Ball": construct(airhockey.Ball, pos=v.Vec2d(100, 100), radius=10,
+                                    color=(0, 0, 200)),
+        "airhockey Fragment": construct(airhockey.Fragment, pos=v.Vec2d(100, 100),
+                                        move=v.Vec2d(200, 0), radius=5, max_age=1,
+                                        color=(0, 0, 200)),
+        "airhockey Bonus": construct(airhockey.Bonus, pos=v.Vec2d(100, 100), radius=20),
+        "ballwars reset": ballwars_reset(),
+        "ballwars Ball": construct(ballwars.Ball, pos=v.Vec2d(100, 100), move=v.Vec2d(300, 0),
+                                   radius=5, color=(200, 0, 0), max_age=4, kill_on_edge=True),
+        "ballwars Ball pooled": ballwars_pooled(),
+        "ballwars Wreck": construct(ballwars.Wreck, pos=v.Vec2d(100, 100), move=v.Vec2d(0, 50),
+                                    gravity=v.Vec2d(0, 10), max_age=2),
+    }
+
+
+# ---- measuring ----
+def run_all():
+    return {name: benchtools.best(timeit.Timer(function)) * 1e6 for name, function in cases().items()}
+
+
+if __name__ == "__main__":
+    benchtools.main("benchmark sprite construction", run_all, BASELINE,
+                    unit="us/sprite", width=24, rate="sprites/s")
@@ -0,0 +1,284 @@
+"""
+benchmark: vectorclass2d.Vec2d hot paths
+compares Vec2d with pygame.math.Vector2, plain tuples and numpy batches
+for the operations every sprite does every frame:
+construction, + (Vec2d, tuple and scalar operand, the hasattr(other, "__getitem__")
+fallbacks), length, normalized, rotated, get_distance
+and the corner cannon auto aim loop of ballwars.py as macro case.
+prints nanoseconds per vector operation (numpy: per vector of a batch).
+no window is opened.
+start with:
+    python3 bench_vec2d.py           # compare with the stored baseline
+    python3 bench_vec2d.py --save    # store the results as new baseline
+    python3 bench_vec2d.py --tolerance 0.5
+the baseline is stored in bench_vec2d_baseline.json (machine dependent, save
+it again after changing the computer). a case slower than
+baseline * (1 + tolerance) is reported as REGRESSION and the exit code is 1.
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import math
+import random
+import timeit
+import pygame
+import vectorclass2d as v
+import benchtools  # benchtools.py must be in same directory as this file
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_vec2d_baseline.json")
+BATCH = 10000    # vectors per numpy batch
+Vector2 = pygame.math.Vector2
+
+
+# ---- tuple versions of the Vec2d methods ----
+def t_add(a, b):
+    return (a[0] + b[0], a[1] + b[1])
+
+
+def t_length(a):
+    return math.sqrt(a[0] ** 2 + a[1] ** 2)
+
+
+def t_normalized(a):
+    length = math.sqrt(a[0] ** 2 + a[1] ** 2)
+    if length != 0:
+        return (a[0] / length, a[1] / length)
+    return a
+
+
+def t_rotated(a, angle_degrees):
+    radians = math.radians(angle_degrees)
+    cos = math.cos(radians)
+    sin = math.sin(radians)
+    return (a[0] * cos - a[1] * sin, a[0] * sin + a[1] * cos)
+
+
+def t_distance(a, b):
+    return math.sqrt((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2)
+
+
+def t_angle(a):
+    if a[0] == 0 and a[1] == 0:
+        return 0
+    return math.degrees(math.atan2(a[1], a[0]))
+
+
+# ---- micro benchmarks: { name: (setup, statement) } ----
+# every statement is one vector operation
+def micro_cases():
+    cases = {}
+    prep = "a = A(3.5, -7.25); b = A(-1.5, 2.0); t = (-1.5, 2.0); s = 2.5"
+    for backend, cls in (("Vec2d", "v.Vec2d"), ("Vector2", "Vector2")):
+        setup = prep.replace("A(", cls + "(")
+        cases[backend + " construction"] = (setup, cls + "(3.5, -7.25)")
+        cases[backend + " construction from pair"] = (setup, cls + "(t)")
+        cases[backend + " + " + backend] = (setup, "a + b")
+        cases[backend + " + tuple"] = (setup, "a + t")
+        cases[backend + " += " + backend] = (setup, "a += b")
+        cases[backend + " * scalar"] = (setup, "a * s")
+        cases[backend + " length"] = (setup, "a.length" if backend == "Vec2d" else "a.length()")
+        cases[backend + " normalized"] = (setup, "a.normalized()" if backend == "Vec2d" else "a.normalize()")
+        cases[backend + " rotated"] = (setup, "a.rotated(30)" if backend == "Vec2d" else "a.rotate(30)")
+        cases[backend + " get_distance"] = (setup, "a.get_distance(b)" if backend == "Vec2d" else "a.distance_to(b)")
+    # Vec2d + scalar has no Vector2 equivalent (Vector2 refuses it)
+    cases["Vec2d + scalar"] = (prep.replace("A(", "v.Vec2d("), "a + s")
+    setup = "a = (3.5, -7.25); b = (-1.5, 2.0)"
+    cases["tuple construction"] = (setup, "(3.5, -7.25)")
+    cases["tuple + tuple"] = (setup, "t_add(a, b)")
+    cases["tuple length"] = (setup, "t_length(a)")
+    cases["tuple normalized"] = (setup, "t_normalized(a)")
+    cases["tuple rotated"] = (setup, "t_rotated(a, 30)")
+    cases["tuple get_distance"] = (setup, "t_distance(a, b)")
+    return cases
+
+
+def numpy_cases():
+    """{ name: statement } working on BATCH vectors at once"""
+    if np is None:
+        return {}
+    return {"numpy construction": "np.column_stack((xs, ys))",
+            "numpy + numpy": "a + b",
+            "numpy += numpy": "a += b",
+            "numpy * scalar": "a * 2.5",
+            "numpy length": "np.hypot(a[:, 0], a[:, 1])",
+            "numpy normalized": "a / np.maximum(np.hypot(a[:, 0], a[:, 1]), 1e-12)[:, None]",
+            "numpy rotated": "a @ rot",
+            "numpy get_distance": "np.hypot(a[:, 0] - b[:, 0], a[:, 1] - b[:, 1])",
+            "Vec2dArray + Vec2dArray": "va + vb",
+            "Vec2dArray += Vec2dArray * scalar": "va += vb * 0.03",
+            "Vec2dArray normalized": "va.normalized()",
+            "Vec2dArray rotated": "va.rotated(30)",
+            "Vec2dArray get_distance": "va.get_distance(vb)",
+            }
+
+
+NUMPY_SETUP = """
+rng = np.random.default_rng(1)
+xs = rng.uniform(-100, 100, BATCH); ys = rng.uniform(-100, 100, BATCH)
+a = np.column_stack((xs, ys)); b = a[::-1].copy()
+r = math.radians(30)
+rot = np.array([[math.cos(r), math.sin(r)], [-math.sin(r), math.cos(r)]])
+va = v.Vec2dArray(a); vb = v.Vec2dArray(b)
+"""
+
+
+# ---- macro benchmark: ballwars corner cannon auto aim ----
+class Thing(object):
+    """just the attributes the auto aim loop reads"""
+
+    def __init__(self, pos, move=None, angle=0, max_distance=600):
+        self.pos = pos
+        self.move = move
+        self.angle = angle
+        self.max_distance = max_distance
+
+
+def aim_world(vector):
+    """4 corner cannons and 3 targets like in ballwars.PygView.paint"""
+    width, height = 1400, 800
+    y = height // 2
+    cannons = [Thing(vector(0, y - 300), vector(0, 0)),
+               Thing(vector(width, y - 300), vector(0, 0)),
+               Thing(vector(0, y + 300), vector(0, 0)),
+               Thing(vector(width, y + 300), vector(0, 0))]
+    rng = random.Random(1)
+    targets = [Thing(vector(rng.uniform(0, width), rng.uniform(0, height))) for _ in range(3)]
+    return cannons, targets
+
+
+def aim_vec2d(cannons, targets, shots):
+    """same code as the corner cannon auto aim in ballwars.py"""
+    player1, player2, lazyball1 = targets
+    for c in cannons:
+        d1 = c.pos.get_distance(player1.pos)
+        d2 = c.pos.get_distance(player2.pos)
+        d3 = c.pos.get_distance(lazyball1.pos)
+        targetlist = []
+        if d1 < c.max_distance:
+            targetlist.append(player1)
+        if d2 < c.max_distance:
+            targetlist.append(player2)
+        if d3 < c.max_distance:
+            targetlist = [lazyball1]
+        if len(targetlist) > 0:
+            target = targetlist[0]
+            vectordiff = c.pos - target.pos
+            c.angle = -vectordiff.get_angle() - 180
+            if shots:   # the real loop fires with random() < 0.02
+                m = v.Vec2d(60, 0)
+                m = m.rotated(-c.angle)
+                p = v.Vec2d(c.pos.x, c.pos.y) + m
+                shots.append((p, m.normalized() * 150 + c.move))
+
+
+def aim_vector2(cannons, targets, shots):
+    player1, player2, lazyball1 = targets
+    for c in cannons:
+        d1 = c.pos.distance_to(player1.pos)
+        d2 = c.pos.distance_to(player2.pos)
+        d3 = c.pos.distance_to(lazyball1.pos)
+        targetlist = []
+        if d1 < c.max_distance:
+            targetlist.append(player1)
+        if d2 < c.max_distance:
+            targetlist.append(player2)
+        if d3 < c.max_distance:
+            targetlist = [lazyball1]
+        if len(targetlist) > 0:
+            target = targetlist[0]
+            vectordiff = c.pos - target.pos
+            c.angle = -vectordiff.as_polar()[1] - 180
+            if shots:
+                m = Vector2(60, 0).rotate(-c.angle)
+                p = Vector2(c.pos) + m
+                shots.append((p, m.normalize() * 150 + c.move))
+
+
+def aim_tuple(cannons, targets, shots):
+    player1, player2, lazyball1 = targets
+    for c in cannons:
+        d1 = t_distance(c.pos, player1.pos)
+        d2 = t_distance(c.pos, player2.pos)
+        d3 = t_distance(c.pos, lazyball1.pos)
+        targetlist = []
+        if d1 < c.max_distance:
+            targetlist.append(player1)
+        if d2 < c.max_distance:
+            targetlist.append(player2)
+        if d3 < c.max_distance:
+            targetlist = [lazyball1]
+        if len(targetlist) > 0:
+            target = targetlist[0]
+            vectordiff = (c.pos[0] - target.pos[0], c.pos[1] - target.pos[1])
+            c.angle = -t_angle(vectordiff) - 180
+            if shots:
+                m = t_rotated((60, 0), -c.angle)
+                p = t_add(c.pos, m)
+                n = t_normalized(m)
+                shots.append((p, (n[0] * 150 + c.move[0], n[1] * 150 + c.move[1])))
+
+
+def aim_numpy(cannonpos, cannonmove, targetpos, max_distance):
+    """all cannons at once: cannonpos (n,2), targetpos (3,2).
+       returns angles and (pos, move) of the shots of all cannons"""
+    diff = cannonpos[:, None, :] - targetpos[None, :, :]        # (n, 3, 2)
+    distance = np.hypot(diff[..., 0], diff[..., 1])              # (n, 3)
+    inrange = distance < max_distance
+    # lazyball (index 2) has highest priority, then player1, then player2
+    choice = np.where(inrange[:, 2], 2, np.where(inrange[:, 0], 0, 1))
+    aiming = inrange.any(axis=1)
+    vectordiff = diff[np.arange(len(diff)), choice]
+    angles = -np.degrees(np.arctan2(vectordiff[:, 1], vectordiff[:, 0])) - 180
+    radians = np.radians(-angles)
+    m = np.column_stack((np.cos(radians), np.sin(radians)))
+    return angles[aiming], cannonpos[aiming] + m[aiming] * 60, m[aiming] * 150 + cannonmove[aiming]
+
+
+def macro_cases():
+    """{ name: (function, number of cannons aimed per call) }"""
+    cases = {}
+    for name, vector, aim in (("Vec2d", v.Vec2d, aim_vec2d),
+                              ("Vector2", Vector2, aim_vector2),
+                              ("tuple", lambda x, y: (x, y), aim_tuple)):
+        for shooting in (False, True):
+            cannons, targets = aim_world(vector)
+
+            def run(aim=aim, cannons=cannons, targets=targets, shooting=shooting):
+                shots = [None] if shooting else []
+                aim(cannons, targets, shots)
+            label = "aim+shoot" if shooting else "aim"
+            cases["corner cannon {} {}".format(label, name)] = (run, len(cannons))
+    if np is not None:
+        rng = np.random.default_rng(1)
+        cannonpos = rng.uniform(0, 1400, (BATCH, 2))
+        cannonmove = np.zeros((BATCH, 2))
+        targetpos = rng.uniform(0, 800, (3, 2))
+        cases["corner cannon aim+shoot numpy"] = (
+            lambda: aim_numpy(cannonpos, cannonmove, targetpos, 600), BATCH)
+    return cases
+
+
+# ---- measuring ----
+def nanoseconds(timer, per_call=1):
+    """best time of one call divided by per_call, in nanoseconds"""
+    return benchtools.best(timer, per_call) * 1e9
+
+
+def run_all():
+    namespace = dict(globals())
+    results = {}
+    for name, (setup, statement) in micro_cases().items():
+        results[name] = nanoseconds(timeit.Timer(statement, setup, globals=namespace))
+    for name, statement in numpy_cases().items():
+        timer = timeit.Timer(statement, NUMPY_SETUP, globals=namespace)
+        results[name] = nanoseconds(timer, BATCH)
+    for name, (function, count) in macro_cases().items():
+        results[name] = nanoseconds(timeit.Timer(function), count)
+    return results
+
+
+if __name__ == "__main__":
+    benchtools.main("benchmark vectorclass2d.Vec2d", run_all, BASELINE, unit="ns/vector")
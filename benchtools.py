@@ -0,0 +1,77 @@
+"""
+measuring, baseline and report for the benchmarks (bench_vec2d.py, bench_sprites.py)
+idea: each benchmark measures a dict { case: time } and compares it with a
+      baseline stored as json. a case slower than baseline * (1 + tolerance)
+      is reported as REGRESSION and the exit code is 1, --save stores the
+      results as new baseline. only the cases and the unit differ, the rest
+      is here.
+usage:
+    def run_all():
+        return {name: benchtools.best(timeit.Timer(function)) * 1e6 for ...}
+    if __name__ == "__main__":
+        benchtools.main("benchmark sprite construction", run_all, BASELINE,
+                        unit="us/sprite", rate="sprites/s")
+this module must be in the same directory as the game files.
+"""
+import argparse
+import json
+import os
+import sys
+
+REPEAT = 3       # best of REPEAT runs is used
+
+
+def best(timer, per_call=1, repeat=REPEAT):
+    """best time of one call of a timeit.Timer divided by per_call, in seconds"""
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number / per_call
+
+
+def report(results, baseline, tolerance, unit, width=40, rate=None, scale=1e6):
+    """print one line per case, returns the number of regressions.
+       rate: label of an extra column scale / time (like sprites per second)"""
+    regressions = 0
+    header = "{:{width}} {:>10}".format("case", unit, width=width)
+    if rate is not None:
+        header += " {:>12} {:>12}".format(rate, "baseline")
+    else:
+        header += " {:>12}".format("baseline")
+    print(header + " {:>8}".format("change"))
+    for name in sorted(results):
+        value = results[name]
+        line = "{:{width}} {:>10.2f}".format(name, value, width=width)
+        if rate is not None:
+            line += " {:>12.0f}".format(scale / value)
+        if name in baseline:
+            change = value / baseline[name] - 1
+            flag = "  REGRESSION" if change > tolerance else ""
+            regressions += bool(flag)
+            old = scale / baseline[name] if rate is not None else baseline[name]
+            line += " {:>12.{digits}f} {:>+7.0%}{}".format(old, change, flag, digits=0 if rate else 2)
+        else:
+            line += " {:>12} {:>8}".format("-", "-")
+        print(line)
+    return regressions
+
+
+def main(description, run_all, baseline_path, unit, width=40, rate=None, scale=1e6):
+    """command line of a benchmark: --save, --tolerance, --baseline"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--save", action="store_true", help="store the results as new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown against the baseline (0.25 = 25%%)")
+    parser.add_argument("--baseline", default=baseline_path, help="baseline file (json)")
+    args = parser.parse_args()
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    results = run_all()
+    regressions = report(results, baseline, args.tolerance, unit, width, rate, scale)
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print("baseline saved to", args.baseline)
+    elif regressions:
+        print(regressions, "regressions")
+        sys.exit(1)
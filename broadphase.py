@@ -0,0 +1,271 @@
+"""
+spatial hash broadphase for pygame sprites
+idea: instead of testing every sprite of a group against every other sprite
+      of the same group (pygame.sprite.spritecollide inside a for loop, that is
+      n*n tests per frame), sort all sprites into a grid of square cells and
+      only test sprites that share a cell.
+usage: drop-in replacement for the "ball vs other balls" loop:
+
+    for ball, otherball in broadphase.collide_pairs(self.ballgroup):
+        elastic_collision(ball, otherball)
+
+each colliding pair is returned exactly once, in the same order as the old
+loop (outer sprite in group order, ball.number > otherball.number).
+
+group against group: replaces the loops
+    for t in self.targetgroup:
+        for b in pygame.sprite.spritecollide(t, self.tracergroup, False, collide_mask):
+            ...
+with one GroupCollider for all group pairs of a frame. every group is put
+into a grid only once per frame, even when it is used in several pairs:
+    self.collider = broadphase.GroupCollider()              # in __init__
+    self.collider.new_frame()                               # after allgroup.update
+    self.collider.collide_groups(self.targetgroup, self.tracergroup, "mask",
+                                 on_hit=self.tracer_hits_target)
+shape is "circle", "rect", "mask" (imagecache.collide_mask) or a pygame
+collide function. on_hit(a, b) is called in the order of the old loops, and
+a pair is skipped when a or b left its group (was killed) by an earlier hit.
+this module must be in the same directory as the game files.
+"""
+import pygame
+import imagecache  # for collide_mask
+
+
+def get_radius(sprite):
+    """radius as used by pygame.sprite.collide_circle: .radius or half the rect diagonal"""
+    try:
+        return sprite.radius
+    except AttributeError:
+        return 0.5 * ((sprite.rect.width ** 2 + sprite.rect.height ** 2) ** 0.5)
+
+
+class SpatialHash(object):
+    """uniform grid. cells are stored in a dict { (cellx, celly): [sprite, ...] }
+       a sprite is put in every cell touched by the bounding box of its circle"""
+
+    def __init__(self, cellsize=64):
+        self.cellsize = cellsize
+        self.cells = {}   # { (cellx, celly): [sprite, sprite, ...] }
+        self.boxes = {}   # { sprite: (cellx1, celly1) } first cell of each sprite
+        self.order = {}   # { sprite: index } insertion order, to sort the pairs
+        self.tests = 0    # number of candidate pairs tested by the last pairs() call
+
+    def clear(self):
+        self.cells.clear()
+        self.boxes.clear()
+        self.order.clear()
+
+    def insert(self, sprite):
+        x, y = sprite.rect.center
+        r = get_radius(sprite)
+        size = self.cellsize
+        cx1 = int((x - r) // size)
+        cy1 = int((y - r) // size)
+        cx2 = int((x + r) // size)
+        cy2 = int((y + r) // size)
+        self.boxes[sprite] = (cx1, cy1)
+        self.order[sprite] = len(self.order)
+        cells = self.cells
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                if (cx, cy) in cells:
+                    cells[(cx, cy)].append(sprite)
+                else:
+                    cells[(cx, cy)] = [sprite]
+
+    def build(self, sprites):
+        """clear the grid and insert all sprites (a Group or any iterable)"""
+        self.clear()
+        for sprite in sprites:
+            self.insert(sprite)
+
+    def pairs(self, collided=None):
+        """returns a list of (sprite1, sprite2) candidate pairs, each pair only once.
+           if collided (a pygame collide function) is given, only colliding pairs
+           are returned. sprite1 is always the sprite with the higher .number"""
+        boxes = self.boxes
+        order = self.order
+        result = []
+        tests = 0
+        for (cx, cy), cellsprites in self.cells.items():
+            n = len(cellsprites)
+            if n < 2:
+                continue
+            for i in range(n - 1):
+                a = cellsprites[i]
+                ax, ay = boxes[a]
+                for j in range(i + 1, n):
+                    b = cellsprites[j]
+                    bx, by = boxes[b]
+                    # two sprites can share several cells. only the cell where
+                    # both bounding boxes start to overlap counts the pair
+                    if cx != (ax if ax > bx else bx) or cy != (ay if ay > by else by):
+                        continue
+                    tests += 1
+                    if collided is not None and not collided(a, b):
+                        continue
+                    if a.number > b.number:
+                        result.append((a, b))
+                    else:
+                        result.append((b, a))
+        self.tests = tests
+        # same order as: for ball in group: for otherball in spritecollide(...)
+        result.sort(key=lambda pair: (order[pair[0]], order[pair[1]]))
+        return result
+
+
+def collide_pairs(group, collided=pygame.sprite.collide_circle, cellsize=None, grid=None):
+    """returns all colliding (sprite, othersprite) pairs of a group, each pair once.
+       replaces:
+           for ball in group:
+               for otherball in pygame.sprite.spritecollide(ball, group, False, collided):
+                   if ball.number > otherball.number:
+       cellsize defaults to the biggest diameter in the group.
+       pass your own SpatialHash as grid to read grid.tests afterwards"""
+    sprites = group.sprites() if hasattr(group, "sprites") else list(group)
+    if cellsize is None:
+        cellsize = 16
+        for sprite in sprites:
+            cellsize = max(cellsize, 2 * get_radius(sprite))
+    if grid is None:
+        grid = SpatialHash(cellsize)
+    else:
+        grid.cellsize = cellsize
+    grid.build(sprites)
+    return grid.pairs(collided)
+
+
+SHAPES = {"circle": pygame.sprite.collide_circle,
+          "rect": pygame.sprite.collide_rect,
+          "mask": imagecache.collide_mask}
+
+
+class Grid(object):
+    """the cells of one group in one frame"""
+
+    def __init__(self, sprites, cellsize, box):
+        self.cells = {}   # { (cellx, celly): [sprite, ...] }
+        self.first = {}   # { sprite: (cellx1, celly1) }
+        self.order = {}   # { sprite: index in the group }
+        cells = self.cells
+        for index, sprite in enumerate(sprites):
+            left, top, right, bottom = box(sprite)
+            cx1 = int(left // cellsize)
+            cy1 = int(top // cellsize)
+            cx2 = int(right // cellsize)
+            cy2 = int(bottom // cellsize)
+            self.first[sprite] = (cx1, cy1)
+            self.order[sprite] = index
+            for cx in range(cx1, cx2 + 1):
+                for cy in range(cy1, cy2 + 1):
+                    if (cx, cy) in cells:
+                        cells[(cx, cy)].append(sprite)
+                    else:
+                        cells[(cx, cy)] = [sprite]
+
+
+def circle_box(sprite):
+    x, y = sprite.rect.center
+    r = get_radius(sprite)
+    return x - r, y - r, x + r, y + r
+
+
+def rect_box(sprite):
+    rect = sprite.rect
+    return rect.left, rect.top, rect.right - 1, rect.bottom - 1
+
+
+def any_box(sprite):
+    """circle and rect, for collide functions that may use both"""
+    a = circle_box(sprite)
+    b = rect_box(sprite)
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+class GroupCollider(object):
+    """collision detection between groups, sharing the grids of a frame"""
+
+    def __init__(self, cellsize=64):
+        self.cellsize = cellsize
+        self.grids = {}   # { (group, box function): Grid }, only for this frame
+        self.tests = 0    # candidate pairs tested, since new_frame
+        self.hits = 0
+
+    def new_frame(self):
+        """forget the grids, the sprites have moved"""
+        self.grids.clear()
+        self.tests = 0
+        self.hits = 0
+
+    def grid(self, group, box):
+        sprites = group.sprites() if hasattr(group, "sprites") else list(group)
+        if isinstance(group, (list, tuple)):
+            return Grid(sprites, self.cellsize, box)  # small lists, not cached
+        key = (group, box)
+        grid = self.grids.get(key)
+        if grid is None:
+            grid = Grid(sprites, self.cellsize, box)
+            self.grids[key] = grid
+        return grid
+
+    def pairs(self, a, b, collided, box):
+        """all colliding (sprite of a, sprite of b) pairs, in the order of
+           for x in a: for y in spritecollide(x, b, False, collided)"""
+        grida = self.grid(a, box)
+        gridb = self.grid(b, box)
+        firsta = grida.first
+        firstb = gridb.first
+        cellsb = gridb.cells
+        result = []
+        tests = 0
+        for cell, spritesa in grida.cells.items():
+            spritesb = cellsb.get(cell)
+            if spritesb is None:
+                continue
+            cx, cy = cell
+            for sa in spritesa:
+                ax, ay = firsta[sa]
+                for sb in spritesb:
+                    bx, by = firstb[sb]
+                    # only the cell where both boxes start to overlap counts the pair
+                    if cx != (ax if ax > bx else bx) or cy != (ay if ay > by else by):
+                        continue
+                    if sa is sb:
+                        continue
+                    tests += 1
+                    if collided(sa, sb):
+                        result.append((sa, sb))
+        self.tests += tests
+        ordera = grida.order
+        orderb = gridb.order
+        result.sort(key=lambda pair: (ordera[pair[0]], orderb[pair[1]]))
+        return result
+
+    def collide_groups(self, a, b, shape="circle", on_hit=None, filter=None, dokill=False):
+        """every sprite of a against every sprite of b. calls on_hit(sa, sb)
+           for each hit and returns the list of hits. filter(sa, sb) returning
+           False skips a pair, dokill kills sb like spritecollide does.
+           a sprite in both groups never collides with itself"""
+        if callable(shape):
+            collided, box = shape, any_box
+        else:
+            collided = SHAPES[shape]
+            box = circle_box if shape == "circle" else rect_box
+        hits = []
+        for sa, sb in self.pairs(a, b, collided, box):
+            if sa not in a or sb not in b:
+                continue                    # killed by an earlier hit
+            if filter is not None and not filter(sa, sb):
+                continue
+            if dokill:
+                sb.kill()
+            hits.append((sa, sb))
+            if on_hit is not None:
+                on_hit(sa, sb)
+        self.hits += len(hits)
+        return hits
+
+
+def collide_groups(a, b, shape="circle", on_hit=None, filter=None, dokill=False, cellsize=64):
+    """GroupCollider.collide_groups for a single pair of groups"""
+    return GroupCollider(cellsize).collide_groups(a, b, shape, on_hit, filter, dokill)
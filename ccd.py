@@ -0,0 +1,253 @@
+"""
+continuous collision detection (ccd) for fast balls
+idea: spritecollide with collide_circle only tests if two sprites overlap at
+      the end of a frame. a shot moving 34 pixel per frame with a radius of
+      10 can be in front of a goalkeeper in one frame and behind it in the
+      next one, it never touches it.
+      here every sprite moves on a straight line during the frame:
+          position(t) = pos + move * t        0 <= t <= seconds
+      (exactly what VectorSprite.update does) and the time of impact (toi)
+      is calculated:
+      - circle against circle: when the distance of the two lines gets
+        radius1 + radius2 (a quadratic equation)
+      - circle against a not moving box (Block, Hwall): the box is made
+        bigger by the radius of the circle and the center of the circle
+        moves like a ray into it, at the corners it hits a circle with the
+        radius around the corner
+      all contacts of the frame are handled in the order of their toi. for
+      a contact both sprites are placed at their position at toi, the
+      reaction (elastic_collision or reflect) changes their move vectors,
+      then pos is set back to where the sprite would have started with the
+      new move vector:
+          pos = position(toi) - move * toi
+      so the normal update(seconds) of the sprite moves it to the correct
+      place at the end of the frame, and the sprite can hit something else
+      later in the same frame.
+      only fast sprites (moving more than fraction * radius in the frame)
+      are checked, the slow ones are found by the normal collision detection.
+usage:
+    self.sweep = ccd.Sweep()
+    self.sweep.add_circles(self.ballgroup, self.ballgroup, elastic_collision)
+    self.sweep.add_boxes(self.ballgroup, self.blockgroup)     # reflect
+    # in the mainloop, before self.allgroup.update(seconds):
+    self.sweep.run(seconds)
+the sprites need .pos and .move (vectorclass2d.Vec2d or pygame.math.Vector2)
+and .radius, boxes need .pos (center), .width and .height.
+this module must be in the same directory as the game files.
+"""
+import heapq
+import math
+
+EPSILON = 1e-9
+
+
+def circle_circle(p1, v1, r1, p2, v2, r2, seconds):
+    """first time 0...seconds when two circles at p1, p2 moving with v1, v2
+       touch, or None. positions and moves are (x, y) tuples.
+       circles that already overlap and come closer give 0.0"""
+    dx = p1[0] - p2[0]
+    dy = p1[1] - p2[1]
+    vx = v1[0] - v2[0]
+    vy = v1[1] - v2[1]
+    b = dx * vx + dy * vy               # < 0: coming closer
+    if b >= 0:
+        return None
+    r = r1 + r2
+    c = dx * dx + dy * dy - r * r
+    if c <= 0:
+        return 0.0
+    a = vx * vx + vy * vy
+    discriminant = b * b - a * c
+    if discriminant < 0:
+        return None                     # they pass each other
+    t = (-b - math.sqrt(discriminant)) / a
+    if t > seconds:
+        return None
+    return t
+
+
+def _ray_circle(px, py, vx, vy, cx, cy, r, seconds):
+    """first time 0...seconds when the point p moving with v hits the
+       circle around c, or None"""
+    return circle_circle((px, py), (vx, vy), 0, (cx, cy), (0, 0), r, seconds)
+
+
+def circle_box(p, move, r, box, seconds):
+    """first contact of a circle at p moving with move and a not moving box
+       (left, top, right, bottom) during 0...seconds.
+       returns (t, nx, ny) with the normal of the box at the contact point,
+       or None. a circle that starts inside the box is left to the normal
+       collision detection (None)"""
+    px, py = p
+    vx, vy = move
+    left, top, right, bottom = box
+    # ---- ray against the box made bigger by r (slab method) ----
+    t_enter = 0.0
+    t_exit = seconds
+    nx = ny = 0
+    for start, speed, low, high, axis in ((px, vx, left - r, right + r, 0),
+                                          (py, vy, top - r, bottom + r, 1)):
+        if speed == 0:
+            if start <= low or start >= high:
+                return None
+            continue
+        t1 = (low - start) / speed
+        t2 = (high - start) / speed
+        normal = -1
+        if t1 > t2:
+            t1, t2 = t2, t1
+            normal = 1
+        if t1 > t_enter:
+            t_enter = t1
+            nx, ny = (normal, 0) if axis == 0 else (0, normal)
+        t_exit = min(t_exit, t2)
+        if t_enter > t_exit:
+            return None
+    if nx == 0 and ny == 0:
+        return None                     # already inside at t=0
+    # ---- at a corner the bigger box is round ----
+    hx = px + vx * t_enter
+    hy = py + vy * t_enter
+    cx = left if hx < left else right if hx > right else None
+    cy = top if hy < top else bottom if hy > bottom else None
+    if cx is not None and cy is not None:
+        t = _ray_circle(px, py, vx, vy, cx, cy, r, seconds)
+        if t is None:
+            return None                 # passes the corner
+        hx = px + vx * t
+        hy = py + vy * t
+        length = math.hypot(hx - cx, hy - cy) or 1.0
+        return t, (hx - cx) / length, (hy - cy) / length
+    return t_enter, nx, ny
+
+
+def reflect(sprite, box, nx, ny, bounce=1.0):
+    """on_hit for add_boxes: mirror the move vector of sprite at the normal"""
+    dot = sprite.move.x * nx + sprite.move.y * ny
+    if dot < 0:
+        sprite.move.x -= (1 + bounce) * dot * nx
+        sprite.move.y -= (1 + bounce) * dot * ny
+
+
+def box_of(sprite):
+    """(left, top, right, bottom) of a sprite with pos in the center"""
+    return (sprite.pos.x - sprite.width / 2, sprite.pos.y - sprite.height / 2,
+            sprite.pos.x + sprite.width / 2, sprite.pos.y + sprite.height / 2)
+
+
+class Sweep(object):
+    """rules which sprites are checked against which, and the contact
+       handling in toi order. the groups are read again in every run()"""
+
+    def __init__(self, fraction=1.0, max_contacts=32):
+        self.fraction = fraction            # faster than fraction * radius per frame: ccd
+        self.max_contacts = max_contacts    # per run, against endless loops
+        self.circle_rules = []              # [(movers, targets, on_hit), ...]
+        self.box_rules = []
+        # ---- counters ----
+        self.runs = 0
+        self.contacts = 0
+
+    def add_circles(self, movers, targets, on_hit):
+        """fast sprites of movers against all sprites of targets,
+           on_hit(mover, target) at the toi, both at their contact position"""
+        self.circle_rules.append((movers, targets, on_hit))
+
+    def add_boxes(self, movers, boxes, on_hit=reflect):
+        """fast sprites of movers against the (not moving) boxes,
+           on_hit(mover, box, nx, ny) at the toi"""
+        self.box_rules.append((movers, boxes, on_hit))
+
+    def fast(self, sprites, seconds):
+        limit = self.fraction / seconds     # speed / radius
+        return [s for s in sprites
+                if s.radius > 0 and math.hypot(s.move.x, s.move.y) > limit * s.radius]
+
+    def run(self, seconds):
+        """handle all contacts of fast sprites during the next seconds in toi
+           order. returns the number of contacts"""
+        self.runs += 1
+        if seconds <= 0:
+            return 0
+        rules = []                          # [(kind, fast movers, targets, on_hit)]
+        for movers, targets, on_hit in self.circle_rules:
+            fast = self.fast(movers, seconds)
+            if fast:
+                rules.append(("circle", fast, list(targets), on_hit))
+        for movers, boxes, on_hit in self.box_rules:
+            fast = self.fast(movers, seconds)
+            if fast:
+                rules.append(("box", fast, [(b, box_of(b)) for b in boxes], on_hit))
+        if not rules:
+            return 0
+        self._seconds = seconds
+        self._version = {}                  # { sprite: number of contacts }
+        self._heap = []
+        self._counter = 0                   # tie breaker for the heap
+        for rule in rules:
+            for mover in rule[1]:
+                self._query(rule, mover, None, 0.0)
+        contacts = 0
+        while self._heap and contacts < self.max_contacts:
+            t, _, rule, mover, target, normal, versions = heapq.heappop(self._heap)
+            if versions != (self._version.get(mover, 0), self._version.get(target, 0)):
+                continue                    # one of them changed its way
+            contacts += 1
+            self._contact(rule, mover, target, normal, t)
+            # ---- new ways: check again from t ----
+            for other in rules:
+                for sprite in (mover, target):
+                    if sprite in other[1]:
+                        self._query(other, sprite, None, t)
+                if other[0] == "circle":
+                    for sprite in (mover, target):
+                        if sprite in other[2]:
+                            for m in other[1]:
+                                if m is not mover and m is not target:
+                                    self._query(other, m, sprite, t)
+        self.contacts += contacts
+        return contacts
+
+    # ---- inside run ----
+    def _where(self, sprite, t):
+        return (sprite.pos.x + sprite.move.x * t, sprite.pos.y + sprite.move.y * t)
+
+    def _query(self, rule, mover, only, t0):
+        """push the next contact of mover after t0 (against only, or all
+           targets of the rule)"""
+        kind, movers, targets, on_hit = rule
+        rest = self._seconds - t0
+        p = self._where(mover, t0)
+        m = (mover.move.x, mover.move.y)
+        if kind == "circle":
+            for target in (targets if only is None else (only,)):
+                if target is mover:
+                    continue
+                t = circle_circle(p, m, mover.radius, self._where(target, t0),
+                                  (target.move.x, target.move.y), target.radius, rest)
+                if t is not None and (t > EPSILON or t0 == 0.0):
+                    self._push(t0 + t, rule, mover, target, None)
+        else:
+            for target, box in targets:
+                hit = circle_box(p, m, mover.radius, box, rest)
+                if hit is not None and (hit[0] > EPSILON or t0 == 0.0):
+                    self._push(t0 + hit[0], rule, mover, target, hit[1:])
+
+    def _push(self, t, rule, mover, target, normal):
+        self._counter += 1
+        versions = (self._version.get(mover, 0), self._version.get(target, 0))
+        heapq.heappush(self._heap, (t, self._counter, rule, mover, target, normal, versions))
+
+    def _contact(self, rule, mover, target, normal, t):
+        kind, movers, targets, on_hit = rule
+        sprites = (mover,) if kind == "box" else (mover, target)
+        for sprite in sprites:              # to the place of the contact
+            sprite.pos.x, sprite.pos.y = self._where(sprite, t)
+        if kind == "box":
+            on_hit(mover, target, normal[0], normal[1])
+        else:
+            on_hit(mover, target)
+        for sprite in sprites:              # back, so that update(seconds) ends right
+            sprite.pos.x -= sprite.move.x * t
+            sprite.pos.y -= sprite.move.y * t
+            self._version[sprite] = self._version.get(sprite, 0) + 1
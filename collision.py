@@ -0,0 +1,137 @@
+"""
+elastic collision for many sprite pairs at once
+idea: the broadphase finds all colliding pairs of a frame. instead of calling
+      elastic_collision(sprite1, sprite2) once per pair (about 30 float
+      operations and attribute lookups in python), all pairs are calculated
+      with numpy in one go.
+      the result is exactly the same as calling elastic_collision for every
+      pair in order: a sprite touching several others is handled pair after
+      pair, so the pairs are split into rounds where no sprite appears
+      twice, and the random jitter for sprites at the very same position is
+      taken from random in the same order as the old loop.
+usage:
+    # pos, move, mass, static of all bodies in numpy arrays (structure of
+    # arrays, for example Vec2dArray.data), move is changed in place:
+    collision.elastic_collision_many(pos, move, mass, static, pairs)
+    # sprites with their own Vec2d pos and move:
+    collision.elastic_collision_sprites(broadphase.collide_pairs(self.ballgroup), elastic_collision)
+the numpy calculation only pays off when pos and move already live in arrays.
+for sprites, copying pos, move and mass into arrays and back costs as much as
+the old loop (see bench_collision.py), so the games keep calling
+elastic_collision for each pair. without numpy (or for a few pairs)
+elastic_collision_sprites calls the old elastic_collision of the game for every pair.
+this module must be in the same directory as the game files.
+"""
+import random
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MANY = 16   # below this number of pairs the python loop is faster
+
+
+def rounds(pairs, count):
+    """round number for every pair (i, j): a pair comes one round after the
+       last pair using i or j, so no index appears twice in a round and the
+       pairs of one sprite keep their order"""
+    last = [-1] * count
+    result = []
+    append = result.append
+    for i, j in pairs:
+        a = last[i]
+        b = last[j]
+        r = (a if a > b else b) + 1
+        last[i] = last[j] = r
+        append(r)
+    return result
+
+
+def elastic_collision_many(pos, move, mass, static, pairs, skip_static_pairs=False):
+    """elastic collision (calculated as disc's) for all pairs at once.
+       pos, move: (n,2) arrays, move (float) is changed in place
+       mass: (n,) array, static: (n,) bool array
+       pairs: (p,2) int array or list of (index1, index2), index1 is sprite1
+       of elastic_collision(sprite1, sprite2)
+       skip_static_pairs=True for the games where elastic_collision returns at
+       once when both sprites are static (no random jitter is taken then)"""
+    pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+    if skip_static_pairs and len(pairs):
+        pairs = pairs[~(static[pairs[:, 0]] & static[pairs[:, 1]])]
+    if len(pairs) == 0:
+        return
+    first, second = pairs[:, 0], pairs[:, 1]
+    # ---- direction, the same for all rounds (only move changes) ----
+    dirx = (pos[first, 0] - pos[second, 0]).astype(float)
+    diry = (pos[first, 1] - pos[second, 1]).astype(float)
+    distancesquare = dirx * dirx + diry * diry
+    for k in np.flatnonzero(distancesquare == 0):
+        dirx[k] = random.randint(0, 11) - 5.5
+        diry[k] = random.randint(0, 11) - 5.5
+        distancesquare[k] = dirx[k] * dirx[k] + diry[k] * diry[k]
+    mass1 = mass[first]
+    mass2 = mass[second]
+    sumofmasses = mass1 + mass2
+    movable1 = ~static[first]
+    movable2 = ~static[second]
+    roundnumbers = np.array(rounds(pairs.tolist(), len(pos)))
+    lastround = int(roundnumbers.max())
+    for r in range(lastround + 1):
+        if lastround == 0:
+            p = slice(None)   # no sprite in two pairs: all pairs at once
+        else:
+            p = np.flatnonzero(roundnumbers == r)
+        i, j = first[p], second[p]
+        m1, m2, s = mass1[p], mass2[p], sumofmasses[p]
+        move1x, move1y = move[i, 0], move[i, 1]
+        move2x, move2y = move[j, 0], move[j, 1]
+        sx = (move1x * m1 + move2x * m2) / s
+        sy = (move1y * m1 + move2y * m2) / s
+        bdxs = move2x - sx
+        bdys = move2y - sy
+        cbdxs = move1x - sx
+        cbdys = move1y - sy
+        dx, dy, d2 = dirx[p], diry[p], distancesquare[p]
+        dp = (bdxs * dx + bdys * dy)  # scalar product
+        dp /= d2                      # divide by distance * distance.
+        cdp = (cbdxs * dx + cbdys * dy)
+        cdp /= d2
+        hit = dp > 0
+        change2 = hit & movable2[p]
+        change1 = hit & movable1[p]
+        move[j[change2], 0] = move2x[change2] - 2 * dx[change2] * dp[change2]
+        move[j[change2], 1] = move2y[change2] - 2 * dy[change2] * dp[change2]
+        move[i[change1], 0] = move1x[change1] - 2 * dx[change1] * cdp[change1]
+        move[i[change1], 1] = move1y[change1] - 2 * dy[change1] * cdp[change1]
+
+
+def elastic_collision_sprites(pairs, elastic_collision=None, skip_static_pairs=False):
+    """elastic collision for a list of sprite pairs, for example from
+       broadphase.collide_pairs. copies pos, move, mass and static of the
+       sprites into numpy arrays, calls elastic_collision_many and writes
+       the changed move vectors back into the sprites.
+       elastic_collision: the scalar function of the game, used for a few
+       pairs or when numpy is missing"""
+    if not pairs:
+        return
+    if elastic_collision is not None and (np is None or len(pairs) < MANY):
+        for sprite1, sprite2 in pairs:
+            elastic_collision(sprite1, sprite2)
+        return
+    index = {}
+    for pair in pairs:
+        for sprite in pair:
+            if sprite not in index:
+                index[sprite] = len(index)
+    indexpairs = [(index[sprite1], index[sprite2]) for sprite1, sprite2 in pairs]
+    sprites = list(index)
+    pos = np.array([(s.pos.x, s.pos.y, s.move.x, s.move.y, s.mass, s.static)
+                    for s in sprites], dtype=float)
+    move = pos[:, 2:4].copy()
+    old = move.copy()
+    elastic_collision_many(pos[:, :2], move, pos[:, 4], pos[:, 5] != 0,
+                           indexpairs, skip_static_pairs)
+    for k in np.flatnonzero((move != old).any(axis=1)).tolist():
+        sprite = sprites[k]
+        sprite.move.x = float(move[k, 0])
+        sprite.move.y = float(move[k, 1])
@@ -0,0 +1,105 @@
+"""
+dirty rect rendering: only repaint and update the parts of the screen that changed
+idea: instead of blitting the whole background and calling pygame.display.flip()
+      every frame, only the rects where something was painted in the last
+      frame are restored from the background, and only the rects painted in
+      this frame (and the restored ones) are sent to the display with
+      pygame.display.update(rects). when more than threshold of the screen is
+      dirty anyway, the renderer falls back to a full blit and flip.
+usage (opt-in, instead of blit background ... flip):
+    self.renderer = dirtyrects.DirtyRenderer(self.screen, self.background)
+    # in the mainloop:
+    self.renderer.clear()                                   # instead of screen.blit(background)
+    self.renderer.mark(pygame.draw.line(self.screen, ...))  # all painting on the screen
+    self.renderer.mark(write(self.screen, "FPS..."))
+    self.renderer.mark(self.allgroup.draw(self.screen))
+    self.renderer.update()                                  # instead of pygame.display.flip()
+    # after changing the background:
+    self.renderer.set_background(self.background)
+everything painted on the screen must be marked, or it stays on the screen.
+this module must be in the same directory as the game files.
+"""
+import pygame
+
+
+def merge(rects):
+    """joins overlapping rects into their bounding rect, fewer and bigger rects"""
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        while True:
+            i = rect.collidelist(merged)
+            if i == -1:
+                break
+            rect.union_ip(merged.pop(i))
+        merged.append(rect)
+    return merged
+
+
+class DirtyRenderer(object):
+    """restores and updates only dirty rects of screen.
+       threshold: fraction of the screen, above it a full flip is done"""
+
+    def __init__(self, screen, background, threshold=0.4):
+        self.screen = screen
+        self.background = background
+        self.threshold = threshold
+        self.area = screen.get_width() * screen.get_height()
+        self.screenrect = screen.get_rect()
+        self.dirty = []          # rects painted in this frame
+        self.old = []            # rects painted in the last frame
+        self.full = True         # next frame: blit whole background and flip
+        # ---- counters ----
+        self.dirty_pixels = 0    # dirty pixels of the last frame
+        self.frames = 0
+        self.full_frames = 0
+        self.total_dirty_pixels = 0
+
+    def set_background(self, background):
+        """new background: the next frame is painted completely"""
+        self.background = background
+        self.full = True
+
+    def mark(self, rects):
+        """remember painted rects: a Rect, a list of Rects or None"""
+        if rects is None:
+            return
+        if isinstance(rects, pygame.Rect):
+            self.dirty.append(rects)
+        else:
+            self.dirty.extend(rects)
+
+    def clear(self):
+        """restore the background below everything painted in the last frame"""
+        if self.full:
+            self.screen.blit(self.background, (0, 0))
+            return
+        for rect in self.old:
+            self.screen.blit(self.background, rect, rect)
+
+    def update(self):
+        """send the dirty parts of the screen to the display"""
+        rects = [rect.clip(self.screenrect) for rect in merge(self.old + self.dirty)]
+        rects = [rect for rect in rects if rect.width and rect.height]
+        self.dirty_pixels = min(self.area, sum(rect.width * rect.height for rect in rects))
+        self.frames += 1
+        if self.full or self.dirty_pixels > self.threshold * self.area:
+            self.full_frames += 1
+            self.dirty_pixels = self.area
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+        self.total_dirty_pixels += self.dirty_pixels
+        # when most of the screen must be restored, one full blit is faster
+        self.old = merge(self.dirty)
+        self.full = (sum(rect.width * rect.height for rect in self.old) >
+                     self.threshold * self.area)
+        self.dirty = []
+
+    def stats(self):
+        if self.frames == 0:
+            return "no frames"
+        return "dirty: {:5.1f} % of screen ({} pixels), average {:5.1f} %, full flips: {} of {} frames".format(
+               100.0 * self.dirty_pixels / self.area, self.dirty_pixels,
+               100.0 * self.total_dirty_pixels / self.frames / self.area,
+               self.full_frames, self.frames)
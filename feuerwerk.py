@@ -8,12 +8,24 @@ idea: clean python3/pygame template using pygame.math.vector2
 
 """
 import pygame
+import fonts
+import handles
+import profiler
+import specs
+import timestep
 #import math
 import random
 import os
 import time
 #import operator
 import math
+import imagecache
+import backgrounds
+import collections
+try:
+    import particles # needs numpy
+except ImportError:
+    particles = None
 #import vectorclass2d as v
 #import textscroller_vertical as ts
 #import subprocess
@@ -21,24 +33,14 @@ import math
 """Best game: 10 waves by Ines"""
 
 def make_text(msg="pygame is cool", fontcolor=(255, 0, 255), fontsize=42, font=None):
-    """returns pygame surface with text. You still need to blit the surface."""
-    myfont = pygame.font.SysFont(font, fontsize)
-    mytext = myfont.render(msg, True, fontcolor)
-    mytext = mytext.convert_alpha()
-    return mytext
+    """returns pygame surface with text. You still need to blit the surface.
+       the surface is shared (fonts.render), do not paint on it"""
+    return fonts.render(msg, fontcolor, fontsize, font)
 
 def write(background, text, x=50, y=150, color=(0,0,0),
           fontsize=None, center=False):
-        """write text on pygame surface. """
-        if fontsize is None:
-            fontsize = 24
-        font = pygame.font.SysFont('mono', fontsize, bold=True)
-        fw, fh = font.size(text)
-        surface = font.render(text, True, color)
-        if center: # center text around x,y
-            background.blit(surface, (x-fw//2, y-fh//2))
-        else:      # topleft corner is x,y
-            background.blit(surface, (x,y))
+        """write text on pygame surface. returns the painted rect"""
+        return fonts.write(background, text, x, y, color, fontsize, center)
 
 def elastic_collision(sprite1, sprite2):
         """elasitc collision between 2 VectorSprites (calculated as disc's).
@@ -105,6 +107,8 @@ class Flytext(pygame.sprite.Sprite):
                 self.kill()      # remove Sprite from screen and from groups
 
 class Mouse(pygame.sprite.Sprite):
+    tailwidth = 10 # line width of the newest tail segment + 1
+
     def __init__(self, radius = 50, color=(255,0,0), x=320, y=240,
                     startx=100,starty=100, control="mouse", ):
         """create a (black) surface and paint a blue Mouse on it"""
@@ -125,44 +129,58 @@ class Mouse(pygame.sprite.Sprite):
         self.age = 0
         self.pos = pygame.mouse.get_pos()
         self.move = 0
-        self.tail=[]
+        self.tail = collections.deque(maxlen=128) # newest position first
         self.create_image()
         self.rect = self.image.get_rect()
         self.control = control # "mouse" "keyboard1" "keyboard2"
         self.pushed = False
 
     def create_image(self):
+        # self.r only takes 22 values: each frame is painted once and shared
+        key = (__name__, self.radius, self.r, self.g, self.b)
+        self.image = imagecache.cursors.get(key, self.paint_image)
+        self.rect = self.image.get_rect()
+        self.rect.center = self.x, self.y
 
-        self.image = pygame.surface.Surface((self.radius*0.5, self.radius*0.5))
+    def paint_image(self):
+        image = pygame.surface.Surface((self.radius*0.5, self.radius*0.5))
         delta1 = 12.5
         delta2 = 25
         w = self.radius*0.5 / 100.0
         h = self.radius*0.5 / 100.0
         # pointing down / up
         for y in (0,2,4):
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (35*w,0+y),(50*w,15*h+y),2)
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (50*w,15*h+y),(65*w,0+y),2)
     
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (35*w,100*h-y),(50*w,85*h-y),2)
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (50*w,85*h-y),(65*w,100*h-y),2)
         # pointing right / left                 
         for x in (0,2,4):
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (0+x,35*h),(15*w+x,50*h),2)
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (15*w+x,50*h),(0+x,65*h),2)
             
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (100*w-x,35*h),(85*w-x,50*h),2)
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (85*w-x,50*h),(100*w-x,65*h),2)
-        self.image.set_colorkey((0,0,0))
-        self.rect=self.image.get_rect()
-        self.rect.center = self.x, self.y
+        image.set_colorkey((0,0,0))
+        return image
+
+    def draw_tail(self, surface):
+        """the tail gets 1 pixel thinner per segment. pygame.draw.line draws
+           nothing below width 1, so only the newest segments are drawn"""
+        if len(self.tail) > 2:
+            r, g, b = self.color
+            for a in range(1, min(len(self.tail), Mouse.tailwidth)):
+                pygame.draw.line(surface, (r-a,g,b), self.tail[a-1], self.tail[a],
+                                 Mouse.tailwidth-a)
 
     def update(self, seconds):
         if self.control == "mouse":
@@ -207,8 +225,7 @@ class Mouse(pygame.sprite.Sprite):
             self.y = 0
         elif self.y > PygView.height:
             self.y = PygView.height
-        self.tail.insert(0,(self.x,self.y))
-        self.tail = self.tail[:128]
+        self.tail.appendleft((self.x,self.y)) # the oldest drops out
         self.rect.center = self.x, self.y
         self.r += self.delta   # self.r can take the values from 255 to 101
         if self.r < 151:
@@ -221,16 +238,41 @@ class Mouse(pygame.sprite.Sprite):
 
 class VectorSprite(pygame.sprite.Sprite):
     """base class for sprites. this class inherits from pygames sprite class"""
-    number = 0
-    numbers = {} # { number, Sprite }
+    numbers = handles.HandleTable() # { number: Sprite }, only living sprites
+    # default values for missing keywords, merged once per class by specs.spec_of
+    defaults = {"static": False,
+                "pos": specs.computed(lambda sprite: pygame.math.Vector2(random.randint(0, PygView.width),-50)),
+                "move": specs.computed(lambda sprite: pygame.math.Vector2(0,0)),
+                "radius": 5,
+                "width": specs.computed(lambda sprite: sprite.radius * 2),
+                "height": specs.computed(lambda sprite: sprite.radius * 2),
+                "color": specs.computed(lambda sprite: (random.randint(0,255), random.randint(0,255), random.randint(0,255))),
+                "hitpoints": 100,
+                "mass": 15,
+                "damage": 10,
+                "bounce_on_edge": False,
+                "kill_on_edge": False,
+                "angle": 0, # facing right?
+                "max_age": None,
+                "max_distance": None,
+                "picture": None,
+                "bossnumber": None,
+                "kill_with_boss": False,
+                "sticky_with_boss": False,
+                "upkey": None,
+                "downkey": None,
+                "rightkey": None,
+                "leftkey": None,
+                "speed": None,
+                "age": 0, # age in seconds
+                "warp_on_edge": False,
+                "dangerhigh": False}
 
     def __init__(self, **kwargs):
         self._default_parameters(**kwargs)
         self._overwrite_parameters()
         pygame.sprite.Sprite.__init__(self, self.groups) #call parent class. NEVER FORGET !
-        self.number = VectorSprite.number # unique number for each sprite
-        VectorSprite.number += 1
-        VectorSprite.numbers[self.number] = self
+        self.number = VectorSprite.numbers.add(self) # unique number for each sprite, never reused
         self.create_image()
         self.distance_traveled = 0 # in pixel
         self.rect.center = (-300,-300) # avoid blinking image in topleft corner
@@ -245,74 +287,12 @@ class VectorSprite(pygame.sprite.Sprite):
         """change parameters before create_image is called""" 
         pass
 
-    def _default_parameters(self, **kwargs):    
+    def _default_parameters(self, **kwargs):
         """get unlimited named arguments and turn them into attributes
-           default values for missing keywords"""
-
-        for key, arg in kwargs.items():
-            setattr(self, key, arg)
-        if "layer" not in kwargs:
-            self._layer = 4
-        else:
-            self._layer = self.layer
-        if "static" not in kwargs:
-            self.static = False
-        if "pos" not in kwargs:
-            self.pos = pygame.math.Vector2(random.randint(0, PygView.width),-50)
-        if "move" not in kwargs:
-            self.move = pygame.math.Vector2(0,0)
-        if "radius" not in kwargs:
-            self.radius = 5
-        if "width" not in kwargs:
-            self.width = self.radius * 2
-        if "height" not in kwargs:
-            self.height = self.radius * 2
-        if "color" not in kwargs:
-            #self.color = None
-            self.color = (random.randint(0,255), random.randint(0,255), random.randint(0,255))
-        if "hitpoints" not in kwargs:
-            self.hitpoints = 100
+           default values for missing keywords, see defaults"""
+        specs.spec_of(type(self)).apply(self, kwargs)
+        self._layer = kwargs.get("layer", 4)
         self.hitpointsfull = self.hitpoints # makes a copy
-        if "mass" not in kwargs:
-            self.mass = 10
-        if "damage" not in kwargs:
-            self.damage = 10
-        if "bounce_on_edge" not in kwargs:
-            self.bounce_on_edge = False
-        if "kill_on_edge" not in kwargs:
-            self.kill_on_edge = False
-        if "angle" not in kwargs:
-            self.angle = 0 # facing right?
-        if "max_age" not in kwargs:
-            self.max_age = None
-        if "max_distance" not in kwargs:
-            self.max_distance = None
-        if "picture" not in kwargs:
-            self.picture = None
-        if "bossnumber" not in kwargs:
-            self.bossnumber = None
-        if "kill_with_boss" not in kwargs:
-            self.kill_with_boss = False
-        if "sticky_with_boss" not in kwargs:
-            self.sticky_with_boss = False
-        if "mass" not in kwargs:
-            self.mass = 15
-        if "upkey" not in kwargs:
-            self.upkey = None
-        if "downkey" not in kwargs:
-            self.downkey = None
-        if "rightkey" not in kwargs:
-            self.rightkey = None
-        if "leftkey" not in kwargs:
-            self.leftkey = None
-        if "speed" not in kwargs:
-            self.speed = None
-        if "age" not in kwargs:
-            self.age = 0 # age in seconds
-        if "warp_on_edge" not in kwargs:
-            self.warp_on_edge = False
-        if "dangerhigh" not in kwargs:
-            self.dangerhigh = False
 
     def kill(self):
         if self.number in self.numbers:
@@ -334,20 +314,16 @@ class VectorSprite(pygame.sprite.Sprite):
     def rotate(self, by_degree):
         """rotates a sprite and changes it's angle by by_degree"""
         self.angle += by_degree
-        oldcenter = self.rect.center
-        self.image = pygame.transform.rotate(self.image0, self.angle)
-        self.image.convert_alpha()
-        self.rect = self.image.get_rect()
-        self.rect.center = oldcenter
+        rotated = imagecache.rotations.entry(self.image0, self.angle)
+        self.image = rotated.image
+        self.rect = rotated.get_rect(self.rect.center)
 
     def set_angle(self, degree):
         """rotates a sprite and changes it's angle to degree"""
         self.angle = degree
-        oldcenter = self.rect.center
-        self.image = pygame.transform.rotate(self.image0, self.angle)
-        self.image.convert_alpha()
-        self.rect = self.image.get_rect()
-        self.rect.center = oldcenter
+        rotated = imagecache.rotations.entry(self.image0, self.angle)
+        self.image = rotated.image
+        self.rect = rotated.get_rect(self.rect.center)
         
     def ai(self):
         pass
@@ -516,6 +492,20 @@ class Rocketship(VectorSprite):
             
 
 class Smoke(VectorSprite):
+    particles = None # a particles.ParticleSystem, set in PygView.paint()
+
+    @classmethod
+    def spawn(cls, **kwargs):
+        """emit a smoke particle into Smoke.particles, or create a Smoke sprite if there is none
+           (no numpy or PygView(use_particles=False))"""
+        if cls.particles is None:
+            return cls(**kwargs)
+        pos = kwargs["pos"]
+        gravity = kwargs.get("gravity", pygame.math.Vector2(0,0))
+        # grey gets lighter with age and the puff grows 3 pixel per second, like the sprite
+        cls.particles.emit(pos.x, pos.y, max_age=kwargs.get("max_age", 4),
+                           color=(30,30,30), color2=(255,255,255),
+                           radius=0, grow=3, gravity=(gravity.x, gravity.y))
 
     def create_image(self):
         self.image = pygame.Surface((50,50))
@@ -538,31 +528,55 @@ class Smoke(VectorSprite):
 
 
 class Explosion(VectorSprite):
+    particles = None # a particles.ParticleSystem, set in PygView.paint()
+    variants = 4 # pre-painted ring colors per radius, see imagecache.explosions
+
+    @classmethod
+    def spawn(cls, **kwargs):
+        """emit a burst of particles into Explosion.particles, or create an Explosion
+           sprite if there is none (no numpy or PygView(use_particles=False))"""
+        if cls.particles is None:
+            return cls(**kwargs)
+        pos = kwargs["pos"]
+        max_age = kwargs.get("max_age", 2)
+        # the sprite grows 1 pixel per frame (30 fps), the particles fly as far
+        cls.particles.burst(pos.x, pos.y, count=150, speed=30*max_age, max_age=max_age,
+                            color=kwargs.get("color", (255,255,255)), color2=(197,37,37),
+                            radius=2)
 
     def _overwrite_parameters(self):
         self._layer = 2
 
     def create_image(self):
-        self.image=pygame.Surface((self.radius*2, self.radius*2))
-        pygame.draw.circle(self.image, (197, 37,  37),(self.radius, self.radius),  self.radius, 0)
+        # a random one of the pre-painted variants, painted only once per radius
+        variant = random.randint(0, Explosion.variants - 1)
+        key = (__name__, self.radius, tuple(self.color), variant)
+        self.image = imagecache.explosions.get(key, lambda: self.paint_image(variant))
+        self.rect= self.image.get_rect()
+
+    def paint_image(self, variant):
+        """paint the rings. same variant and radius gives the same colors"""
+        rnd = random.Random(variant * 1000 + self.radius)
+        image=pygame.Surface((self.radius*2, self.radius*2))
+        pygame.draw.circle(image, (197, 37,  37),(self.radius, self.radius),  self.radius, 0)
         r, g, b = self.color
         for rad in range(5,66, 5):
             if self.radius > rad:
                 if r != 0 and r != 255:
-                   r1 = (random.randint(rad-10,rad) + r) % 255
+                   r1 = (rnd.randint(rad-10,rad) + r) % 255
                 else:
                     r1 = r
                 if g != 0 and g != 255:
-                    g1 = (random.randint(rad-10,rad) + g) % 255
+                    g1 = (rnd.randint(rad-10,rad) + g) % 255
                 else:
                     g1 = g
                 if b != 0 and b != 255:
-                    b1 = (random.randint(rad-10,rad) + b) % 255
+                    b1 = (rnd.randint(rad-10,rad) + b) % 255
                 else:
                     b1 = b
-                pygame.draw.circle(self.image, (r1,g1,b1), (self.radius, self.radius), self.radius-rad, 0)
-        self.image.set_colorkey((0,0,0))
-        self.rect= self.image.get_rect()
+                pygame.draw.circle(image, (r1,g1,b1), (self.radius, self.radius), self.radius-rad, 0)
+        image.set_colorkey((0,0,0))
+        return image
 
     def update(self,seconds):
          VectorSprite.update(self, seconds)
@@ -576,13 +590,11 @@ class Rocket(VectorSprite):
     def __init__(self, **kwargs):
         self.readyToLaunchTime = 0
         VectorSprite.__init__(self, **kwargs)
-        
-        self.damage = 3
-        self.color = (255,156,0)
-        self.create_image()
 
     def _overwrite_parameters(self):
-        self._layer = 1    
+        self._layer = 1
+        self.damage = 3
+        self.color = (255,156,0) # set before create_image, the image is painted only once
 
     def create_image(self):
         self.angle = 90
@@ -606,7 +618,7 @@ class Rocket(VectorSprite):
             self.move = self.move.normalize() * self.speed
             # --- Smoke ---
             if random.random() < 0.2 and self.age > 0.1:
-                Smoke(pos=pygame.math.Vector2(self.pos.x, self.pos.y), 
+                Smoke.spawn(pos=pygame.math.Vector2(self.pos.x, self.pos.y), 
                    gravity=pygame.math.Vector2(0,4), max_age = 4)
         self.oldage = self.age
         VectorSprite.update(self, seconds)
@@ -615,7 +627,7 @@ class Rocket(VectorSprite):
             self.pos.y -= 500
 
     def kill(self):
-        Explosion(pos=pygame.math.Vector2(self.pos.x, self.pos.y),max_age=2.1, color=(200,255,255), damage = self.damage)
+        Explosion.spawn(pos=pygame.math.Vector2(self.pos.x, self.pos.y),max_age=2.1, color=(200,255,255), damage = self.damage)
         VectorSprite.kill(self)    
 
 
@@ -624,9 +636,10 @@ class PygView(object):
     width = 0
     height = 0
 
-    def __init__(self, width=640, height=400, fps=30):
+    def __init__(self, width=640, height=400, fps=30, hz=30, use_particles=True, profile=None):
         """Initialize pygame, window, background, font,...
-           default arguments """
+           default arguments. use_particles=False: Smoke and Explosion as
+           sprites (the Explosion images come from imagecache.explosions)"""
         pygame.init()
         PygView.width = width    # make global readable
         PygView.height = height
@@ -634,8 +647,13 @@ class PygView(object):
         self.background = pygame.Surface(self.screen.get_size()).convert()
         self.background.fill((255,255,255)) # fill background white
         self.clock = pygame.time.Clock()
+        self.profiler = profiler.install(self, profile) # PROFILER=1: F3 profiler overlay, F4 save it as csv
         self.fps = fps
+        # physics steps per second, independent of fps. 30 = the old frame
+        # rate: key rotation and acceleration are per update, not per second
+        self.timestep = timestep.FixedStep(hz)
         self.playtime = 0.0
+        self.use_particles = use_particles
         # ------ background images ------
         self.backgroundfilenames = [] # every .jpg file in folder 'data'
         try:
@@ -653,6 +671,7 @@ class PygView(object):
         PygView.bombchance = 0.015
         PygView.rocketchance = 0.001
         PygView.wave = 0
+        self.backgrounds = backgrounds.BackgroundLoader(self.screen.get_size())
         self.age = 0
         # ------ joysticks ----
         pygame.joystick.init()
@@ -662,19 +681,17 @@ class PygView(object):
         self.paint()
         self.loadbackground()
 
+    def backgroundfile(self, wave):
+        """name of the jpg for a wave, None if there is none (white)"""
+        if len(self.backgroundfilenames) == 0:
+            return None
+        return self.backgroundfilenames[wave % len(self.backgroundfilenames)]
+
     def loadbackground(self):
-        
-        try:
-            self.background = pygame.image.load(os.path.join("data",
-                 self.backgroundfilenames[PygView.wave %
-                 len(self.backgroundfilenames)]))
-        except:
-            self.background = pygame.Surface(self.screen.get_size()).convert()
-            self.background.fill((255,255,255)) # fill background white
-            
-        self.background = pygame.transform.scale(self.background,
-                          (PygView.width,PygView.height))
-        self.background.convert()
+        """background of PygView.wave (scaled and converted, loaded ahead of
+           time by self.backgrounds), the next wave's one is loaded now"""
+        self.background = self.backgrounds.get(self.backgroundfile(PygView.wave))
+        self.backgrounds.prefetch(self.backgroundfile(PygView.wave + 1))
         
 
     def paint(self):
@@ -691,6 +708,13 @@ class PygView(object):
         Flytext.groups = self.allgroup
         Explosion.groups = self.allgroup, self.explosiongroup
         Snipership.groups = self.allgroup, self.snipergroup
+        # ---- smoke and explosions as particles instead of sprites ----
+        if particles is not None and self.use_particles:
+            self.particles = particles.ParticleSystem(upward_y=True)
+        else:
+            self.particles = None
+        Smoke.particles = self.particles
+        Explosion.particles = self.particles
         
         
 
@@ -708,6 +732,52 @@ class PygView(object):
             self.ship = Snipership(pos=pygame.math.Vector2(random.randint(0,PygView.width),-50), color=(0,255,255))
         self.ship2 =  Rocketship(pos=pygame.math.Vector2(50,-50), color=(0,255,0))
    
+    def control(self):
+        """keys and joysticks, once per physics step"""
+        # ------------ pressed keys ------
+        pressed_keys = pygame.key.get_pressed()
+
+
+        # if pressed_keys[pygame.K_LSHIFT]:
+            # paint range circles for cannons
+        if pressed_keys[pygame.K_a]:
+            self.eck.rotate(3)
+        if pressed_keys[pygame.K_d]:
+            self.eck.rotate(-3)
+        if pressed_keys[pygame.K_w]:
+            v = pygame.math.Vector2(1,0)
+            v.rotate_ip(self.eck.angle)
+            self.eck.move += v
+        if pressed_keys[pygame.K_s]:
+            v = pygame.math.Vector2(1,0)
+            v.rotate_ip(self.eck.angle)
+            self.eck.move += -v
+
+
+        # ------ joystick handler -------
+        mouses = [self.mouse4, self.mouse5]
+        for number, j in enumerate(self.joysticks):
+            if number == 0:
+               x = j.get_axis(0)
+               y = j.get_axis(1)
+               mouses[number].x += x * 20 # *2 
+               mouses[number].y += y * 20 # *2 
+               buttons = j.get_numbuttons()
+               for b in range(buttons):
+                   pushed = j.get_button( b )
+                   #if b == 0 and pushed:
+                   #        self.launchRocket((mouses[number].x, mouses[number].y))
+                   #elif b == 1 and pushed:
+                   #    if not self.mouse4.pushed: 
+                   #        self.launchRocket((mouses[number].x, mouses[number].y))
+                   #        mouses[number] = True
+                   #elif b == 1 and not pushed:
+                   #    mouses[number] = False
+
+    def physics(self, seconds):
+        """move all sprites, once per step"""
+        self.allgroup.update(seconds)
+
     def run(self):
         """The mainloop"""
         running = True
@@ -796,26 +866,6 @@ class PygView(object):
             # --- line from snipership to target ---
             for s in self.snipergroup:
                 pygame.draw.line(self.screen, (random.randint(200,250),0,0), (s.pos.x, -s.pos.y), (s.target.x, -s.target.y))
-            # ------------ pressed keys ------
-            pressed_keys = pygame.key.get_pressed()
-            
-
-            # if pressed_keys[pygame.K_LSHIFT]:
-                # paint range circles for cannons
-            if pressed_keys[pygame.K_a]:
-                self.eck.rotate(3)
-            if pressed_keys[pygame.K_d]:
-                self.eck.rotate(-3)
-            if pressed_keys[pygame.K_w]:
-                v = pygame.math.Vector2(1,0)
-                v.rotate_ip(self.eck.angle)
-                self.eck.move += v
-            if pressed_keys[pygame.K_s]:
-                v = pygame.math.Vector2(1,0)
-                v.rotate_ip(self.eck.angle)
-                self.eck.move += -v
-    
-            
             # ------ mouse handler ------
             left,middle,right = pygame.mouse.get_pressed()
             #if oldleft and not left:
@@ -824,25 +874,6 @@ class PygView(object):
             #    self.launchRocket(pygame.mouse.get_pos())
             oldleft, oldmiddle, oldright = left, middle, right
 
-            # ------ joystick handler -------
-            mouses = [self.mouse4, self.mouse5]
-            for number, j in enumerate(self.joysticks):
-                if number == 0:
-                   x = j.get_axis(0)
-                   y = j.get_axis(1)
-                   mouses[number].x += x * 20 # *2 
-                   mouses[number].y += y * 20 # *2 
-                   buttons = j.get_numbuttons()
-                   for b in range(buttons):
-                       pushed = j.get_button( b )
-                       #if b == 0 and pushed:
-                       #        self.launchRocket((mouses[number].x, mouses[number].y))
-                       #elif b == 1 and pushed:
-                       #    if not self.mouse4.pushed: 
-                       #        self.launchRocket((mouses[number].x, mouses[number].y))
-                       #        mouses[number] = True
-                       #elif b == 1 and not pushed:
-                       #    mouses[number] = False
             pos1 = pygame.math.Vector2(pygame.mouse.get_pos())
             pos2 = self.mouse2.rect.center
             pos3 = self.mouse3.rect.center
@@ -850,7 +881,13 @@ class PygView(object):
             # write text below sprites
             write(self.screen, "FPS: {:8.3}".format(
                 self.clock.get_fps() ), x=10, y=10)
-            self.allgroup.update(seconds)
+            # ---- physics in steps of always the same time, see timestep.py ----
+            for step in range(self.timestep.advance(seconds)):
+                timestep.snapshot(self.allgroup) # position before the step, for interpolate
+                self.control()
+                self.physics(self.timestep.dt)
+            if self.particles is not None:
+                self.particles.update(seconds)
 
             # --------- collision detection between target and Explosion -----
             #for e in self.explosiongroup:
@@ -863,22 +900,23 @@ class PygView(object):
 
             
             # ----------- clear, draw , update, flip -----------------
+            # draw the sprites between their last two positions
+            moved = timestep.interpolate(self.allgroup, self.timestep.alpha)
             self.allgroup.draw(self.screen)
+            timestep.restore(moved) # the sprites move on from their real rects
+            if self.particles is not None:
+                self.particles.draw(self.screen)
 
             
             # --- Martins verbesserter Mousetail -----
             for mouse in self.mousegroup:
-                if len(mouse.tail)>2:
-                    for a in range(1,len(mouse.tail)):
-                        r,g,b = mouse.color
-                        pygame.draw.line(self.screen,(r-a,g,b),
-                                     mouse.tail[a-1],
-                                     mouse.tail[a],10-a*10//10)
+                mouse.draw_tail(self.screen)
             
             # -------- next frame -------------
             pygame.display.flip()
         #-----------------------------------------------------
         pygame.mouse.set_visible(True)    
+        profiler.uninstall()
         pygame.quit()
 
 if __name__ == '__main__':
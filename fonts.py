@@ -0,0 +1,176 @@
+"""
+font registry, rendered text cache and glyph atlas, shared by all games
+idea: pygame.font.SysFont searches the installed fonts on every call, and
+      font.render paints the text again even if it did not change.
+      - get_font() creates each (name, size, bold) Font only once
+      - render() keeps rendered strings ("Reloading", names, scores) in a
+        least recently used cache
+      - text changing every frame (the FPS counter, playtime) would only fill
+        that cache, so write() composes text containing digits from cached
+        single letter surfaces (a glyph atlas): no font.render at all
+usage:
+    font = fonts.get_font("mono", 24, bold=True)
+    surface = fonts.render("Reloading", (255, 0, 0), 24)
+    rect = fonts.write(self.screen, "FPS: {:6.3}".format(fps), x=10, y=10)
+    print(fonts.stats())
+this module must be in the same directory as the game files.
+"""
+import collections
+import pygame
+
+_fonts = {}   # { (name, size, bold, italic): pygame.font.Font }
+_quit_registered = []   # pygame forgets register_quit functions after pygame.quit
+
+
+def get_font(name="mono", size=24, bold=False, italic=False):
+    """pygame.font.SysFont, but created only once per (name, size, bold, italic)"""
+    key = (name, size, bold, italic)
+    font = _fonts.get(key)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.SysFont(name, size, bold, italic)
+        _fonts[key] = font
+        if not _quit_registered:
+            pygame.register_quit(_forget)
+            _quit_registered.append(True)
+    return font
+
+
+def _forget():
+    """pygame.quit ends the fonts, using them after the next pygame.init
+       crashes pygame (menu1 after a game): create them again"""
+    _fonts.clear()
+    _atlases.clear()
+    texts.clear()
+    del _quit_registered[:]
+
+
+def _alpha_format(surface):
+    """convert_alpha, only possible after pygame.display.set_mode"""
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert_alpha()
+
+
+class TextCache(object):
+    """least recently used cache of rendered strings.
+       never change a returned surface, it is shared"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.surfaces = collections.OrderedDict()  # oldest first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    def render(self, text, color=(0, 0, 0), size=24, name="mono", bold=False,
+               antialias=True):
+        key = (text, tuple(color), size, name, bold, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        font = get_font(name, size, bold)
+        surface = _alpha_format(font.render(text, antialias, color))
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.maxsize:
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+class GlyphAtlas(object):
+    """single letters of one font and color, rendered once.
+       blit() composes a text from them, every letter is moved on by its
+       advance (no kerning, the same as font.render for mono fonts)"""
+
+    def __init__(self, font, color=(0, 0, 0), antialias=True):
+        self.font = font
+        self.color = color
+        self.antialias = antialias
+        self.glyphs = {}   # { letter: (Surface, advance) }
+        self.height = font.size("0")[1]
+        # proportional fonts use kerning, composing letters would look different
+        self.monospaced = font.size("iiii") == font.size("MMMM")
+
+    def glyph(self, letter):
+        glyph = self.glyphs.get(letter)
+        if glyph is None:
+            surface = _alpha_format(self.font.render(letter, self.antialias, self.color))
+            # distance to the next letter, as font.render places it
+            advance = self.font.size(letter * 2)[0] - self.font.size(letter)[0]
+            glyph = (surface, advance)
+            self.glyphs[letter] = glyph
+        return glyph
+
+    def size(self, text):
+        return sum(self.glyph(letter)[1] for letter in text), self.height
+
+    def blit(self, target, text, pos):
+        """paint text with topleft at pos, returns the painted rect"""
+        x, y = pos
+        jobs = []
+        for letter in text:
+            surface, advance = self.glyph(letter)
+            jobs.append((surface, (x, y)))
+            x += advance
+        rects = target.blits(jobs)
+        if not rects:
+            return pygame.Rect(pos, (0, 0))
+        return rects[0].unionall(rects)
+
+
+_atlases = {}   # { (name, size, bold, color): GlyphAtlas }
+
+
+def get_atlas(name="mono", size=24, bold=False, color=(0, 0, 0)):
+    key = (name, size, bold, tuple(color))
+    atlas = _atlases.get(key)
+    if atlas is None:
+        atlas = GlyphAtlas(get_font(name, size, bold), color)
+        _atlases[key] = atlas
+    return atlas
+
+
+# ---- one text cache for all games ----
+texts = TextCache(256)
+
+
+def render(text, color=(0, 0, 0), size=24, name=None, bold=False):
+    """cached font.render(text), like make_text of the games"""
+    return texts.render(text, color, size, name, bold)
+
+
+def write(surface, text, x=50, y=150, color=(0, 0, 0), fontsize=None,
+          center=False, name="mono", bold=True):
+    """write text on a pygame surface, like write() of the games.
+       text with digits is composed from glyphs (if the font is monospaced),
+       other text comes from the text cache. returns the painted rect"""
+    if fontsize is None:
+        fontsize = 24
+    if any(letter.isdigit() for letter in text):
+        atlas = get_atlas(name, fontsize, bold, color)
+        if atlas.monospaced:
+            fw, fh = atlas.size(text)
+            if center:  # center text around x,y
+                return atlas.blit(surface, text, (x - fw // 2, y - fh // 2))
+            return atlas.blit(surface, text, (x, y))
+    textsurface = texts.render(text, color, fontsize, name, bold)
+    fw, fh = textsurface.get_size()
+    if center:  # center text around x,y
+        return surface.blit(textsurface, (x - fw // 2, y - fh // 2))
+    return surface.blit(textsurface, (x, y))  # topleft corner is x,y
+
+
+def stats():
+    return "{} fonts, {} atlases, text cache: {} strings, hits: {} misses: {} evictions: {}".format(
+           len(_fonts), len(_atlases), len(texts), texts.hits, texts.misses, texts.evictions)
@@ -0,0 +1,111 @@
+"""
+generational handle table: numbers for sprites that can not be confused
+idea: VectorSprite.numbers was a dict { number: sprite } that only grows.
+      a HandleTable keeps the sprites in a list of slots. a freed slot is
+      used again by the next sprite, but with a higher generation. the
+      handle (the sprite's .number) contains slot and generation, so the
+      handle of a killed sprite never finds the new sprite in its old slot.
+      - lookup, add and remove are O(1) (list index, no hashing)
+      - iterating over a table gives all living objects, without gaps
+      - a handle is a plain int: it can be compared, printed and used as key
+usage (works like the old dict):
+    VectorSprite.numbers = handles.HandleTable()
+    self.number = VectorSprite.numbers.add(self)
+    boss = VectorSprite.numbers[self.bossnumber]    # KeyError if the boss is dead
+    if self.bossnumber not in VectorSprite.numbers: # boss is dead
+    del VectorSprite.numbers[self.number]           # in kill()
+    for sprite in VectorSprite.numbers:             # all living sprites
+this module must be in the same directory as the game files.
+"""
+
+SLOT_BITS = 24                  # up to 16 million living objects
+SLOT_MASK = (1 << SLOT_BITS) - 1
+
+
+def slot_of(handle):
+    return handle & SLOT_MASK
+
+
+def generation_of(handle):
+    return handle >> SLOT_BITS
+
+
+class HandleTable(object):
+    """slot array with generation counters and a dense list of living handles"""
+
+    def __init__(self):
+        self.objects = []       # object of each slot, None if free
+        self.generations = []   # generation of each slot, +1 on every remove
+        self.positions = []     # index of each slot in self.dense
+        self.dense = []         # handles of all living objects, no gaps
+        self.free = []          # free slots, the last freed is used first
+
+    def __len__(self):
+        return len(self.dense)
+
+    def __iter__(self):
+        """all living objects. do not add or remove while iterating,
+           use list(table) for that"""
+        objects = self.objects
+        for handle in self.dense:
+            yield objects[handle & SLOT_MASK]
+
+    def handles(self):
+        return list(self.dense)
+
+    def add(self, obj):
+        """store obj in a free slot, returns its handle"""
+        if self.free:
+            slot = self.free.pop()
+            self.objects[slot] = obj
+        else:
+            slot = len(self.objects)
+            self.objects.append(obj)
+            self.generations.append(0)
+            self.positions.append(-1)
+        handle = (self.generations[slot] << SLOT_BITS) | slot
+        self.positions[slot] = len(self.dense)
+        self.dense.append(handle)
+        return handle
+
+    def valid(self, handle):
+        """True if handle belongs to a living object (not removed, not stale)"""
+        if handle is None:
+            return False
+        slot = handle & SLOT_MASK
+        return (slot < len(self.objects) and self.objects[slot] is not None and
+                self.generations[slot] == handle >> SLOT_BITS)
+
+    __contains__ = valid
+
+    def get(self, handle, default=None):
+        if self.valid(handle):
+            return self.objects[handle & SLOT_MASK]
+        return default
+
+    def __getitem__(self, handle):
+        if not self.valid(handle):
+            raise KeyError(handle)
+        return self.objects[handle & SLOT_MASK]
+
+    def remove(self, handle):
+        """free the slot of handle, KeyError if handle is stale"""
+        if not self.valid(handle):
+            raise KeyError(handle)
+        slot = handle & SLOT_MASK
+        self.objects[slot] = None
+        self.generations[slot] += 1
+        # keep self.dense without gaps: move the last handle into the hole
+        position = self.positions[slot]
+        last = self.dense.pop()
+        if last != handle:
+            self.dense[position] = last
+            self.positions[last & SLOT_MASK] = position
+        self.positions[slot] = -1
+        self.free.append(slot)
+
+    __delitem__ = remove
+
+    def clear(self):
+        for handle in list(self.dense):
+            self.remove(handle)
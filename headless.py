@@ -0,0 +1,267 @@
+"""
+headless simulation mode for all games
+idea: run a game without window, without sound and without waiting for the
+      clock. every frame gets the same fixed dt, random is seeded and the
+      sprite numbers (handles.HandleTable) start again in a new table, so
+      two runs with the same seed are the same game, also one after the
+      other in the same process (the order of the collision pairs depends
+      on the numbers). the mainloop runs as fast as
+      possible for a given number of ticks and reports ticks per second,
+      the time spent in each phase and the peak number of sprites.
+usage:
+    python3 headless.py ballwars --ticks 3000 --seed 1
+    python3 headless.py feuerwerk --ticks 1000 --no-draw
+    python3 headless.py --help
+or from python:
+    report = headless.simulate("ballwars", ticks=3000, seed=1)
+phases (each game's PygView.run is left as it is, the phases are measured
+by wrapping the pygame and game functions called from it):
+    ai       VectorSprite.ai (runs inside update, so it is part of update too),
+             PygView.control (ballwars: the ai players, keys and joysticks)
+    update   Group.update
+    collide  spritecollide, spritecollideany, groupcollide, broadphase, elastic_collision
+    draw     Group.draw, write(), display.flip
+"""
+import os
+import argparse
+import importlib
+import random
+import time
+import pygame
+import handles  # handles.py must be in same directory as this file
+
+# window size as used in the __main__ part of each game
+GAMES = {"feuerwerk": (1430, 800),
+         "ballwars": (1400, 800),
+         "airhockey": (1430, 800),
+         "asteroids": (1430, 800),
+         "tankgame": (1440, 800),
+         "yannik": (1430, 800),
+         }
+
+PHASES = ("ai", "update", "collide", "draw")
+
+# no window, no sound. set in Simulation.run, not at import: replay.py
+# imports this module and records with the real drivers
+DRIVERS = {"SDL_VIDEODRIVER": "dummy", "SDL_AUDIODRIVER": "dummy"}
+
+
+def dummy_drivers():
+    """use the dummy video and audio driver, before pygame.init()"""
+    os.environ.update(DRIVERS)
+
+
+class FixedClock(object):
+    """replacement for pygame.time.Clock: never waits, tick() always returns
+       the same milliseconds. counts the ticks and ends the game after max_ticks"""
+
+    def __init__(self, simulation):
+        self.simulation = simulation
+
+    def tick(self, framerate=0):
+        return self.simulation.tick(framerate)
+
+    def tick_busy_loop(self, framerate=0):
+        return self.simulation.tick(framerate)
+
+    def get_fps(self):
+        return self.simulation.ticks_per_second()
+
+    def get_time(self):
+        return self.simulation.milliseconds
+
+    def get_rawtime(self):
+        return self.simulation.milliseconds
+
+
+class SilentSound(object):
+    """replacement for pygame.mixer.Sound, the dummy audio driver needs no sound files"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def play(self, *args, **kwargs):
+        pass
+
+    def stop(self):
+        pass
+
+    def set_volume(self, value):
+        pass
+
+    def get_length(self):
+        return 0.0
+
+
+class Simulation(object):
+    """runs one game headless. patch() replaces the pygame functions,
+       restore() puts the originals back"""
+
+    def __init__(self, game, ticks=1000, fps=None, seed=0, draw=True):
+        self.game = game
+        self.max_ticks = ticks
+        self.fps = fps            # None: use the fps the game asks for in clock.tick(fps)
+        self.seed = seed
+        self.draw = draw
+        self.view = None
+        self.ticks = 0
+        self.milliseconds = 0
+        self.peak_sprites = 0
+        self.times = dict((phase, 0.0) for phase in PHASES)
+        self._active = set()      # phases currently measured (no double counting)
+        self._patched = []        # (owner, name, original)
+        self._start = None
+        self.wallclock = 0.0
+
+    # ---- patching ----
+    def replace(self, owner, name, new):
+        self._patched.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, new)
+
+    def timed(self, owner, name, phase, drawing=False):
+        """wrap owner.name, the time spent inside is added to phase.
+           drawing functions are skipped while self.draw is False"""
+        original = getattr(owner, name)
+        times = self.times
+        active = self._active
+
+        def wrapper(*args, **kwargs):
+            if drawing and not self.draw:
+                return []
+            if phase in active:
+                return original(*args, **kwargs)
+            active.add(phase)
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                times[phase] += time.perf_counter() - start
+                active.discard(phase)
+        self.replace(owner, name, wrapper)
+
+    def patch(self, module):
+        self.replace(pygame.time, "Clock", lambda: FixedClock(self))
+        self.replace(pygame.event, "get", self.events)
+        self.replace(pygame.mixer, "Sound", SilentSound)
+        for name in ("load", "play", "stop", "fadeout"):
+            self.replace(pygame.mixer.music, name, lambda *args, **kwargs: None)
+        self.replace(pygame.mouse, "set_visible", lambda *args: None)
+        new_numbers(module, self.replace)
+        # the intro text of ballwars is not part of the simulation
+        try:
+            import textscroller_vertical
+            self.replace(textscroller_vertical.PygView, "run", lambda self: None)
+        except ImportError:
+            pass
+        # ---- phases ----
+        if hasattr(module, "VectorSprite") and hasattr(module.VectorSprite, "ai"):
+            self.timed(module.VectorSprite, "ai", "ai")
+        if hasattr(module.PygView, "control"):
+            self.timed(module.PygView, "control", "ai")
+        self.timed(pygame.sprite.AbstractGroup, "update", "update")
+        for name in ("spritecollide", "spritecollideany", "groupcollide"):
+            self.timed(pygame.sprite, name, "collide")
+        if hasattr(module, "broadphase"):
+            for name in ("collide_pairs", "collide_groups"):
+                self.timed(module.broadphase, name, "collide")
+            self.timed(module.broadphase.GroupCollider, "collide_groups", "collide")
+        if hasattr(module, "elastic_collision"):
+            self.timed(module, "elastic_collision", "collide")
+        self.timed(pygame.sprite.AbstractGroup, "draw", "draw", drawing=True)
+        self.timed(pygame.sprite.LayeredUpdates, "draw", "draw", drawing=True)
+        self.timed(pygame.display, "flip", "draw", drawing=True)
+        self.timed(pygame.display, "update", "draw", drawing=True)
+        if hasattr(module, "write"):
+            self.timed(module, "write", "draw", drawing=True)
+
+    def restore(self):
+        while self._patched:
+            owner, name, original = self._patched.pop()
+            setattr(owner, name, original)
+
+    # ---- called by the game ----
+    def tick(self, framerate):
+        if self._start is None:
+            self._start = time.perf_counter()
+        if self.ticks < self.max_ticks:     # the games tick once more after QUIT
+            self.ticks += 1
+        fps = self.fps or framerate or 60
+        self.milliseconds = 1000.0 / fps
+        if self.view is not None and hasattr(self.view, "allgroup"):
+            self.peak_sprites = max(self.peak_sprites, len(self.view.allgroup))
+        return self.milliseconds
+
+    def events(self, *args, **kwargs):
+        if self.ticks >= self.max_ticks:
+            return [pygame.event.Event(pygame.QUIT)]
+        return []
+
+    def ticks_per_second(self):
+        if self._start is None or self.ticks == 0:
+            return 0.0
+        return self.ticks / (time.perf_counter() - self._start)
+
+    # ---- run ----
+    def run(self, **view_kwargs):
+        dummy_drivers()
+        random.seed(self.seed)
+        module = importlib.import_module(self.game)
+        self.patch(module)
+        try:
+            width, height = GAMES.get(self.game, (1430, 800))
+            view_kwargs.setdefault("width", width)
+            view_kwargs.setdefault("height", height)
+            self.view = module.PygView(**view_kwargs)
+            start = time.perf_counter()
+            self.view.run()
+            self.wallclock = time.perf_counter() - start
+        finally:
+            self.restore()
+        return self.report()
+
+    def report(self):
+        seconds = self.wallclock if self.wallclock > 0 else 1e-9
+        result = {"game": self.game,
+                  "seed": self.seed,
+                  "ticks": self.ticks,
+                  "dt": self.milliseconds / 1000.0,
+                  "seconds": seconds,
+                  "ticks_per_second": self.ticks / seconds,
+                  "peak_sprites": self.peak_sprites}
+        for phase in PHASES:
+            result[phase] = self.times[phase]
+        return result
+
+
+def new_numbers(module, replace):
+    """a new HandleTable for every class of module that has one (numbers):
+       a used table gives other numbers to the same sprites.
+       replace(owner, name, new) keeps the old one for restore"""
+    for cls in list(vars(module).values()):
+        if isinstance(cls, type) and isinstance(cls.__dict__.get("numbers"), handles.HandleTable):
+            replace(cls, "numbers", handles.HandleTable())
+
+
+def simulate(game, ticks=1000, fps=None, seed=0, draw=True, **view_kwargs):
+    """run game headless for ticks frames, returns a dict with the timings"""
+    return Simulation(game, ticks, fps, seed, draw).run(**view_kwargs)
+
+
+def print_report(report):
+    print("{game}: {ticks} ticks of {dt:.4f} s in {seconds:.2f} s = "
+          "{ticks_per_second:.1f} ticks/sec, peak sprites: {peak_sprites}".format(**report))
+    for phase in PHASES:
+        ms = report[phase] / max(report["ticks"], 1) * 1000
+        print("    {:8} {:8.3f} ms/tick  {:5.1f} %".format(
+              phase, ms, 100.0 * report[phase] / report["seconds"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="run a game without window as fast as possible")
+    parser.add_argument("game", choices=sorted(GAMES))
+    parser.add_argument("--ticks", type=int, default=1000, help="number of frames to simulate")
+    parser.add_argument("--fps", type=float, default=None, help="fixed dt = 1/fps (default: the game's fps)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for random")
+    parser.add_argument("--no-draw", action="store_true", help="skip drawing and display.flip")
+    args = parser.parse_args()
+    print_report(simulate(args.game, args.ticks, args.fps, args.seed, not args.no_draw))
@@ -0,0 +1,220 @@
+"""
+shared caches for pre-rendered pygame surfaces
+idea: sprites that repaint the same picture again and again (an Explosion
+      growing 1 pixel per frame, ...) ask the cache first. the surface is only
+      painted on the first request (a miss) and shared by all sprites later
+      (a hit). the least recently used surfaces are dropped when the cache
+      holds more bytes than its budget.
+usage:
+    self.image = imagecache.explosions.get(key, self.paint_image)
+    print(imagecache.explosions.stats())
+    self.image = imagecache.rotations.rotate(self.image0, self.angle)
+    pygame.sprite.spritecollide(city, self.bombgroup, False, imagecache.collide_mask)
+this module must be in the same directory as the game files.
+"""
+import collections
+import hashlib
+import weakref
+import pygame
+
+# pygame < 2.1.3 only knows tostring
+_tobytes = getattr(pygame.image, "tobytes", None) or pygame.image.tostring
+
+
+def surface_bytes(surface):
+    """memory used by the pixels of a surface"""
+    return surface.get_pitch() * surface.get_height()
+
+
+def display_format(surface):
+    """converted copy for fast blitting, only possible after pygame.display.set_mode"""
+    if pygame.display.get_surface() is None:
+        return surface
+    if surface.get_flags() & pygame.SRCALPHA:
+        return surface.convert_alpha()
+    return surface.convert()
+
+
+class SurfaceCache(object):
+    """least recently used cache { key: Surface } with a budget in bytes.
+       counts hits, misses and evictions"""
+
+    def __init__(self, budget=32 * 1024 * 1024):
+        self.budget = budget
+        self.surfaces = collections.OrderedDict()  # oldest first
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    def __contains__(self, key):
+        return key in self.surfaces
+
+    def get(self, key, paint):
+        """returns the surface stored under key. on a miss, paint() is called
+           to create it. never change the returned surface, it is shared"""
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = paint()
+        if isinstance(surface, pygame.Surface):
+            surface = display_format(surface)
+        self.put(key, surface)
+        return surface
+
+    def sizeof(self, surface):
+        return surface_bytes(surface)
+
+    def put(self, key, surface):
+        if key in self.surfaces:
+            self.bytes -= self.sizeof(self.surfaces.pop(key))
+        self.surfaces[key] = surface
+        self.bytes += self.sizeof(surface)
+        while self.bytes > self.budget and len(self.surfaces) > 1:
+            oldkey, oldsurface = self.surfaces.popitem(last=False)
+            self.bytes -= self.sizeof(oldsurface)
+            self.evictions += 1
+
+    def clear(self):
+        self.surfaces.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return "{} surfaces, {:.1f} MB, hits: {} misses: {} evictions: {}".format(
+               len(self.surfaces), self.bytes / 1024 / 1024,
+               self.hits, self.misses, self.evictions)
+
+
+class Rotated(object):
+    """one rotated image with its size and (on first request) its mask"""
+    __slots__ = ["image", "size", "_mask"]
+
+    def __init__(self, image):
+        self.image = display_format(image)
+        self.size = self.image.get_size()
+        self._mask = None
+
+    def get_rect(self, center):
+        rect = pygame.Rect((0, 0), self.size)
+        rect.center = center
+        return rect
+
+    def get_mask(self):
+        if self._mask is None:
+            self._mask = pygame.mask.from_surface(self.image)
+        return self._mask
+
+
+class RotationCache(SurfaceCache):
+    """rotated copies of sprite images (image0). the angle is rounded to step degrees.
+       the key is the content of image0, not the Surface object, so sprites
+       painting the same picture (four Sniperships...) share all rotations"""
+
+    def __init__(self, step=1, budget=16 * 1024 * 1024):
+        SurfaceCache.__init__(self, budget)
+        self.step = step
+        self.sources = weakref.WeakKeyDictionary()  # { image0: content key }
+
+    def source_key(self, image0):
+        """content key of a source image, calculated once per Surface object"""
+        key = self.sources.get(image0)
+        if key is None:
+            pixels = _tobytes(image0, "RGBA")
+            key = (hashlib.md5(pixels).hexdigest(), image0.get_size(),
+                   image0.get_colorkey(), image0.get_flags() & pygame.SRCALPHA)
+            self.sources[image0] = key
+        return key
+
+    def quantize(self, angle):
+        return round(angle / self.step) * self.step % 360
+
+    def sizeof(self, rotated):
+        w, h = rotated.size
+        return surface_bytes(rotated.image) + w * h // 8  # + mask
+
+    def entry(self, image0, angle):
+        angle = self.quantize(angle)
+        key = (self.source_key(image0), angle)
+        return self.get(key, lambda: Rotated(pygame.transform.rotate(image0, angle)))
+
+    def rotate(self, image0, angle):
+        """same as pygame.transform.rotate(image0, angle), but cached"""
+        return self.entry(image0, angle).image
+
+    def mask(self, image0, angle):
+        return self.entry(image0, angle).get_mask()
+
+
+class MaskCache(object):
+    """pygame.mask.from_surface for each image Surface only once.
+       the key is the Surface object (weak, the mask goes with the image), so
+       animation frames (City.images) and rotation steps (rotations) each get
+       their own mask. call forget(image) after painting into an image"""
+
+    def __init__(self):
+        self.masks = weakref.WeakKeyDictionary()  # { image: Mask }
+        self.hits = 0
+        self.builds = 0
+        self.rejected = 0                          # pairs the rect test sorted out
+
+    def __len__(self):
+        return len(self.masks)
+
+    def get(self, image):
+        mask = self.masks.get(image)
+        if mask is None:
+            self.builds += 1
+            mask = pygame.mask.from_surface(image)
+            self.masks[image] = mask
+        else:
+            self.hits += 1
+        return mask
+
+    def forget(self, image):
+        self.masks.pop(image, None)
+
+    def clear(self):
+        self.masks.clear()
+
+    def collide(self, left, right):
+        """like pygame.sprite.collide_mask, with a rect test first and the
+           masks from the cache (or the .mask of the sprite, if it has one)"""
+        if not left.rect.colliderect(right.rect):
+            self.rejected += 1
+            return False
+        leftmask = getattr(left, "mask", None)
+        if leftmask is None:
+            leftmask = self.get(left.image)
+        rightmask = getattr(right, "mask", None)
+        if rightmask is None:
+            rightmask = self.get(right.image)
+        offset = (right.rect.x - left.rect.x, right.rect.y - left.rect.y)
+        return leftmask.overlap(rightmask, offset)
+
+    def stats(self):
+        return "{} masks, builds: {} hits: {} rejected by rect: {}".format(
+               len(self.masks), self.builds, self.hits, self.rejected)
+
+
+# ---- one cache for all Explosion classes of all games ----
+# key: (module name, radius, base color, variant)
+explosions = SurfaceCache(32 * 1024 * 1024)
+
+# ---- one cache for the colour cycle frames of all Mouse cursors ----
+# key: (module name, radius, r, g, b)
+cursors = SurfaceCache(4 * 1024 * 1024)
+
+# ---- one cache for all rotated sprite images ----
+# change rotations.step to 3 to keep fewer images (less memory, coarser rotation)
+rotations = RotationCache(step=1, budget=16 * 1024 * 1024)
+
+# ---- one cache for the collision masks of all sprite images ----
+# use collide_mask instead of pygame.sprite.collide_mask in spritecollide
+masks = MaskCache()
+collide_mask = masks.collide
@@ -0,0 +1,195 @@
+"""
+fast start of menu1: the menu first, the games when they are chosen
+idea: python3 menu1.py needed about 350 ms before the first frame of the
+      menu, most of it before menu1 did anything:
+      - import pygame imports numpy (for pygame.surfarray and
+        pygame.sndarray) and pkg_resources (for pygame.pkgdata), together
+        more than half of the time. the menu needs neither.
+      - menu1 imported ballwars and textscroller_vertical (and with them
+        broadphase, ccd, profiler, ...) before the menu was shown
+      - pygame.init() starts every subsystem: mixer, joystick, ... the menu
+        only needs display and font
+      so the launcher
+      - imports pygame with numpy and pkg_resources left out (pygame marks
+        surfarray and sndarray as missing, pkgdata opens its files directly).
+        after the first frame of the menu a thread imports numpy and
+        surfarray / sndarray again (restore), before a game can use them
+      - imports a game module only when it is chosen in the menu (load)
+      - starts only the subsystems a module declares in SUBSYSTEMS
+        (subsystems.init), instead of pygame.init()
+      every step is written into a timeline (milliseconds since the start
+      of the launcher, like python3 -X importtime: self | cumulative).
+usage:
+    python3 launcher.py                  # menu1, fast
+    python3 launcher.py --timeline       # and print the timeline of the start
+    python3 launcher.py --benchmark      # time to the first frame of the menu: lazy / eager
+    python3 -X importtime launcher.py 2> imports.txt   # every import in detail
+in the menu:
+    ballwars = launcher.load("ballwars") # import when needed
+this module must be in the same directory as the game files.
+"""
+import time
+
+START = time.perf_counter()
+
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import subsystems  # subsystems.py must be in same directory as this file
+
+# left out by import_pygame, imported again by restore
+DEFERRED = ("numpy", "pkg_resources")
+# pygame modules that need numpy
+NUMPY_MODULES = ("surfarray", "sndarray")
+
+
+class Timeline(object):
+    """named points in time since START, in milliseconds"""
+
+    def __init__(self, start=START):
+        self.start = start
+        self.marks = []         # [(label, milliseconds)]
+        self.first_frame = False
+
+    def mark(self, label):
+        self.marks.append((label, (time.perf_counter() - self.start) * 1000))
+
+    def lines(self):
+        lines = ["startup: self [ms] | cumulative [ms] | step"]
+        last = 0.0
+        for label, milliseconds in self.marks:
+            lines.append("startup: {:9.1f} | {:15.1f} | {}".format(milliseconds - last, milliseconds, label))
+            last = milliseconds
+        return lines
+
+
+timeline = Timeline()
+_lock = threading.Lock()        # for restore: the thread or the game, whichever is first
+_restored = []
+_print_timeline = False
+_exit_after_first_frame = False
+subsystems.on_init.append(lambda name: timeline.mark("init " + name))
+
+
+def import_pygame():
+    """import pygame without numpy and pkg_resources"""
+    if "pygame" in sys.modules:
+        return sys.modules["pygame"]
+    left_out = [name for name in DEFERRED if name not in sys.modules]
+    for name in left_out:
+        sys.modules[name] = None    # import name raises ImportError
+    try:
+        import pygame
+    finally:
+        for name in left_out:
+            del sys.modules[name]
+    timeline.mark("import pygame (without {})".format(", ".join(left_out) or "-"))
+    return pygame
+
+
+def restore():
+    """import what import_pygame left out: numpy, pygame.surfarray, pygame.sndarray"""
+    with _lock:
+        if _restored:
+            return
+        import pygame
+        for name in NUMPY_MODULES:
+            if type(getattr(pygame, name, None)).__name__ == "MissingModule":
+                try:
+                    setattr(pygame, name, importlib.import_module("pygame." + name))
+                except ImportError:
+                    pass            # no numpy: missing as with a normal import
+        _restored.append(True)
+        timeline.mark("restore numpy, pygame.surfarray, pygame.sndarray")
+
+
+def load(name):
+    """import the game module name (the first time only)"""
+    if name in sys.modules:
+        return sys.modules[name]
+    restore()
+    module = importlib.import_module(name)
+    timeline.mark("import " + name)
+    return module
+
+
+def first_frame():
+    """called by the menu after every pygame.display.flip(), counts only once"""
+    if timeline.first_frame:
+        return
+    timeline.first_frame = True
+    timeline.mark("first frame")
+    if _print_timeline or _exit_after_first_frame:
+        print("\n".join(timeline.lines()), flush=True)
+    if _exit_after_first_frame:
+        import pygame
+        pygame.quit()
+        sys.exit()
+    threading.Thread(target=restore, name="restore", daemon=True).start()
+
+
+def run_menu(eager=False):
+    """menu1 as python3 menu1.py would run it. eager: like menu1 before the
+       launcher, everything imported and initialized at the start"""
+    if eager:
+        import pygame
+        timeline.mark("import pygame")
+        for name in ("ballwars", "textscroller_vertical"):
+            load(name)
+        pygame.mixer.pre_init(*subsystems.MIXER)
+        subsystems.init()
+    else:
+        import_pygame()
+    import menu1  # menu1.py must be in same directory as this file
+    timeline.mark("import menu1")
+    menu1.m = menu1.Menu(menu1.Settings.menu)
+    menu1.PygView().run()
+
+
+def benchmark(runs=5):
+    """time from starting python to the first frame of the menu"""
+    results = {}
+    for eager in (False, True):
+        times = []
+        for run in range(runs):
+            command = [sys.executable, __file__, "--first-frame"] + (["--eager"] if eager else [])
+            start = time.perf_counter()
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+            lines = []
+            for line in process.stdout:
+                lines.append(line.rstrip())
+                if line.rstrip().endswith("| first frame"):
+                    times.append((time.perf_counter() - start) * 1000)
+            process.wait()
+        results[eager] = (times, lines)
+    for eager in (False, True):
+        times, lines = results[eager]
+        print("{}: first frame of the menu after best {:.1f} ms, mean {:.1f} ms (python start included)".format(
+              "eager (like menu1.py)" if eager else "lazy launcher", min(times), sum(times) / len(times)))
+        for line in lines:
+            if line.startswith("startup:"):
+                print("    " + line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="start menu1 with lazy imports and only the needed pygame subsystems")
+    parser.add_argument("--timeline", action="store_true", help="print the timeline after the first frame")
+    parser.add_argument("--benchmark", action="store_true", help="time to the first frame: lazy / eager")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--first-frame", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--eager", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sys.modules["launcher"] = sys.modules["__main__"]  # the same timeline for import launcher
+    timeline.mark("import launcher, arguments")
+    if args.benchmark:
+        benchmark(args.runs)
+        sys.exit()
+    _print_timeline = args.timeline
+    _exit_after_first_frame = args.first_frame
+    if args.first_frame:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    run_menu(args.eager)
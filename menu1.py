@@ -5,9 +5,11 @@ menu system for pygame
 
 
 import pygame 
+import fonts
+import launcher  # launcher.py must be in same directory as this file
+import subsystems  # subsystems.py must be in same directory as this file
 #import template004_sprites_collision_detection
-import ballwars
-import textscroller_vertical
+# ballwars and textscroller_vertical are imported when needed: launcher.load
 import random
 import sys
 import os.path
@@ -94,6 +96,10 @@ class Menu(object):
         
             
 
+# the pygame subsystems of the menu, see subsystems.init
+SUBSYSTEMS = ("display", "font")
+
+
 class PygView(object):
     width = 640
     height = 400
@@ -102,9 +108,8 @@ class PygView(object):
            default arguments 
         """
         
-        pygame.mixer.pre_init(44100, -16, 2, 2048) 
-
-        pygame.init()
+        # no sound in the menu: no pygame.mixer.pre_init, no pygame.init()
+        subsystems.init(*SUBSYSTEMS)
         
         #self.cash = pygame.mixer.Sound(os.path.join("data","cash.wav"))
         #jump = pygame.mixer.Sound(os.path.join('data','jump.wav'))  #load sound
@@ -118,7 +123,7 @@ class PygView(object):
         self.clock = pygame.time.Clock()
         self.fps = fps
         self.playtime = 0.0
-        self.font = pygame.font.SysFont('mono', 24, bold=True)
+        self.font = fonts.get_font('mono', 24, bold=True)
 
     def set_resolution(self):
         self.screen = pygame.display.set_mode((self.width, self.height), pygame.DOUBLEBUF)
@@ -180,6 +185,7 @@ class PygView(object):
                         # important: no elif here, instead if, because every menupoint could contain an 'x'        
                         elif result=="Play":
                             print("activating external program")
+                            ballwars = launcher.load("ballwars")
                             ballwars.PygView(PygView.width, PygView.height,bouncefactor = Settings.bounce, maxgoal=Settings.maxgoal,playermass = Settings.mass, playerspeed = Settings.speed, ai = Settings.ai, difficulty = Settings.difficulty).run()
                             print("bye") 
                             self.__init__()
@@ -242,13 +248,13 @@ class PygView(object):
                             Settings.maxgoal = 9999
                         elif result == "how to play":
                             text="play this game\n as you like\n and win!"
-                            textscroller_vertical.PygView(text, self.width, self.height).run()
+                            launcher.load("textscroller_vertical").PygView(text, self.width, self.height).run()
                         elif result == "nix":
                             text="nix\n gar nix\n wirklich nix!"
-                            textscroller_vertical.PygView(text, self.width, self.height).run()
+                            launcher.load("textscroller_vertical").PygView(text, self.width, self.height).run()
                         elif result == "how to win":
                             text="to win the game:\n shoot down enemies\n avoid catching bullets"
-                            textscroller_vertical.PygView(text, self.width, self.height, bg_filename=os.path.join("data", "800px-La_naissance_de_Venus.jpg")).run()
+                            launcher.load("textscroller_vertical").PygView(text, self.width, self.height, bg_filename=os.path.join("data", "800px-La_naissance_de_Venus.jpg")).run()
                         elif result == "False":
                             Settings.menu["Credits"][2] = "True" # toggle
                         elif result == "True":
@@ -266,6 +272,7 @@ class PygView(object):
             pygame.draw.line(self.screen,(random.randint(0,255),random.randint(0,255), random.randint(0,255)),(50,self.height - 80),(self.width -50,self.height - 80) ,3)             
             self.paint()
             pygame.display.flip()
+            launcher.first_frame()
             self.screen.blit(self.background, (0, 0))
             
         pygame.quit()
@@ -277,8 +284,7 @@ class PygView(object):
         
         """Center text in window
         """
-        fw, fh = self.font.size(text)
-        surface = self.font.render(text, True, color)
+        surface = fonts.texts.render(text, color, 24, 'mono', True)
         self.screen.blit(surface, (x,y))
 
     
@@ -0,0 +1,207 @@
+"""
+particle system for smoke, explosions, fragments and wrecks
+idea: a particle is not a sprite. all particles live in a few numpy arrays
+      (position, movement, gravity, age, color, radius), are moved in one
+      vectorized step per frame and painted in one pass directly into the
+      pixels of the screen. no Surface, no Sprite, no VectorSprite.numbers entry.
+      this allows tens of thousands of living particles.
+usage:
+    self.particles = particles.ParticleSystem()        # in PygView.paint()
+    self.particles.emit(x, y, dx, dy, max_age=2, color=(255,0,0))
+    self.particles.burst(x, y, count=200, speed=150, max_age=2)
+    self.particles.update(seconds)                     # in PygView.run()
+    self.particles.draw(self.screen)                   # after allgroup.draw
+needs numpy (pip install numpy)
+"""
+import random
+import numpy as np
+import pygame
+
+SPLAT_LIMIT = 8  # particles with a bigger radius are painted with pygame.draw.circle
+
+_disks = {}  # { radius: (offsets_x, offsets_y) }
+
+
+def disk_offsets(radius):
+    """pixel offsets of a filled circle, cached per radius"""
+    if radius not in _disks:
+        r = np.arange(-radius, radius + 1)
+        ox, oy = np.meshgrid(r, r, indexing="ij")
+        inside = ox * ox + oy * oy <= radius * radius
+        _disks[radius] = (ox[inside], oy[inside])
+    return _disks[radius]
+
+
+class ParticleSystem(object):
+    """all particles of a game, stored as structure of arrays.
+       only the first self.count entries of each array are alive.
+       upward_y=True for games where pos.y grows upward and the
+       sprite is painted at (pos.x, -pos.y) like feuerwerk.py"""
+
+    fields = ("pos", "move", "gravity", "age", "max_age",
+              "color", "color2", "radius", "grow")
+
+    def __init__(self, capacity=4096, upward_y=False, seed=None):
+        self.count = 0
+        self.capacity = 0
+        self.upward_y = upward_y
+        if seed is None:
+            seed = random.getrandbits(32)  # random.seed(...) makes the particles repeatable too
+        self.rng = np.random.default_rng(seed)
+        self.pos = np.zeros((0, 2), np.float32)
+        self.move = np.zeros((0, 2), np.float32)
+        self.gravity = np.zeros((0, 2), np.float32)
+        self.age = np.zeros(0, np.float32)
+        self.max_age = np.zeros(0, np.float32)
+        self.color = np.zeros((0, 3), np.float32)   # color at age 0
+        self.color2 = np.zeros((0, 3), np.float32)  # color at max_age
+        self.radius = np.zeros(0, np.float32)
+        self.grow = np.zeros(0, np.float32)         # radius change per second
+        self._reserve(capacity)
+
+    def __len__(self):
+        return self.count
+
+    def _reserve(self, capacity):
+        """make the arrays big enough for capacity particles (doubling)"""
+        if capacity <= self.capacity:
+            return
+        newcapacity = max(capacity, self.capacity * 2)
+        for name in self.fields:
+            old = getattr(self, name)
+            new = np.zeros((newcapacity,) + old.shape[1:], old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        self.capacity = newcapacity
+
+    def clear(self):
+        self.count = 0
+
+    def emit(self, x, y, dx=0, dy=0, max_age=1.0, color=(255, 255, 255),
+             color2=None, radius=2, grow=0, gravity=(0, 0)):
+        """add particles. every argument can be a single value or a numpy array
+           with one value per new particle (color: shape (3,) or (n,3)).
+           if color2 is given, the color fades from color to color2 over max_age"""
+        x, y, dx, dy, max_age, radius, grow = np.broadcast_arrays(
+            x, y, dx, dy, max_age, radius, grow)
+        n = x.size
+        if n == 0:
+            return
+        if color2 is None:
+            color2 = color
+        start = self.count
+        end = start + n
+        self._reserve(end)
+        self.pos[start:end, 0] = x.ravel()
+        self.pos[start:end, 1] = y.ravel()
+        self.move[start:end, 0] = dx.ravel()
+        self.move[start:end, 1] = dy.ravel()
+        self.gravity[start:end] = gravity
+        self.age[start:end] = 0
+        self.max_age[start:end] = max_age.ravel()
+        self.color[start:end] = color
+        self.color2[start:end] = color2
+        self.radius[start:end] = radius.ravel()
+        self.grow[start:end] = grow.ravel()
+        self.count = end
+
+    def burst(self, x, y, count=100, speed=100, max_age=1.0, color=(255, 255, 255),
+              color2=None, radius=2, grow=0, gravity=(0, 0), spread=0.5):
+        """count particles flying away from x,y in random directions.
+           speed varies between speed*(1-spread) and speed, max_age between
+           max_age*(1-spread) and max_age"""
+        angles = self.rng.uniform(0, 2 * np.pi, count)
+        speeds = speed * self.rng.uniform(1 - spread, 1, count)
+        ages = max_age * self.rng.uniform(1 - spread, 1, count)
+        self.emit(x, y, np.cos(angles) * speeds, np.sin(angles) * speeds,
+                  max_age=ages, color=color, color2=color2, radius=radius,
+                  grow=grow, gravity=gravity)
+
+    def update(self, seconds):
+        """move all particles and remove the ones older than max_age"""
+        n = self.count
+        if n == 0:
+            return
+        move = self.move[:n]
+        move += self.gravity[:n] * seconds
+        self.pos[:n] += move * seconds
+        self.age[:n] += seconds
+        self.radius[:n] += self.grow[:n] * seconds
+        alive = self.age[:n] < self.max_age[:n]
+        alive &= self.radius[:n] >= 0
+        living = int(np.count_nonzero(alive))
+        if living < n:
+            # compact: move all living particles to the front of the arrays
+            for name in self.fields:
+                array = getattr(self, name)
+                array[:living] = array[:n][alive]
+            self.count = living
+
+    def colors(self):
+        """current color of every living particle as (n,3) uint8 array"""
+        n = self.count
+        t = np.minimum(self.age[:n] / np.maximum(self.max_age[:n], 1e-6), 1.0)
+        c = self.color[:n] + (self.color2[:n] - self.color[:n]) * t[:, None]
+        return np.clip(c, 0, 255).astype(np.uint8)
+
+    def mapped_colors(self, surface):
+        """current colors as pixel values of a 32 bit surface"""
+        c = self.colors().astype(np.uint32)
+        rshift, gshift, bshift, ashift = surface.get_shifts()
+        rloss, gloss, bloss, aloss = surface.get_losses()
+        amask = surface.get_masks()[3]
+        return (((c[:, 0] >> rloss) << rshift) | ((c[:, 1] >> gloss) << gshift) |
+                ((c[:, 2] >> bloss) << bshift) | np.uint32(amask))
+
+    def draw(self, surface):
+        """paint all particles in one pass into the pixels of surface.
+           returns the bounding rect of all painted particles (or None)"""
+        n = self.count
+        if n == 0:
+            return None
+        xs = np.rint(self.pos[:n, 0]).astype(np.int32)
+        if self.upward_y:
+            ys = np.rint(-self.pos[:n, 1]).astype(np.int32)
+        else:
+            ys = np.rint(self.pos[:n, 1]).astype(np.int32)
+        rs = np.rint(self.radius[:n]).astype(np.int32)
+        w, h = surface.get_size()
+        if surface.get_bitsize() == 32:
+            small = rs <= SPLAT_LIMIT
+        else:
+            small = np.zeros(n, bool)
+        if small.any():
+            cs = self.mapped_colors(surface)
+            pixels = pygame.surfarray.pixels2d(surface)  # locks the surface
+            flat = None
+            if surface.get_pitch() == w * 4:
+                flat = pixels.T.reshape(-1)  # one row after the other, no copy
+            for radius in np.unique(rs[small]):
+                select = small & (rs == radius)
+                x, y, c = xs[select], ys[select], cs[select]
+                # particles completely inside the screen need no clipping
+                inside = (x >= radius) & (x < w - radius) & (y >= radius) & (y < h - radius)
+                xi, yi, ci = x[inside], y[inside], c[inside]
+                base = yi * w + xi
+                border = ~inside
+                xb, yb, cb = x[border], y[border], c[border]
+                for ox, oy in zip(*disk_offsets(int(radius))):
+                    if flat is not None:
+                        flat[base + (oy * w + ox)] = ci
+                    else:
+                        pixels[xi + ox, yi + oy] = ci
+                    if xb.size:
+                        px = xb + ox
+                        py = yb + oy
+                        ok = (px >= 0) & (px < w) & (py >= 0) & (py < h)
+                        pixels[px[ok], py[ok]] = cb[ok]
+            del flat, pixels  # unlock the surface
+        big = np.flatnonzero(~small)
+        if big.size:
+            cs = self.colors()
+            for i in big:
+                pygame.draw.circle(surface, cs[i], (int(xs[i]), int(ys[i])), int(rs[i]))
+        r = int(rs.max()) + 1
+        left, top = int(xs.min()) - r, int(ys.min()) - r
+        return pygame.Rect(left, top, int(xs.max()) + r - left + 1,
+                           int(ys.max()) + r - top + 1).clip(surface.get_rect())
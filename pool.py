@@ -0,0 +1,85 @@
+"""
+object pool for short living sprites (shots, bullets, fragments)
+idea: a shot lives 4 seconds, but creating it costs a lot: VectorSprite.__init__
+      checks all keywords, paints a new Surface, converts and copies it.
+      when a pooled sprite is killed it goes back into the pool. the next
+      shot with the same look (radius, color) takes it out again, only resets
+      its attributes and joins its groups again. image, image0, rect and mask
+      are reused.
+usage:
+    self.shots = pool.SpritePool(Ball)                 # in PygView.paint()
+    self.shots.get(pos=p, move=m, radius=10, color=(255,0,0), max_age=4)
+    print(self.shots.stats())
+the sprite class needs:
+    reset(**kwargs)  set all attributes like __init__, but without create_image
+    pool             class attribute None, set to the pool by SpritePool
+    kill()           must call self.pool.release(self) if self.pool is not None
+this module must be in the same directory as the game files.
+"""
+
+
+def look(kwargs):
+    """key for sprites that look the same. None: do not reuse (random color)"""
+    if "color" not in kwargs:
+        return None
+    return (kwargs.get("radius"), tuple(kwargs["color"]), kwargs.get("width"),
+            kwargs.get("height"), kwargs.get("picture"))
+
+
+class SpritePool(object):
+    """free sprites of one class, sorted by their look"""
+
+    def __init__(self, cls, key=look):
+        self.cls = cls
+        self.key = key
+        self.free = {}          # { key: [sprite, sprite, ...] }
+        self.requests = 0       # calls of get()
+        self.reuses = 0         # sprites taken from the pool
+        self.allocations = 0    # sprites created with cls(**kwargs)
+        self.releases = 0       # sprites given back by kill()
+
+    def __len__(self):
+        """number of free sprites waiting in the pool"""
+        return sum(len(sprites) for sprites in self.free.values())
+
+    def get(self, **kwargs):
+        """a living sprite, reused from the pool or new"""
+        self.requests += 1
+        key = self.key(kwargs)
+        sprites = self.free.get(key)
+        if sprites:
+            sprite = sprites.pop()
+            sprite.pooled = False
+            sprite.add(sprite.groups)   # back into allgroup, ballgroup, ...
+            sprite.reset(**kwargs)
+            sprite.rect.center = (-300, -300)  # avoid blinking image in topleft corner
+            self.reuses += 1
+            return sprite
+        sprite = self.cls(**kwargs)
+        self.allocations += 1
+        if key is not None:
+            sprite.pool = self
+            sprite.poolkey = key
+            sprite.pooled = False
+        return sprite
+
+    def release(self, sprite):
+        """called by sprite.kill(), a sprite is only put into the pool once"""
+        if sprite.pooled:
+            return
+        sprite.pooled = True
+        self.releases += 1
+        self.free.setdefault(sprite.poolkey, []).append(sprite)
+
+    def clear(self):
+        self.free.clear()
+
+    def hitrate(self):
+        if self.requests == 0:
+            return 0.0
+        return self.reuses / self.requests
+
+    def stats(self):
+        return "pool {}: {} free, {} requests, hit rate {:.1%}, allocations: {}, releases: {}".format(
+               self.cls.__name__, len(self), self.requests, self.hitrate(),
+               self.allocations, self.releases)
@@ -0,0 +1,333 @@
+"""
+frame profiler with an overlay, for every PygView
+idea: the only number shown by the games is the FPS, it does not tell where
+      the time of a frame goes. the profiler wraps the pygame and game
+      functions called from PygView.run (like headless.py does) and adds
+      the time spent inside to a phase:
+          events   pygame.event.get
+          input    pygame.key.get_pressed, pygame.mouse.get_pos / get_pressed
+          ai       VectorSprite.ai, PygView.control (ballwars)
+          update   Group.update (without the ai inside)
+          collide  spritecollide, spritecollideany, groupcollide, broadphase,
+                   elastic_collision, ccd.Sweep.run
+          clear    dirtyrects.DirtyRenderer.clear
+          draw     Group.draw, write()
+          flip     pygame.display.flip / update
+          other    the rest of the frame: background blit, game code, ...
+      (Surface.blit can not be wrapped, the background blit of games without
+      dirty rects is part of "other".)
+      the times are exclusive: ai inside update counts only for ai.
+      one row per frame goes into a ring buffer (the last `frames` frames).
+      the overlay shows p50 / p95 / p99 of the frame time (without the wait
+      in clock.tick), the phases, the number of sprites per class and the
+      surfaces created per second by pygame.transform.* and pygame.image.load
+      (pygame.Surface is a type, it is not replaced: Surface() is not
+      counted). it is painted again only twice per second and blitted in
+      pygame.display.flip, so it costs nearly nothing.
+      the profiler is off unless it is asked for (PROFILER=1 or profile=True),
+      measuring costs two perf_counter calls per wrapped call.
+      only one profiler is installed at a time: install() for a new view
+      uninstalls the one before, and PygView.run uninstalls it at its end,
+      so every wrapped function is pygame's own again (menu1, batch.py, ...).
+      the overlay is toggled with F3, F4 writes the ring buffer to a csv file.
+usage:
+    PROFILER=1 python3 ballwars.py
+    # at the end of PygView.__init__ (after self.clock is made), None if off:
+    self.profiler = profiler.install(self, profile)  # profile: True, False, None = $PROFILER
+    # at the end of PygView.run:
+    profiler.uninstall()
+    # or from python, at any time:
+    self.profiler.toggle()
+    self.profiler.dump("profile.csv")
+this module must be in the same directory as the game files.
+"""
+import collections
+import csv
+import os
+import sys
+import time
+import pygame
+import fonts  # fonts.py must be in same directory as this file
+
+ENVIRONMENT = "PROFILER"   # PROFILER=1 turns the profiler on
+PHASES = ("events", "input", "ai", "update", "collide", "clear", "draw", "flip", "other")
+
+
+class ProfiledClock(object):
+    """wraps the clock of the view, clock.tick ends a frame"""
+
+    def __init__(self, profiler, clock):
+        self._profiler = profiler
+        self._clock = clock
+
+    def tick(self, framerate=0):
+        self._profiler.end_frame()
+        milliseconds = self._clock.tick(framerate)
+        self._profiler.start_frame()
+        return milliseconds
+
+    def tick_busy_loop(self, framerate=0):
+        self._profiler.end_frame()
+        milliseconds = self._clock.tick_busy_loop(framerate)
+        self._profiler.start_frame()
+        return milliseconds
+
+    def __getattr__(self, name):
+        return getattr(self._clock, name)
+
+
+class Profiler(object):
+    """phase timings of the frames of one view, in a ring buffer"""
+
+    def __init__(self, view, frames=600, key=pygame.K_F3, dump_key=pygame.K_F4):
+        self.view = view
+        self.key = key
+        self.dump_key = dump_key
+        self.visible = False
+        self.rows = collections.deque(maxlen=frames)  # (frame, milliseconds, *phases, sprites, surfaces)
+        self.frame = 0
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.surfaces = 0                             # created in this frame
+        self._phase = None                            # running phase
+        self._stack = []
+        self._since = 0.0
+        self._frame_start = None
+        self._patched = []
+        self._overlay = None
+        self._overlay_time = 0.0
+
+    # ---- patching ----
+    def replace(self, owner, name, new):
+        self._patched.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, new)
+
+    def timed(self, owner, name, phase):
+        """wrap owner.name, the time spent inside is added to phase"""
+        original = getattr(owner, name)
+        enter = self.enter
+        leave = self.leave
+
+        def wrapper(*args, **kwargs):
+            enter(phase)
+            try:
+                return original(*args, **kwargs)
+            finally:
+                leave()
+        self.replace(owner, name, wrapper)
+
+    def counted(self, owner, name):
+        """wrap owner.name, every call makes one surface"""
+        original = getattr(owner, name)
+
+        def wrapper(*args, **kwargs):
+            self.surfaces += 1
+            return original(*args, **kwargs)
+        self.replace(owner, name, wrapper)
+
+    def install(self):
+        view = self.view
+        module = sys.modules[type(view).__module__]
+        for name in ("scale", "smoothscale", "rotate", "rotozoom", "flip"):
+            self.counted(pygame.transform, name)
+        self.counted(pygame.image, "load")
+        # ---- phases ----
+        self.timed(pygame.event, "get", "events")
+        self.replace(pygame.event, "get", self.events(pygame.event.get))
+        for name in ("get_pressed", ):
+            self.timed(pygame.key, name, "input")
+        for name in ("get_pos", "get_pressed"):
+            self.timed(pygame.mouse, name, "input")
+        if hasattr(module, "VectorSprite") and hasattr(module.VectorSprite, "ai"):
+            self.timed(module.VectorSprite, "ai", "ai")
+        if hasattr(type(view), "control"):
+            self.timed(type(view), "control", "ai")
+        self.timed(pygame.sprite.AbstractGroup, "update", "update")
+        for name in ("spritecollide", "spritecollideany", "groupcollide"):
+            self.timed(pygame.sprite, name, "collide")
+        if hasattr(module, "broadphase"):
+            for name in ("collide_pairs", "collide_groups"):
+                self.timed(module.broadphase, name, "collide")
+            self.timed(module.broadphase.GroupCollider, "collide_groups", "collide")
+        if hasattr(module, "ccd"):
+            self.timed(module.ccd.Sweep, "run", "collide")
+        if hasattr(module, "elastic_collision"):
+            self.timed(module, "elastic_collision", "collide")
+        if hasattr(module, "dirtyrects"):
+            self.timed(module.dirtyrects.DirtyRenderer, "clear", "clear")
+        self.timed(pygame.sprite.AbstractGroup, "draw", "draw")
+        self.timed(pygame.sprite.LayeredUpdates, "draw", "draw")
+        if hasattr(module, "write"):
+            self.timed(module, "write", "draw")
+        flip = pygame.display.flip
+        update = pygame.display.update
+        self.replace(pygame.display, "flip", lambda: self.flip(flip, None))
+        self.replace(pygame.display, "update", lambda rects=None: self.flip(update, rects))
+        view.clock = ProfiledClock(self, view.clock)
+        self.start_frame()
+        return self
+
+    def uninstall(self):
+        while self._patched:
+            owner, name, original = self._patched.pop()
+            setattr(owner, name, original)
+        if isinstance(self.view.clock, ProfiledClock):
+            self.view.clock = self.view.clock._clock
+        global _active
+        if _active is self:
+            _active = None
+
+    # ---- measuring ----
+    def enter(self, phase):
+        now = time.perf_counter()
+        if self._phase is not None:
+            self.times[self._phase] += now - self._since
+        self._stack.append(self._phase)
+        self._phase = phase
+        self._since = now
+
+    def leave(self):
+        now = time.perf_counter()
+        self.times[self._phase] += now - self._since
+        self._phase = self._stack.pop()
+        self._since = now
+
+    def start_frame(self):
+        self._frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if self._frame_start is None:
+            return
+        seconds = time.perf_counter() - self._frame_start
+        times = self.times
+        times["other"] = max(0.0, seconds - sum(times[phase] for phase in PHASES[:-1]))
+        self.frame += 1
+        self.rows.append((self.frame, seconds * 1000) +
+                         tuple(times[phase] * 1000 for phase in PHASES) +
+                         (len(getattr(self.view, "allgroup", ())), self.surfaces))
+        for phase in PHASES:
+            times[phase] = 0.0
+        self.surfaces = 0
+
+    def events(self, get):
+        """event.get, F3 and F4 are handled here for every game"""
+        def wrapper(*args, **kwargs):
+            events = get(*args, **kwargs)
+            for event in events:
+                if event.type == pygame.KEYDOWN:
+                    if event.key == self.key:
+                        self.toggle()
+                    elif event.key == self.dump_key:
+                        self.dump()
+            return events
+        return wrapper
+
+    # ---- overlay ----
+    def toggle(self):
+        self.visible = not self.visible
+        self._overlay = None
+
+    def percentiles(self, column=1):
+        """p50, p95, p99 of a column of the ring buffer (1 = frame time)"""
+        values = sorted(row[column] for row in self.rows)
+        if not values:
+            return 0.0, 0.0, 0.0
+        last = len(values) - 1
+        return tuple(values[int(last * p)] for p in (0.50, 0.95, 0.99))
+
+    def census(self):
+        """{ class name: number of sprites } of view.allgroup"""
+        return collections.Counter(type(sprite).__name__
+                                   for sprite in getattr(self.view, "allgroup", ()))
+
+    def lines(self):
+        rows = list(self.rows)[-60:]        # the phases: average of the last 60 frames
+        n = max(len(rows), 1)
+        p50, p95, p99 = self.percentiles()
+        seconds = sum(row[1] for row in rows) / 1000.0
+        lines = ["frame ms  p50 {:5.2f}  p95 {:5.2f}  p99 {:5.2f}".format(p50, p95, p99)]
+        for number, phase in enumerate(PHASES):
+            lines.append("{:8} {:6.2f} ms".format(phase, sum(row[2 + number] for row in rows) / n))
+        surfaces = sum(row[-1] for row in rows)
+        lines.append("surfaces/s {:7.0f}".format(surfaces / seconds if seconds else 0))
+        for name, count in self.census().most_common(8):
+            lines.append("{:14} {:4}".format(name[:14], count))
+        return lines
+
+    def paint(self):
+        size = 14
+        font = fonts.get_font("mono", size)
+        lines = self.lines()
+        height = font.get_linesize()
+        width = max(font.size(line)[0] for line in lines) + 8
+        overlay = pygame.Surface((width, height * len(lines) + 8), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 170))
+        for number, line in enumerate(lines):
+            overlay.blit(fonts.render(line, (255, 255, 255), size), (4, 4 + number * height))
+        return overlay
+
+    def flip(self, function, rects):
+        """draw the overlay into the top right corner, then flip / update"""
+        if self.visible:
+            now = time.perf_counter()
+            if self._overlay is None or now - self._overlay_time > 0.5:
+                self._overlay = self.paint()
+                self._overlay_time = now
+            screen = pygame.display.get_surface()
+            rect = self._overlay.get_rect(topright=(screen.get_width(), 0))
+            screen.blit(self._overlay, rect)
+            renderer = getattr(self.view, "renderer", None)
+            if renderer is not None:
+                renderer.mark([rect])       # the background is restored there next frame
+            if rects is not None:
+                rects = list(rects) + [rect]
+        self.enter("flip")
+        try:
+            if rects is None:
+                return function()
+            return function(rects)
+        finally:
+            self.leave()
+
+    def dump(self, path=None):
+        """write the ring buffer as csv, returns the file name"""
+        if path is None:
+            path = "profile_{}.csv".format(time.strftime("%Y%m%d_%H%M%S"))
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("frame", "ms") + PHASES + ("sprites", "surfaces"))
+            for row in self.rows:
+                writer.writerow(["{:.3f}".format(value) if isinstance(value, float) else value
+                                 for value in row])
+        return path
+
+
+_active = None   # the installed Profiler
+
+
+def enabled():
+    """True if the environment variable PROFILER is set (and not 0)"""
+    return os.environ.get(ENVIRONMENT, "") not in ("", "0")
+
+
+def install(view, profile=None, **kwargs):
+    """make a Profiler for view and wrap the functions, returns the profiler,
+       or None if profile is False (None: enabled()). a second install for
+       the same view returns its profiler, for another view the old one is
+       uninstalled first: the functions are never wrapped twice"""
+    global _active
+    if profile is None:
+        profile = enabled()
+    if not profile:
+        return None
+    if _active is not None:
+        if _active.view is view:
+            return _active
+        _active.uninstall()
+    _active = Profiler(view, **kwargs).install()
+    return _active
+
+
+def uninstall():
+    """give pygame its own functions back, if a profiler is installed"""
+    if _active is not None:
+        _active.uninstall()
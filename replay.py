@@ -0,0 +1,361 @@
+"""
+record a game session and play it again, without window and as fast as possible
+idea: a game is the same game again when it gets the same random numbers,
+      the same seconds per frame and the same input in the same order.
+      the recorder starts the game with random.seed(seed) and writes down for
+      every frame what clock.tick returned and what pygame.event.get,
+      pygame.key.get_pressed, pygame.mouse.get_pos / get_pressed and the
+      joysticks (get_axis, get_button, ...) returned. a value that is the
+      same as the last one of its kind is written as "repeat" only.
+      the player (a headless.Simulation) gives the game exactly these values
+      back, frame by frame, with the clock never waiting. drawing is
+      optional, and skipped anyway until the --start frame: that is the
+      fast forward / seek.
+      every --checksum frames the recorder stores a checksum of the
+      random state and all sprite positions. the player compares them and
+      reports the first frame where the replay is not the recorded game
+      any more. the checksums are for verification only, there are no
+      checkpoints to seek from: a game can not be restored in the middle of
+      PygView.run (the mainloop keeps its state in local variables, sprites
+      hold surfaces and class attributes), so a seek always simulates from
+      frame 0, but without drawing that is a few hundred frames per second.
+      the checksums tell you that the frame you seek to is the recorded one.
+      sound is played while recording, a sound or music file that is
+      missing (or a missing sound card) is skipped: the game is the same
+      without it.
+the file is zlib compressed marshal data, a few kilobytes per minute.
+usage:
+    python3 replay.py record ballwars session.rec          # play, close the window to stop
+    python3 replay.py play session.rec                     # as fast as possible, no drawing
+    python3 replay.py play session.rec --start 3000 --draw # seek to frame 3000, draw from there
+    python3 replay.py info session.rec
+works for ballwars, airhockey, feuerwerk and tankgame (and the other games
+in headless.GAMES that use only these input functions).
+this module must be in the same directory as the game files.
+"""
+import argparse
+import importlib
+import marshal
+import random
+import time
+import zlib
+import pygame
+import headless   # headless.py must be in same directory as this file
+
+MAGIC = b"PYGREPLAY1\n"
+VERSION = 2                     # 1: "checkpoint" / "checkpoints" instead of "checksum" / "checksums"
+REPEAT = 100                    # channel + REPEAT: same value as last time
+EVENT, PRESSED, MOUSEPOS, MOUSEPRESSED, JOYCOUNT, JOYSTICK = range(6)
+
+
+def digest(view):
+    """checksum of the random state and the position of all sprites"""
+    positions = []
+    for sprite in getattr(view, "allgroup", ()):
+        pos = getattr(sprite, "pos", None)
+        if pos is None:
+            pos = sprite.rect.center
+        positions.append((float(pos[0]), float(pos[1])))
+    checksum = zlib.crc32(marshal.dumps(random.getstate()))
+    return zlib.crc32(marshal.dumps(positions), checksum)
+
+
+def encode_event(event):
+    """pygame event as (type, ((name, value), ...)), only plain values"""
+    attributes = []
+    for name, value in sorted(event.dict.items()):
+        if value is None or isinstance(value, (bool, int, float, str, tuple)):
+            attributes.append((name, value))
+    return (event.type, tuple(attributes))
+
+
+def decode_event(data):
+    return pygame.event.Event(data[0], dict(data[1]))
+
+
+def save(path, log):
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(zlib.compress(marshal.dumps(log), 9))
+
+
+def load(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("{} is no replay file".format(path))
+        log = marshal.loads(zlib.decompress(f.read()))
+    if log["version"] == 1:
+        log["checksum"] = log.pop("checkpoint")
+        log["checksums"] = log.pop("checkpoints")
+    return log
+
+
+# ---- recording ----
+class RecordingJoystick(object):
+    """wraps a pygame.joystick.Joystick, every answer goes into the log"""
+
+    def __init__(self, recorder, joystick):
+        self._recorder = recorder
+        self._joystick = joystick
+
+    def __getattr__(self, name):
+        method = getattr(self._joystick, name)
+
+        def recorded(*args):
+            return self._recorder.write(JOYSTICK, method(*args))
+        return recorded
+
+
+class RecordingClock(object):
+    """wraps a pygame.time.Clock (it can not be subclassed), every tick
+       starts a new frame of the log"""
+
+    def __init__(self, recorder, clock):
+        self._recorder = recorder
+        self._clock = clock
+
+    def tick(self, framerate=0):
+        return self._recorder.tick(self._clock.tick(framerate))
+
+    def tick_busy_loop(self, framerate=0):
+        return self._recorder.tick(self._clock.tick_busy_loop(framerate))
+
+    def __getattr__(self, name):
+        return getattr(self._clock, name)
+
+
+class Recorder(object):
+    """plays a game in its window and writes the log"""
+
+    def __init__(self, game, seed=None, checksum=300):
+        self.game = game
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.checksum = checksum
+        self.view = None
+        self.frames = [[0.0, []]]           # frame 0: everything before the first tick
+        self.checksums = {}                 # { frame: digest }
+        self._last = {}                     # { channel: last value }
+        self._patched = []
+
+    def replace(self, owner, name, new):
+        self._patched.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, new)
+
+    def restore(self):
+        while self._patched:
+            owner, name, original = self._patched.pop()
+            setattr(owner, name, original)
+
+    def write(self, channel, value):
+        """put value into the current frame, returns value"""
+        data = tuple(encode_event(e) for e in value) if channel == EVENT else value
+        if channel == PRESSED:
+            data = tuple(code for code, down in enumerate(value) if down)
+        if channel in self._last and self._last[channel] == data:
+            self.frames[-1][1].append((channel + REPEAT,))
+        else:
+            self._last[channel] = data
+            self.frames[-1][1].append((channel, data))
+        return value
+
+    def recorded(self, channel, function):
+        def wrapper(*args, **kwargs):
+            return self.write(channel, function(*args, **kwargs))
+        return wrapper
+
+    def quiet(self, function, silent=None):
+        """function, but a missing sound file or sound card only prints a
+           message (and returns silent())"""
+        def wrapper(*args, **kwargs):
+            try:
+                return function(*args, **kwargs)
+            except (pygame.error, OSError) as error:
+                print("no sound: {}".format(error))
+                return silent() if silent is not None else None
+        return wrapper
+
+    def patch(self):
+        self.replace(pygame.mixer, "Sound", self.quiet(pygame.mixer.Sound, headless.SilentSound))
+        for name in ("load", "play", "stop", "fadeout"):
+            self.replace(pygame.mixer.music, name, self.quiet(getattr(pygame.mixer.music, name)))
+        Clock = pygame.time.Clock
+        self.replace(pygame.time, "Clock", lambda: RecordingClock(self, Clock()))
+        self.replace(pygame.event, "get", self.recorded(EVENT, pygame.event.get))
+        self.replace(pygame.key, "get_pressed", self.recorded(PRESSED, pygame.key.get_pressed))
+        self.replace(pygame.mouse, "get_pos", self.recorded(MOUSEPOS, pygame.mouse.get_pos))
+        self.replace(pygame.mouse, "get_pressed", self.recorded(MOUSEPRESSED, pygame.mouse.get_pressed))
+        self.replace(pygame.joystick, "get_count", self.recorded(JOYCOUNT, pygame.joystick.get_count))
+        Joystick = pygame.joystick.Joystick
+        self.replace(pygame.joystick, "Joystick", lambda number: RecordingJoystick(self, Joystick(number)))
+        # the intro text of ballwars is skipped by the player too
+        try:
+            import textscroller_vertical
+            self.replace(textscroller_vertical.PygView, "run", lambda self: None)
+        except ImportError:
+            pass
+
+    def tick(self, milliseconds):
+        frame = len(self.frames)
+        if self.checksum and frame % self.checksum == 0:
+            self.checksums[frame] = digest(self.view)
+        self.frames.append([milliseconds, []])
+        return milliseconds
+
+    def run(self, **view_kwargs):
+        random.seed(self.seed)
+        module = importlib.import_module(self.game)
+        self.patch()
+        headless.new_numbers(module, self.replace)
+        try:
+            width, height = headless.GAMES.get(self.game, (1430, 800))
+            view_kwargs.setdefault("width", width)
+            view_kwargs.setdefault("height", height)
+            self.view_kwargs = view_kwargs
+            self.view = module.PygView(**view_kwargs)
+            self.view.run()
+        finally:
+            self.restore()
+        return self.log()
+
+    def log(self):
+        return {"version": VERSION,
+                "game": self.game,
+                "seed": self.seed,
+                "view": self.view_kwargs,
+                "checksum": self.checksum,
+                "checksums": self.checksums,
+                "frames": self.frames}
+
+
+# ---- playing ----
+class ReplayJoystick(object):
+    """answers like a joystick with the values from the log"""
+
+    def __init__(self, player, number):
+        self._player = player
+
+    def __getattr__(self, name):
+        return lambda *args: self._player.read(JOYSTICK)
+
+
+class Player(headless.Simulation):
+    """runs the game of a log headless, with the recorded time and input"""
+
+    def __init__(self, log, draw=False, start=0):
+        headless.Simulation.__init__(self, log["game"], len(log["frames"]), None,
+                                     log["seed"], draw)
+        self.log = log
+        self.start = start                  # no drawing before this frame
+        self.show = draw
+        self.draw = draw and start <= 0
+        self.frame = 0
+        self.entries = iter(log["frames"][0][1])
+        self._last = {}
+        self.desync = None                  # first checksum that did not match
+        self.checked = 0
+
+    def read(self, channel):
+        """next recorded value, it must be of channel"""
+        entry = next(self.entries, None)
+        if entry is None or entry[0] % REPEAT != channel:
+            raise RuntimeError("replay frame {}: the game asks for other input "
+                               "than recorded".format(self.frame))
+        if entry[0] >= REPEAT:
+            return self._last[channel]
+        self._last[channel] = entry[1]
+        return entry[1]
+
+    def patch(self, module):
+        headless.Simulation.patch(self, module)
+        read = self.read
+        self.replace(pygame.key, "get_pressed", self.pressed)
+        self.replace(pygame.mouse, "get_pos", lambda: read(MOUSEPOS))
+        self.replace(pygame.mouse, "get_pressed", lambda *args: read(MOUSEPRESSED))
+        self.replace(pygame.joystick, "get_count", lambda: read(JOYCOUNT))
+        self.replace(pygame.joystick, "Joystick", lambda number: ReplayJoystick(self, number))
+
+    def pressed(self):
+        codes = set(self.read(PRESSED))
+        return pygame.key.ScancodeWrapper(code in codes for code in range(512))
+
+    def tick(self, framerate):
+        if self._start is None:
+            self._start = time.perf_counter()
+        frame = self.frame + 1
+        checksums = self.log["checksums"]
+        if frame in checksums:
+            self.checked += 1
+            if self.desync is None and checksums[frame] != digest(self.view):
+                self.desync = frame
+        self.ticks += 1
+        self.frame = frame
+        self.draw = self.show and frame >= self.start
+        if self.view is not None and hasattr(self.view, "allgroup"):
+            self.peak_sprites = max(self.peak_sprites, len(self.view.allgroup))
+        if frame >= len(self.log["frames"]):
+            self.milliseconds = 0            # the recording ends here
+            self.entries = iter(())
+            return 0
+        self.milliseconds, entries = self.log["frames"][frame]
+        self.entries = iter(entries)
+        return self.milliseconds
+
+    def events(self, *args, **kwargs):
+        if self.frame >= len(self.log["frames"]):
+            return [pygame.event.Event(pygame.QUIT)]
+        return [decode_event(data) for data in self.read(EVENT)]
+
+    def run(self):
+        return headless.Simulation.run(self, **self.log["view"])
+
+    def report(self):
+        result = headless.Simulation.report(self)
+        result["checksums"] = self.checked
+        result["desync"] = self.desync
+        return result
+
+
+def play(path, draw=False, start=0):
+    """replay a recorded session, returns the report of headless.Simulation
+       with "checksums" (number checked) and "desync" (frame or None)"""
+    return Player(load(path), draw, start).run()
+
+
+def print_info(log):
+    frames = log["frames"]
+    seconds = sum(frame[0] for frame in frames) / 1000.0
+    entries = sum(len(frame[1]) for frame in frames)
+    print("{game}: seed {seed}, view {view}".format(**log))
+    print("    {} frames, {:.1f} seconds of play, {} input values, {} checksums".format(
+          len(frames), seconds, entries, len(log["checksums"])))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="record and replay game sessions")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="play a game and record it")
+    record.add_argument("game", choices=sorted(headless.GAMES))
+    record.add_argument("path")
+    record.add_argument("--seed", type=int, default=None, help="seed for random (default: random)")
+    record.add_argument("--checksum", type=int, default=300, help="frames between checksums")
+    replay = commands.add_parser("play", help="replay a recording headless")
+    replay.add_argument("path")
+    replay.add_argument("--draw", action="store_true", help="draw the frames (to the dummy display)")
+    replay.add_argument("--start", type=int, default=0, help="fast forward to this frame before drawing")
+    info = commands.add_parser("info", help="show what is in a recording")
+    info.add_argument("path")
+    args = parser.parse_args()
+    if args.command == "record":
+        recorder = Recorder(args.game, args.seed, args.checksum)
+        log = recorder.run()
+        save(args.path, log)
+        print_info(log)
+    elif args.command == "play":
+        report = play(args.path, args.draw, args.start)
+        headless.print_report(report)
+        if report["desync"] is None:
+            print("    {} checksums ok".format(report["checksums"]))
+        else:
+            print("    DESYNC at frame {}".format(report["desync"]))
+    else:
+        print_info(load(args.path))
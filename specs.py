@@ -0,0 +1,90 @@
+"""
+declarative default values for sprite keywords
+idea: VectorSprite.__init__ turned every keyword into an attribute with setattr
+      and then checked about 30 times 'if "radius" not in kwargs:' to set the
+      default values of missing keywords, some of them twice with different
+      values. now each class declares its defaults in a dict, a subclass only
+      the differences. the dicts of the class and all its base classes are
+      merged only once per class and compiled into one function apply()
+      that sets the keywords and all missing defaults (like dataclasses
+      does for __init__).
+      only defaults that depend on other values (width = radius * 2), are
+      random or must not be shared (vectors) are computed, and only when the
+      keyword is missing.
+      the compiled function is the same straight code as the old if-chain
+      ('if "radius" not in kwargs: sprite.radius = _3'), a loop over the
+      defaults costs about twice as much per sprite. the values are not
+      written into the source: they are cells of the function, only the
+      names (checked to be identifiers) are. the defaults are not merged
+      into sprite.__dict__ (with python 3.11 touching __dict__ makes all
+      later attribute lookups of the sprite slower) and are no class
+      attributes (a lookup in the class costs more than in the instance,
+      every frame). see bench_sprites.py.
+usage:
+    class VectorSprite(pygame.sprite.Sprite):
+        defaults = {"radius": 5,
+                    "move": specs.computed(lambda sprite: pygame.math.Vector2(0,0)),
+                    "width": specs.computed(lambda sprite: sprite.radius * 2),
+                    ...}
+        def _default_parameters(self, **kwargs):
+            specs.spec_of(type(self)).apply(self, kwargs)
+    class Rocket(VectorSprite):
+        defaults = {"speed": 100}   # only the differences to VectorSprite
+never use a mutable value (list, vector) as plain default, all sprites would
+share it. use computed() for those.
+this module must be in the same directory as the game files.
+"""
+import keyword
+
+
+class computed(object):
+    """default value calculated for each sprite: function(sprite), called
+       after all keywords are set, in the order of the defaults dict"""
+
+    def __init__(self, function):
+        self.function = function
+
+
+class Spec(object):
+    """the merged defaults of one class, compiled into apply(sprite, kwargs)"""
+
+    def __init__(self, cls, defaults):
+        self.cls = cls
+        self.defaults = defaults
+        values = []
+        lines = ["    def apply(sprite, kwargs):",
+                 "        for key, arg in kwargs.items():",
+                 "            setattr(sprite, key, arg)"]
+        for number, (name, value) in enumerate(defaults.items()):
+            if not name.isidentifier() or keyword.iskeyword(name):
+                raise ValueError("{}.defaults: {!r} is no attribute name".format(cls.__name__, name))
+            if isinstance(value, computed):
+                values.append(value.function)
+                value = "_{}(sprite)".format(number)
+            else:
+                values.append(value)
+                value = "_{}".format(number)
+            lines.append("        if {!r} not in kwargs:".format(name))
+            lines.append("            sprite.{} = {}".format(name, value))
+        # the values are the arguments of make, apply gets them as cells
+        arguments = ", ".join("_{}".format(number) for number in range(len(values)))
+        source = "\n".join(["def make({}):".format(arguments)] + lines + ["    return apply"])
+        namespace = {}
+        exec(compile(source, "<defaults of {}>".format(cls.__name__), "exec"), namespace)
+        self.apply = namespace["make"](*values)   # apply(sprite, kwargs)
+
+
+_specs = {}   # { class: Spec }
+
+
+def spec_of(cls):
+    """the Spec of cls, made from the defaults dicts of cls and its base
+       classes (subclasses win) when it is needed the first time"""
+    spec = _specs.get(cls)
+    if spec is None:
+        defaults = {}
+        for base in reversed(cls.__mro__):
+            defaults.update(base.__dict__.get("defaults", {}))
+        spec = Spec(cls, defaults)
+        _specs[cls] = spec
+    return spec
@@ -0,0 +1,51 @@
+"""
+start only the pygame subsystems a module needs
+idea: pygame.init() starts every subsystem: display, font, mixer, joystick,
+      ... the menu only needs display and font, ballwars no sound. so a
+      module declares the subsystems it needs in SUBSYSTEMS and starts them
+      with init(*SUBSYSTEMS) instead of pygame.init():
+      - a subsystem that is already running (started by the menu) is left alone
+      - the mixer gets the pre_init values of the games (MIXER) first
+      - a subsystem that can not start (no sound card) is printed and
+        skipped, pygame.init() goes on without it as well
+      the launcher writes every started subsystem into its timeline
+      (on_init), the games do not need the launcher for that.
+      pygame is imported inside init(): importing this module does not
+      import pygame (the launcher imports pygame in its own way).
+usage:
+    SUBSYSTEMS = ("display", "font", "joystick")
+    subsystems.init(*SUBSYSTEMS)     # instead of pygame.init()
+    subsystems.init()                # pygame.init()
+this module must be in the same directory as the game files.
+"""
+
+# pygame.mixer.pre_init of the games
+MIXER = (44100, -16, 2, 2048)
+
+on_init = []   # functions(name), called after a subsystem ("pygame": all) is started
+
+
+def _started(name):
+    for function in on_init:
+        function(name)
+
+
+def init(*names):
+    """pygame.init() for some subsystems only: "display", "font", "mixer",
+       "joystick", ... without arguments: pygame.init()"""
+    import pygame
+    if not names:
+        pygame.init()
+        _started("pygame")
+        return
+    for name in names:
+        module = getattr(pygame, name)
+        if module.get_init():
+            continue
+        if name == "mixer":
+            pygame.mixer.pre_init(*MIXER)
+        try:
+            module.init()
+        except pygame.error as error:   # no sound card: pygame.init() goes on as well
+            print("no pygame.{}: {}".format(name, error))
+        _started(name)
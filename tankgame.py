@@ -7,29 +7,25 @@ author: Horst JENS and students of http://spielend-programmieren.at
 """
 
 import pygame 
+import fonts
+import handles
+import profiler
 import random
+import imagecache
+import broadphase
+import timestep
 
 
 
 def make_text(msg="pygame is cool", fontcolor=(255, 0, 255), fontsize=42, font=None):
-    """returns pygame surface with text. You still need to blit the surface."""
-    myfont = pygame.font.SysFont(font, fontsize)
-    mytext = myfont.render(msg, True, fontcolor)
-    mytext = mytext.convert_alpha()
-    return mytext
+    """returns pygame surface with text. You still need to blit the surface.
+       the surface is shared (fonts.render), do not paint on it"""
+    return fonts.render(msg, fontcolor, fontsize, font)
 
 def write(background, text, x=50, y=150, color=(0,0,0),
           fontsize=None, center=False):
-        """write text on pygame surface. """
-        if fontsize is None:
-            fontsize = 24
-        font = pygame.font.SysFont('mono', fontsize, bold=True)
-        fw, fh = font.size(text)
-        surface = font.render(text, True, color)
-        if center: # center text around x,y
-            background.blit(surface, (x-fw//2, y-fh//2))
-        else:      # topleft corner is x,y
-            background.blit(surface, (x,y))
+        """write text on pygame surface. returns the painted rect"""
+        return fonts.write(background, text, x, y, color, fontsize, center)
 
 
 
@@ -66,14 +62,13 @@ class Flytext(pygame.sprite.Sprite):
 
 
 class FlyingObject(pygame.sprite.Sprite):
-    number = 0
+    numbers = handles.HandleTable() # { number: FlyingObject }, only living objects
     
     def __init__(self, **kwargs):
         self._default_parameters(**kwargs) # named parameters
         self._overwrite_parameters()       # overwrite some parameters
         pygame.sprite.Sprite.__init__(self, self.groups)
-        self.number = FlyingObject.number
-        FlyingObject.number += 1
+        self.number = FlyingObject.numbers.add(self) # unique number, never reused
         self.create_image()
         self.image0 = self.image.copy()
         self.rect = self.image.get_rect()
@@ -82,9 +77,12 @@ class FlyingObject(pygame.sprite.Sprite):
         self.rotate_image(self.angle)
         if self.has_hitpointbar:
             Hitpointbar(mothership=self)
-        
-        
-    
+
+    def kill(self):
+        if self.number in FlyingObject.numbers:
+            del FlyingObject.numbers[self.number] # free the number, old handles become invalid
+        pygame.sprite.Sprite.kill(self)
+
     def _overwrite_parameters(self):
         """ use this method to overwrite attributes before create_image() is called"""
         pass 
@@ -192,20 +190,24 @@ class FlyingObject(pygame.sprite.Sprite):
      
     def rotate_image(self, angle):
         """rotates the original image (image0) for angle degrees"""
-        oldcenter = self.rect.center
-        self.image = pygame.transform.rotate(self.image0, angle)
-        self.rect = self.image.get_rect()
-        self.rect.center = oldcenter
+        if self.start_color is not None and self.end_color is not None:
+            # color cycling paints a new image0 every frame: a cached
+            # rotation of it would never be used again, only push out others
+            self.image = pygame.transform.rotate(self.image0, angle)
+            self.rect = self.image.get_rect(center=self.rect.center)
+            return
+        rotated = imagecache.rotations.entry(self.image0, angle)
+        self.image = rotated.image
+        self.rect = rotated.get_rect(self.rect.center)
     
     
         
         
     def rotate_facing(self, angle):
         """rotates the original image (image0) by angle degrees"""
-        oldcenter = self.rect.center
-        self.image = pygame.transform.rotate(self.image0, angle)
-        self.rect = self.image.get_rect()
-        self.rect.center = oldcenter
+        rotated = imagecache.rotations.entry(self.image0, angle)
+        self.image = rotated.image
+        self.rect = rotated.get_rect(self.rect.center)
     
     
         self.facing += angle
@@ -577,7 +579,7 @@ class PygView():
     gravity = pygame.math.Vector2(0, -90)
     wind = pygame.math.Vector2(0,0)
     
-    def __init__(self, width=640, height=400, fps=30):
+    def __init__(self, width=640, height=400, fps=30, hz=30, profile=None):
         """Initialize pygame, window, background, font,...
            default arguments """
         pygame.init()
@@ -590,9 +592,13 @@ class PygView():
         self.background = pygame.Surface(self.screen.get_size()).convert()  
         self.background.fill((110,110,140)) # fill background white
         self.clock = pygame.time.Clock()
+        self.profiler = profiler.install(self, profile) # PROFILER=1: F3 profiler overlay, F4 save it as csv
         self.fps = fps
+        # physics steps per second, independent of fps. 30 = the old frame
+        # rate: charging a cannon adds 1 hitpoint per update, not per second
+        self.timestep = timestep.FixedStep(hz)
         self.playtime = 0.0
-        self.font = pygame.font.SysFont('mono', 24, bold=True)
+        self.font = fonts.get_font('mono', 24, bold=True)
         self.preparesprites()
         
     def preparesprites(self):
@@ -675,10 +681,66 @@ class PygView():
         ship.kill()
         
     
+    def rocket_hits_ship(self, ship, rocket):
+        ship.hitpoints -= rocket.damage
+        if ship.hitpoints < 1:
+            self.kill_ship_and_hitpointbar(ship)
+        for f in range(10):
+            Fragment(x=rocket.pos.x, y=-rocket.pos.y)
+        rocket.kill()
+    
+    def control(self):
+        """keys and mouse buttons, once per physics step"""
+        #----- pressed keys ----
+        pressed = pygame.key.get_pressed()
+        # ---- player 1 start firing ----
+        if pressed[pygame.K_TAB] and not self.oldpressed[pygame.K_TAB]:
+            print("player 1 start firing")
+        # ---- player 1 stops firing ----
+        if not pressed[pygame.K_TAB] and self.oldpressed[pygame.K_TAB]:
+            print("player 1 stops firing")
+            Rocket(gravity = True, mothership = self.cannon, speed = 5 * self.cannon.hitpoints)
+            self.cannon.hitpoints = 1
+        # ---- player 1 is firing -----
+        if pressed[pygame.K_TAB] and self.oldpressed[pygame.K_TAB]:
+            self.cannon.hitpoints += 1
+        # ---- player 2 start firing ---
+        if pressed[pygame.K_SPACE] and not self.oldpressed[pygame.K_SPACE]:
+            print("player 2 start firing")
+        # ---- player 2 stops firing -----
+        if not pressed[pygame.K_SPACE] and self.oldpressed[pygame.K_SPACE]:
+            print("player 2 stops firing")
+            Rocket(gravity = True, mothership = self.cannon2, speed= 5 * self.cannon2.hitpoints)
+            self.cannon2.hitpoints = 1
+        # ---- player 2 is firing -----
+        if pressed[pygame.K_SPACE] and self.oldpressed[pygame.K_SPACE]:
+            self.cannon2.hitpoints += 1
+
+        self.oldpressed = pressed
+        # ---- mouse events ----
+        left,middle,right = pygame.mouse.get_pressed() # Mouse buttons
+        if left: # left button was pressed?
+            for f in range(random.randint(10,20)):
+                Fragment(x=pygame.mouse.get_pos()[0],
+                         y=pygame.mouse.get_pos()[1])
+        if right: # right mouse button pressed
+            Flytext(pygame.mouse.get_pos()[0], pygame.mouse.get_pos()[1],
+                    "hallo")
+
+    def physics(self, seconds):
+        """collisions and moving the sprites, once per step"""
+        # ---- collision detection -----
+        # ---- spaciship and rockets ----
+        # a ship is not hit by its own rockets
+        broadphase.collide_groups(self.shipgroup, self.rocketgroup, "circle",
+                                  on_hit=self.rocket_hits_ship,
+                                  filter=lambda ship, rocket: rocket.mothership != ship)
+        self.allgroup.update(seconds)
+
     def run(self):
         self.paint() 
         running = True
-        oldpressed = pygame.key.get_pressed()
+        self.oldpressed = pygame.key.get_pressed()
         while running:
             milliseconds = self.clock.tick(self.fps)
             seconds = milliseconds / 1000.0
@@ -719,64 +781,17 @@ class PygView():
                     #if event.key == pygame.K_RETURN:
                     #    Rocket(self.player3)
                     
-            #----- pressed keys ----
-            pressed = pygame.key.get_pressed()
-            # ---- player 1 start firing ----
-            if pressed[pygame.K_TAB] and not oldpressed[pygame.K_TAB]:
-                print("player 1 start firing")
-            # ---- player 1 stops firing ----
-            if not pressed[pygame.K_TAB] and oldpressed[pygame.K_TAB]:
-                print("player 1 stops firing")
-                Rocket(gravity = True, mothership = self.cannon, speed = 5 * self.cannon.hitpoints)
-                self.cannon.hitpoints = 1
-            # ---- player 1 is firing -----
-            if pressed[pygame.K_TAB] and oldpressed[pygame.K_TAB]:
-                self.cannon.hitpoints += 1
-            # ---- player 2 start firing ---
-            if pressed[pygame.K_SPACE] and not oldpressed[pygame.K_SPACE]:
-                print("player 2 start firing")
-            # ---- player 2 stops firing -----
-            if not pressed[pygame.K_SPACE] and oldpressed[pygame.K_SPACE]:
-                print("player 2 stops firing")
-                Rocket(gravity = True, mothership = self.cannon2, speed= 5 * self.cannon2.hitpoints)
-                self.cannon2.hitpoints = 1
-            # ---- player 2 is firing -----
-            if pressed[pygame.K_SPACE] and oldpressed[pygame.K_SPACE]:
-                self.cannon2.hitpoints += 1
-            
-            oldpressed = pressed
-            # ---- mouse events ----
-            left,middle,right = pygame.mouse.get_pressed() # Mouse buttons
-            if left: # left button was pressed?
-                for f in range(random.randint(10,20)):
-                    Fragment(x=pygame.mouse.get_pos()[0],
-                             y=pygame.mouse.get_pos()[1])
-            if right: # right mouse button pressed
-                Flytext(pygame.mouse.get_pos()[0], pygame.mouse.get_pos()[1],
-                        "hallo")
-                
-            
-            # ---- collision detection -----
-            # ---- spaciship and rockets ----
-            for ship in self.shipgroup:
-                crashgroup =   pygame.sprite.spritecollide(ship, self.rocketgroup,
-                               False, pygame.sprite.collide_circle)
-                for rocket in crashgroup:
-                    if rocket.mothership == ship:
-                        continue
-                    ship.hitpoints -= rocket.damage
-                    if ship.hitpoints < 1:
-                        self.kill_ship_and_hitpointbar(ship)
-                    for f in range(10):
-                        Fragment(x=rocket.pos.x, y=-rocket.pos.y)
-                    rocket.kill()
-                    
-            
-            
             pygame.display.flip()
             self.screen.blit(self.background, (0, 0))
-            self.allgroup.update(seconds)
+            # ---- physics in steps of always the same time, see timestep.py ----
+            for step in range(self.timestep.advance(seconds)):
+                timestep.snapshot(self.allgroup) # position before the step, for interpolate
+                self.control()
+                self.physics(self.timestep.dt)
+            # draw the sprites between their last two positions
+            moved = timestep.interpolate(self.allgroup, self.timestep.alpha)
             self.allgroup.draw(self.screen)
+            timestep.restore(moved) # collision detection uses the real rects
             pygame.display.set_caption("player1: x:{:.2f} y:{:.2f} angle:{:.2f} speed:{:.2f}, move: {}, winkel: {:.2f} ".format(
                    self.player1.pos.x, self.player1.pos.y, self.player1.angle, self.player1.speed, self.player1.move, self.player1.move.angle_to(pygame.math.Vector2(1,0))))
             # --- paint tails ----
@@ -785,6 +800,7 @@ class PygView():
             #    for n, pos in enumerate(ship.tail):
             #        pygame.draw.line(self.screen, (255-n,255-n,255-n), (oldpos[0], -oldpos[1]), (pos[0], -pos[1]))
             #        oldpos = pos
+        profiler.uninstall()
         pygame.quit()
         
 if __name__ == '__main__':
@@ -6,6 +6,8 @@ like the linux command "less" or like the intro scene in starwars movies
 
 
 import pygame 
+import fonts
+import subsystems
 #import simpledefense
 import random
 import sys
@@ -16,6 +18,10 @@ import os.path
         
             
 
+# the pygame subsystems of the textscroller, see subsystems.init
+SUBSYSTEMS = ("display", "font")
+
+
 class PygView(object):
 
   
@@ -29,7 +35,7 @@ class PygView(object):
         #pygame.mixer.pre_init(44100, -16, 2, 2048) 
 
         if new_init:
-            pygame.init()
+            subsystems.init(*SUBSYSTEMS)
         
         #jump = pygame.mixer.Sound(os.path.join('data','jump.wav'))  #load sound
         #self.sound1 = pygame.mixer.Sound(os.path.join('data','Pickup_Coin.wav'))
@@ -64,7 +70,8 @@ class PygView(object):
         self.dy = 50
         self.text_height = len(self.lines) * self.dy
         self.bold = font[2]
-        self.font = pygame.font.SysFont(font[0], font[1], self.bold)
+        self.fontname, self.fontsize = font[0], font[1]
+        self.font = fonts.get_font(font[0], font[1], self.bold)
 
     def paint(self):
         """painting on the surface"""
@@ -122,8 +129,8 @@ class PygView(object):
         
         """Center text in window
         """
-        fw, fh = self.font.size(text)
-        surface = self.font.render(text, bold, color)
+        surface = fonts.texts.render(text, color, self.fontsize, self.fontname,
+                                     self.bold, antialias=bold)
         self.screen.blit(surface, (x,y))
 
     
@@ -0,0 +1,104 @@
+"""
+fixed timestep for the physics, independent of the frame rate
+idea: the games moved every sprite with self.pos += self.move * seconds, where
+      seconds is whatever clock.tick returned. one slow frame (loading a
+      sound, the system is busy) gives a big seconds and a fast shot jumps
+      through a goal or a bouncer without touching it.
+      - the frame time is collected in an accumulator and the physics runs in
+        steps of always the same dt (1 / hz). a slow frame gives several
+        steps, a fast frame maybe none.
+      - fast sprites that would jump through others within one step are
+        handled by ccd.Sweep inside the step, not by smaller steps
+      - for drawing, the sprites are placed between their position before
+        and after the last step (alpha = part of a step still in the
+        accumulator), so the movement looks smooth with any frame rate.
+        the rect centers are used, not pos: feuerwerk and tankgame count y
+        upward and draw at (pos.x, -pos.y)
+      - after a very long frame (more than max_frame seconds) the rest of the
+        time is dropped, the game slows down instead of freezing
+      the game plays the same with 30 or 144 frames per second, only the
+      number of steps per frame changes.
+usage:
+    self.timestep = timestep.FixedStep(hz=60)
+    # in the mainloop:
+    seconds = self.clock.tick(self.fps) / 1000
+    for step in range(self.timestep.advance(seconds)):
+        timestep.snapshot(self.allgroup)          # position before the step
+        self.control()                            # keys, ai: once per step
+        self.physics(self.timestep.dt)            # update, collision detection
+    moved = timestep.interpolate(self.allgroup, self.timestep.alpha)
+    self.allgroup.draw(self.screen)
+    timestep.restore(moved)                       # collision detection uses the real rects
+this module must be in the same directory as the game files.
+"""
+
+
+class FixedStep(object):
+    """accumulator for physics steps of 1/hz seconds"""
+
+    def __init__(self, hz=60, max_frame=0.25):
+        self.hz = hz
+        self.dt = 1.0 / hz
+        self.max_frame = max_frame          # seconds, a longer frame is cut
+        self.accumulator = 0.0
+        # ---- counters ----
+        self.frames = 0
+        self.steps = 0
+        self.dropped = 0.0                  # seconds cut by max_frame
+
+    def advance(self, seconds):
+        """add the time of one frame, returns the number of steps to do now"""
+        self.frames += 1
+        if seconds > self.max_frame:
+            self.dropped += seconds - self.max_frame
+            seconds = self.max_frame
+        self.accumulator += seconds
+        # 1e-9: clock.tick(60) / 1000 * 60 is not always exactly 1.0
+        steps = int(self.accumulator / self.dt + 1e-9)
+        self.accumulator = max(0.0, self.accumulator - steps * self.dt)
+        self.steps += steps
+        return steps
+
+    @property
+    def alpha(self):
+        """how far the time is between the last step and the next one, 0...1"""
+        return min(1.0, self.accumulator / self.dt)
+
+    def stats(self):
+        if self.frames == 0:
+            return "no frames"
+        return "{} Hz: {:.2f} steps per frame, {:.2f} s dropped".format(
+               self.hz, self.steps / self.frames, self.dropped)
+
+
+def snapshot(sprites):
+    """remember the position of all moving sprites before a step"""
+    for sprite in sprites:
+        if getattr(sprite, "pos", None) is not None:
+            sprite.oldcenter = sprite.rect.center
+
+
+def interpolate(sprites, alpha, max_jump=100):
+    """place the rect of every sprite between its center before and after
+       the last step, for drawing. sprites moving more than max_jump pixel
+       in one step were reset (a goal), they are drawn where they are.
+       returns [(sprite, center), ...] for restore()"""
+    moved = []
+    for sprite in sprites:
+        oldcenter = getattr(sprite, "oldcenter", None)
+        if oldcenter is None:
+            continue
+        center = sprite.rect.center
+        dx = center[0] - oldcenter[0]
+        dy = center[1] - oldcenter[1]
+        if (dx == 0 and dy == 0) or abs(dx) > max_jump or abs(dy) > max_jump:
+            continue
+        moved.append((sprite, center))
+        sprite.rect.center = (round(oldcenter[0] + dx * alpha), round(oldcenter[1] + dy * alpha))
+    return moved
+
+
+def restore(moved):
+    """put the rects back where the physics left them, after drawing"""
+    for sprite, center in moved:
+        sprite.rect.center = center
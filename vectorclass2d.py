@@ -1,5 +1,9 @@
 import math
 import operator
+try:
+    import numpy as np  # only needed for Vec2dArray
+except ImportError:
+    np = None
 
 class Vec2d(object):
     """2d vector class, supports vector and scalar operators,
@@ -327,6 +331,298 @@ class Vec2d(object):
     def __setstate__(self, dict):
         self.x, self.y = dict
 
+class Vec2dView(Vec2d):
+    """one row of a Vec2dArray that behaves like a Vec2d.
+       reading and writing x and y (also +=, rotate, ...) changes the array"""
+    __slots__ = ['array', 'index']
+
+    def __init__(self, array, index):
+        self.array = array
+        self.index = index
+
+    def __getx(self):
+        return float(self.array._buffer[self.index, 0])
+    def __setx(self, value):
+        self.array._buffer[self.index, 0] = value
+    x = property(__getx, __setx)
+
+    def __gety(self):
+        return float(self.array._buffer[self.index, 1])
+    def __sety(self, value):
+        self.array._buffer[self.index, 1] = value
+    y = property(__gety, __sety)
+
+    def __repr__(self):
+        return 'Vec2dView(%s, %s)' % (self.x, self.y)
+
+    def copy(self):
+        """a Vec2d that does not change together with the array"""
+        return Vec2d(self.x, self.y)
+
+    def __getstate__(self):
+        return [self.x, self.y]
+
+    def __setstate__(self, dict):
+        raise TypeError("Vec2dView can not be unpickled, pickle the Vec2dArray")
+
+
+class Vec2dArray(object):
+    """N 2d vectors in one numpy array of shape (N,2).
+       supports the operators of Vec2d for all vectors at once. the other
+       operand can be a Vec2dArray, an (N,2) array, one vector (Vec2d, tuple)
+       for all rows, a scalar, or an (N,) array with one scalar per row.
+       array[i] is a Vec2dView, array[i:j] a Vec2dArray sharing the memory.
+       append() adds a vector and returns its index, so a game can keep the
+       pos of all its sprites in one array:
+           positions = Vec2dArray()
+           self.pos = positions[positions.append((100, 200))]
+           positions += movements * seconds     # all sprites in one step
+       keep the Vec2dArray on the left side: Vec2d + Vec2dArray does not work
+       needs numpy (pip install numpy)"""
+    __slots__ = ['_buffer', 'count']
+
+    def __init__(self, vectors=0, dtype=None):
+        if np is None:
+            raise ImportError("Vec2dArray needs numpy (pip install numpy)")
+        if isinstance(vectors, int):
+            data = np.zeros((vectors, 2), dtype or float)
+        elif isinstance(vectors, Vec2dArray):
+            data = np.array(vectors.data, dtype or vectors.data.dtype)
+        else:
+            data = np.array([tuple(vector) for vector in vectors]
+                            if not isinstance(vectors, np.ndarray) else vectors,
+                            dtype or float)
+            data = data.reshape(-1, 2)
+        self._buffer = data
+        self.count = len(data)
+
+    @classmethod
+    def _wrap(cls, data):
+        """Vec2dArray around data (N,2) without copy"""
+        array = cls.__new__(cls)
+        array._buffer = data
+        array.count = len(data)
+        return array
+
+    # ---- container ----
+    def __len__(self):
+        return self.count
+
+    def _get_data(self):
+        return self._buffer[:self.count]
+    def _set_data(self, value):
+        self._buffer[:self.count] = value
+    data = property(_get_data, _set_data, None, "the (N,2) numpy array of all vectors")
+
+    def _get_xs(self):
+        return self._buffer[:self.count, 0]
+    def _set_xs(self, value):
+        self._buffer[:self.count, 0] = value
+    x = property(_get_xs, _set_xs, None, "x of all vectors, (N,) view")
+
+    def _get_ys(self):
+        return self._buffer[:self.count, 1]
+    def _set_ys(self, value):
+        self._buffer[:self.count, 1] = value
+    y = property(_get_ys, _set_ys, None, "y of all vectors, (N,) view")
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += self.count
+            if not 0 <= key < self.count:
+                raise IndexError("Invalid subscript "+str(key)+" to Vec2dArray")
+            return Vec2dView(self, key)
+        return Vec2dArray._wrap(self.data[key])
+
+    def __setitem__(self, key, value):
+        if isinstance(key, (int, np.integer)) and key >= self.count:
+            raise IndexError("Invalid subscript "+str(key)+" to Vec2dArray")
+        data = self.data[key]
+        self.data[key] = _operand(value, len(data) if data.ndim == 2 else None)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield Vec2dView(self, index)
+
+    def __repr__(self):
+        return 'Vec2dArray(%s)' % (self.data.tolist(),)
+
+    def append(self, vector):
+        """adds one vector, returns its index. grows the buffer by doubling,
+           Vec2dViews stay valid (they only store the index)"""
+        if self.count == len(self._buffer):
+            new = np.zeros((max(8, self.count * 2), 2), self._buffer.dtype)
+            new[:self.count] = self._buffer[:self.count]
+            self._buffer = new
+        self._buffer[self.count] = (vector[0], vector[1])
+        self.count += 1
+        return self.count - 1
+
+    def copy(self):
+        return Vec2dArray._wrap(self.data.copy())
+
+    # ---- operators ----
+    def _o2(self, other, f):
+        return Vec2dArray._wrap(f(self.data, _operand(other, self.count)))
+
+    def _r_o2(self, other, f):
+        return Vec2dArray._wrap(f(_operand(other, self.count), self.data))
+
+    def _io(self, other, f):
+        data = self.data
+        data[...] = f(data, _operand(other, self.count))
+        return self
+
+    def __eq__(self, other):
+        return bool(np.array_equal(self.data, _operand(other, self.count) * np.ones_like(self.data)))
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return self._o2(other, operator.add)
+    __radd__ = __add__
+    def __iadd__(self, other):
+        return self._io(other, operator.add)
+
+    def __sub__(self, other):
+        return self._o2(other, operator.sub)
+    def __rsub__(self, other):
+        return self._r_o2(other, operator.sub)
+    def __isub__(self, other):
+        return self._io(other, operator.sub)
+
+    def __mul__(self, other):
+        return self._o2(other, operator.mul)
+    __rmul__ = __mul__
+    def __imul__(self, other):
+        return self._io(other, operator.mul)
+
+    def __truediv__(self, other):
+        return self._o2(other, operator.truediv)
+    def __rtruediv__(self, other):
+        return self._r_o2(other, operator.truediv)
+    def __itruediv__(self, other):
+        return self._io(other, operator.truediv)
+
+    def __floordiv__(self, other):
+        return self._o2(other, operator.floordiv)
+    def __ifloordiv__(self, other):
+        return self._io(other, operator.floordiv)
+
+    def __neg__(self):
+        return Vec2dArray._wrap(-self.data)
+
+    def __pos__(self):
+        return self.copy()
+
+    def __abs__(self):
+        return Vec2dArray._wrap(np.abs(self.data))
+
+    # ---- vector functions, one result per row ----
+    def get_length_sqrd(self):
+        data = self.data
+        return data[:, 0]**2 + data[:, 1]**2
+
+    def get_length(self):
+        return np.hypot(self.data[:, 0], self.data[:, 1])
+    def __setlength(self, value):
+        length = self.get_length()
+        factor = np.divide(value, length, out=np.zeros_like(length), where=length != 0)
+        self.data *= factor[:, None]
+    length = property(get_length, __setlength, None, "gets or sets the magnitude of all vectors")
+
+    def rotate(self, angle_degrees):
+        """rotates all vectors in place, angle_degrees: one angle or one per row"""
+        data = self.data
+        radians = np.radians(angle_degrees)
+        cos = np.cos(radians)
+        sin = np.sin(radians)
+        x = data[:, 0]*cos - data[:, 1]*sin
+        y = data[:, 0]*sin + data[:, 1]*cos
+        data[:, 0] = x
+        data[:, 1] = y
+
+    def rotated(self, angle_degrees):
+        result = self.copy()
+        result.rotate(angle_degrees)
+        return result
+
+    def get_angle(self):
+        data = self.data
+        return np.degrees(np.arctan2(data[:, 1], data[:, 0]))
+
+    def normalized(self):
+        """like Vec2d.normalized: vectors with length 0 stay (0,0)"""
+        length = self.get_length()
+        safe = np.where(length != 0, length, 1.0)
+        return Vec2dArray._wrap(self.data / safe[:, None])
+
+    def perpendicular(self):
+        data = self.data
+        return Vec2dArray._wrap(np.column_stack((-data[:, 1], data[:, 0])))
+
+    def dot(self, other):
+        other = _operand(other, self.count)
+        data = self.data
+        return data[:, 0]*other[..., 0] + data[:, 1]*other[..., 1]
+
+    def cross(self, other):
+        other = _operand(other, self.count)
+        data = self.data
+        return data[:, 0]*other[..., 1] - data[:, 1]*other[..., 0]
+
+    def get_distance(self, other):
+        diff = self.data - _operand(other, self.count)
+        return np.hypot(diff[:, 0], diff[:, 1])
+
+    def get_dist_sqrd(self, other):
+        diff = self.data - _operand(other, self.count)
+        return diff[:, 0]**2 + diff[:, 1]**2
+
+    def projection(self, other):
+        other = _operand(other, self.count)
+        other_length_sqrd = other[..., 0]*other[..., 0] + other[..., 1]*other[..., 1]
+        factor = self.dot(other) / other_length_sqrd
+        return Vec2dArray._wrap(other * factor[:, None])
+
+    def interpolate_to(self, other, range):
+        return self + (Vec2dArray._wrap(_operand(other, self.count) - self.data)) * range
+
+    def __getstate__(self):
+        return self.data.tolist()
+
+    def __setstate__(self, state):
+        self._buffer = np.array(state, float).reshape(-1, 2)
+        self.count = len(self._buffer)
+
+
+def _operand(other, rows=None):
+    """other operand of a Vec2dArray operation as something numpy can broadcast
+       against (rows,2): a (rows,2) array, one vector, or one scalar per row.
+       a 1-D numpy array of length rows is one scalar per row (also when
+       rows is 2), a tuple or list of two numbers is one vector"""
+    if isinstance(other, Vec2dArray):
+        return other.data
+    if isinstance(other, Vec2d):
+        return np.array((other.x, other.y))
+    if isinstance(other, (tuple, list)) and len(other) == 2 and np.ndim(other[0]) == 0:
+        return np.array(other, float)
+    if hasattr(other, "__getitem__"):
+        other = np.asarray(other, float)
+        if other.ndim == 1:
+            if rows is not None and len(other) == rows:
+                return other[:, None]   # one scalar per row
+            if other.shape != (2,):
+                raise ValueError("1-D operand of length {} for a Vec2dArray of {} vectors, "
+                                 "use (N,1) for one value per row".format(len(other), rows))
+        return other
+    return other
+
+
 if __name__ == "__main__":
     print("this class is useless in itself. import it from another module!")
     gabi = Vec2d(50,100)
@@ -16,6 +16,8 @@ color of the ball's surface was never defined nor filled."""
 
 import random
 import pygame 
+import fonts
+import handles
 
 ################## http://www.pygame.org/wiki/2DVectorClass ##################
 import operator
@@ -349,7 +351,7 @@ class Vec2d(object):
 
 
 class Shape():
-    number = 0
+    numbers = handles.HandleTable() # { number: Shape }
     
     def __init__(self, screen, startpoint, pointlist, zoom=1, angle=0, color=(255,0,0), width=1, borderBounce=True, friction=0.5, move=Vec2d(0,0), cooldowntime=0):
         self.startpoint = startpoint
@@ -363,8 +365,7 @@ class Shape():
         self.width = width
         self.screen = screen
         self.hitpoints = 10000
-        self.number = Shape.number
-        Shape.number += 1
+        self.number = Shape.numbers.add(self)
         self.borderBounce = borderBounce
         #--- friction: 0 means no frictoin, 1 means no gliding
         self.friction = friction #0.1 # 0 or False means no friction
@@ -468,16 +469,12 @@ class Block(VectorSprite):
 
 class Ball():
     
-    group = []
-    number = 0
+    numbers = handles.HandleTable() # { number: Ball }, all living balls
     maxage = 10
     """this is not a native pygame sprite but instead a pygame surface"""
     def __init__(self, screen, startpoint=Vec2d(5,5), move=Vec2d(0,0), radius = 15, color=(0,0,255), bossnumber=0, shape="circle", linewidth=1, linelenght=15, damage=25):
         """create a (black) surface and paint a blue ball on it"""
-        self.number = Ball.number
-        Ball.number += 1
-        #Ball.group[self.number] = self
-        Ball.group.append(self)
+        self.number = Ball.numbers.add(self)
         self.radius = radius
         self.color = color
         self.damage = damage 
@@ -545,7 +542,7 @@ class PygView(object):
         self.clock = pygame.time.Clock()
         self.fps = fps
         self.playtime = 0.0
-        self.font = pygame.font.SysFont('mono', 24, bold=True)
+        self.font = fonts.get_font('mono', 24, bold=True)
 
     def paint(self):
         """painting ships on the surface"""
@@ -765,16 +762,17 @@ class PygView(object):
                 b.draw()
             
             # -----update and draw balls-----
-            for b in Ball.group:
+            for b in Ball.numbers:
                 b.update(seconds)
                 b.draw()
             # ---- delete old balls ----
-            
-            Ball.group = [b for b in Ball.group if b.age < Ball.maxage]
+            for b in list(Ball.numbers):
+                if b.age >= Ball.maxage:
+                    del Ball.numbers[b.number]
             
             # ----- collision detection -----
             critical_distance = 35
-            for b in Ball.group:
+            for b in Ball.numbers:
                 if b.bossnumber != self.pixelhirn.number and self.pixelhirn.hitpoints > 0:
                     if (b.startpoint - self.pixelhirn.startpoint).get_length() < critical_distance:
                         self.pixelhirn.hitpoints -= b.damage
@@ -960,8 +958,7 @@ class PygView(object):
     def draw_text(self, text, x=50, y=150, color=(0,0,0)):
         """Center text in window
         """
-        fw, fh = self.font.size(text)
-        surface = self.font.render(text, True, color)
+        surface = fonts.texts.render(text, color, 24, 'mono', True)
         self.screen.blit(surface, (x,y))
 
 
@@ -9,6 +9,8 @@ collision detection between sprite groups. Also Subclassing and super.
 this example is tested using python 3.4 and pygame
 """
 import pygame 
+import fonts
+import handles
 import math
 import random
 #import menu1
@@ -16,19 +18,12 @@ import random
 import operator
 import math
 import vectorclass2d as v
+import broadphase
 
 def write(background, text, x=50, y=150, color=(0,0,0),
           fontsize=None, center=False):
-        """write text on pygame surface. """
-        if fontsize is None:
-            fontsize = 24
-        font = pygame.font.SysFont('mono', fontsize, bold=True)
-        fw, fh = font.size(text)
-        surface = font.render(text, True, color)
-        if center: # center text around x,y
-            background.blit(surface, (x-fw//2, y-fh//2))
-        else:      # topleft corner is x,y
-            background.blit(surface, (x,y))
+        """write text on pygame surface. returns the painted rect"""
+        return fonts.write(background, text, x, y, color, fontsize, center)
     
 def elastic_collision(sprite1, sprite2):
         """elasitc collision between 2 VectorSprites (calculated as disc's).
@@ -77,8 +72,7 @@ def elastic_collision(sprite1, sprite2):
 
 class VectorSprite(pygame.sprite.Sprite):
     """base class for sprites. this class inherits from pygames sprite class"""
-    number = 0
-    numbers = {} # { number, Sprite }
+    numbers = handles.HandleTable() # { number: Sprite }, only living sprites
     
     def __init__(self, **kwargs):
         """create a (black) surface and paint a blue ball on it"""
@@ -89,9 +83,7 @@ class VectorSprite(pygame.sprite.Sprite):
         
         #self._layer = layer   # pygame Sprite layer
         pygame.sprite.Sprite.__init__(self, self.groups) #call parent class. NEVER FORGET !
-        self.number = VectorSprite.number # unique number for each sprite
-        VectorSprite.number += 1 
-        VectorSprite.numbers[self.number] = self 
+        self.number = VectorSprite.numbers.add(self) # unique number for each sprite, never reused
         # get unlimited named arguments and turn them into attributes
         
         
@@ -623,17 +615,12 @@ class PygView(object):
             #       elastic_collision(ball, bullet) # change dx and dy of both sprites
             #       ball.hitpoints -= bullet.damage
             # --------- collision detection between ball and other balls
-            for ball in self.ballgroup:
-                crashgroup = pygame.sprite.spritecollide(ball, self.ballgroup, False, pygame.sprite.collide_circle)
-                for otherball in crashgroup:
-                    if ball.number > otherball.number:     # make sure no self-collision or calculating collision twice
-                        elastic_collision(ball, otherball) # change dx and dy of both sprites
+            # broadphase returns every pair only once (no self-collision, no double calculation)
+            for ball, otherball in broadphase.collide_pairs(self.ballgroup):
+                elastic_collision(ball, otherball) # change dx and dy of both sprites
             # ---------- collision detection between bullet and other bullets
-            for bullet in self.bulletgroup:
-                crashgroup = pygame.sprite.spritecollide(bullet, self.bulletgroup, False, pygame.sprite.collide_circle)
-                for otherbullet in crashgroup:
-                    if bullet.number > otherbullet.number:
-                         elastic_collision(bullet, otherball) # change dx and dy of both sprites
+            for bullet, otherbullet in broadphase.collide_pairs(self.bulletgroup):
+                elastic_collision(bullet, otherbullet) # change dx and dy of both sprites
             # -------- remove dead -----
             #for sprite in self.ballgroup:
             #    if sprite.hitpoints < 1:
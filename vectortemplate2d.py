@@ -8,12 +8,17 @@ idea: clean python3/pygame template using pygame.math.vector2
 
 """
 import pygame
+import fonts
+import handles
+import specs
 #import math
 import random
 import os
 import time
 #import operator
 import math
+import imagecache
+import collections
 #import vectorclass2d as v
 #import textscroller_vertical as ts
 #import subprocess
@@ -21,24 +26,14 @@ import math
 """Best game: 10 waves by Ines"""
 
 def make_text(msg="pygame is cool", fontcolor=(255, 0, 255), fontsize=42, font=None):
-    """returns pygame surface with text. You still need to blit the surface."""
-    myfont = pygame.font.SysFont(font, fontsize)
-    mytext = myfont.render(msg, True, fontcolor)
-    mytext = mytext.convert_alpha()
-    return mytext
+    """returns pygame surface with text. You still need to blit the surface.
+       the surface is shared (fonts.render), do not paint on it"""
+    return fonts.render(msg, fontcolor, fontsize, font)
 
 def write(background, text, x=50, y=150, color=(0,0,0),
           fontsize=None, center=False):
-        """write text on pygame surface. """
-        if fontsize is None:
-            fontsize = 24
-        font = pygame.font.SysFont('mono', fontsize, bold=True)
-        fw, fh = font.size(text)
-        surface = font.render(text, True, color)
-        if center: # center text around x,y
-            background.blit(surface, (x-fw//2, y-fh//2))
-        else:      # topleft corner is x,y
-            background.blit(surface, (x,y))
+        """write text on pygame surface. returns the painted rect"""
+        return fonts.write(background, text, x, y, color, fontsize, center)
 
 def elastic_collision(sprite1, sprite2):
         """elasitc collision between 2 VectorSprites (calculated as disc's).
@@ -105,6 +100,8 @@ class Flytext(pygame.sprite.Sprite):
                 self.kill()      # remove Sprite from screen and from groups
 
 class Mouse(pygame.sprite.Sprite):
+    tailwidth = 10 # line width of the newest tail segment + 1
+
     def __init__(self, radius = 50, color=(255,0,0), x=320, y=240,
                     startx=100,starty=100, control="mouse", ):
         """create a (black) surface and paint a blue Mouse on it"""
@@ -125,44 +122,58 @@ class Mouse(pygame.sprite.Sprite):
         self.age = 0
         self.pos = pygame.mouse.get_pos()
         self.move = 0
-        self.tail=[]
+        self.tail = collections.deque(maxlen=128) # newest position first
         self.create_image()
         self.rect = self.image.get_rect()
         self.control = control # "mouse" "keyboard1" "keyboard2"
         self.pushed = False
 
     def create_image(self):
+        # self.r only takes 22 values: each frame is painted once and shared
+        key = (__name__, self.radius, self.r, self.g, self.b)
+        self.image = imagecache.cursors.get(key, self.paint_image)
+        self.rect = self.image.get_rect()
+        self.rect.center = self.x, self.y
 
-        self.image = pygame.surface.Surface((self.radius*0.5, self.radius*0.5))
+    def paint_image(self):
+        image = pygame.surface.Surface((self.radius*0.5, self.radius*0.5))
         delta1 = 12.5
         delta2 = 25
         w = self.radius*0.5 / 100.0
         h = self.radius*0.5 / 100.0
         # pointing down / up
         for y in (0,2,4):
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (35*w,0+y),(50*w,15*h+y),2)
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (50*w,15*h+y),(65*w,0+y),2)
     
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (35*w,100*h-y),(50*w,85*h-y),2)
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (50*w,85*h-y),(65*w,100*h-y),2)
         # pointing right / left                 
         for x in (0,2,4):
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (0+x,35*h),(15*w+x,50*h),2)
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (15*w+x,50*h),(0+x,65*h),2)
             
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (100*w-x,35*h),(85*w-x,50*h),2)
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (85*w-x,50*h),(100*w-x,65*h),2)
-        self.image.set_colorkey((0,0,0))
-        self.rect=self.image.get_rect()
-        self.rect.center = self.x, self.y
+        image.set_colorkey((0,0,0))
+        return image
+
+    def draw_tail(self, surface):
+        """the tail gets 1 pixel thinner per segment. pygame.draw.line draws
+           nothing below width 1, so only the newest segments are drawn"""
+        if len(self.tail) > 2:
+            r, g, b = self.color
+            for a in range(1, min(len(self.tail), Mouse.tailwidth)):
+                pygame.draw.line(surface, (r-a,g,b), self.tail[a-1], self.tail[a],
+                                 Mouse.tailwidth-a)
 
     def update(self, seconds):
         if self.control == "mouse":
@@ -207,8 +218,7 @@ class Mouse(pygame.sprite.Sprite):
             self.y = 0
         elif self.y > PygView.height:
             self.y = PygView.height
-        self.tail.insert(0,(self.x,self.y))
-        self.tail = self.tail[:128]
+        self.tail.appendleft((self.x,self.y)) # the oldest drops out
         self.rect.center = self.x, self.y
         self.r += self.delta   # self.r can take the values from 255 to 101
         if self.r < 151:
@@ -221,16 +231,40 @@ class Mouse(pygame.sprite.Sprite):
 
 class VectorSprite(pygame.sprite.Sprite):
     """base class for sprites. this class inherits from pygames sprite class"""
-    number = 0
-    numbers = {} # { number, Sprite }
+    numbers = handles.HandleTable() # { number: Sprite }, only living sprites
+    # default values for missing keywords, merged once per class by specs.spec_of
+    defaults = {"static": False,
+                "pos": specs.computed(lambda sprite: pygame.math.Vector2(random.randint(0, PygView.width),-50)),
+                "move": specs.computed(lambda sprite: pygame.math.Vector2(0,0)),
+                "radius": 5,
+                "width": specs.computed(lambda sprite: sprite.radius * 2),
+                "height": specs.computed(lambda sprite: sprite.radius * 2),
+                "color": specs.computed(lambda sprite: (random.randint(0,255), random.randint(0,255), random.randint(0,255))),
+                "hitpoints": 100,
+                "mass": 15,
+                "damage": 10,
+                "bounce_on_edge": False,
+                "kill_on_edge": False,
+                "angle": 0, # facing right?
+                "max_age": None,
+                "max_distance": None,
+                "picture": None,
+                "bossnumber": None,
+                "kill_with_boss": False,
+                "sticky_with_boss": False,
+                "upkey": None,
+                "downkey": None,
+                "rightkey": None,
+                "leftkey": None,
+                "speed": None,
+                "age": 0, # age in seconds
+                "warp_on_edge": False}
 
     def __init__(self, **kwargs):
         self._default_parameters(**kwargs)
         self._overwrite_parameters()
         pygame.sprite.Sprite.__init__(self, self.groups) #call parent class. NEVER FORGET !
-        self.number = VectorSprite.number # unique number for each sprite
-        VectorSprite.number += 1
-        VectorSprite.numbers[self.number] = self
+        self.number = VectorSprite.numbers.add(self) # unique number for each sprite, never reused
         self.create_image()
         self.distance_traveled = 0 # in pixel
         self.rect.center = (-300,-300) # avoid blinking image in topleft corner
@@ -241,72 +275,12 @@ class VectorSprite(pygame.sprite.Sprite):
         """change parameters before create_image is called""" 
         pass
 
-    def _default_parameters(self, **kwargs):    
+    def _default_parameters(self, **kwargs):
         """get unlimited named arguments and turn them into attributes
-           default values for missing keywords"""
-
-        for key, arg in kwargs.items():
-            setattr(self, key, arg)
-        if "layer" not in kwargs:
-            self._layer = 4
-        else:
-            self._layer = self.layer
-        if "static" not in kwargs:
-            self.static = False
-        if "pos" not in kwargs:
-            self.pos = pygame.math.Vector2(random.randint(0, PygView.width),-50)
-        if "move" not in kwargs:
-            self.move = pygame.math.Vector2(0,0)
-        if "radius" not in kwargs:
-            self.radius = 5
-        if "width" not in kwargs:
-            self.width = self.radius * 2
-        if "height" not in kwargs:
-            self.height = self.radius * 2
-        if "color" not in kwargs:
-            #self.color = None
-            self.color = (random.randint(0,255), random.randint(0,255), random.randint(0,255))
-        if "hitpoints" not in kwargs:
-            self.hitpoints = 100
+           default values for missing keywords, see defaults"""
+        specs.spec_of(type(self)).apply(self, kwargs)
+        self._layer = kwargs.get("layer", 4)
         self.hitpointsfull = self.hitpoints # makes a copy
-        if "mass" not in kwargs:
-            self.mass = 10
-        if "damage" not in kwargs:
-            self.damage = 10
-        if "bounce_on_edge" not in kwargs:
-            self.bounce_on_edge = False
-        if "kill_on_edge" not in kwargs:
-            self.kill_on_edge = False
-        if "angle" not in kwargs:
-            self.angle = 0 # facing right?
-        if "max_age" not in kwargs:
-            self.max_age = None
-        if "max_distance" not in kwargs:
-            self.max_distance = None
-        if "picture" not in kwargs:
-            self.picture = None
-        if "bossnumber" not in kwargs:
-            self.bossnumber = None
-        if "kill_with_boss" not in kwargs:
-            self.kill_with_boss = False
-        if "sticky_with_boss" not in kwargs:
-            self.sticky_with_boss = False
-        if "mass" not in kwargs:
-            self.mass = 15
-        if "upkey" not in kwargs:
-            self.upkey = None
-        if "downkey" not in kwargs:
-            self.downkey = None
-        if "rightkey" not in kwargs:
-            self.rightkey = None
-        if "leftkey" not in kwargs:
-            self.leftkey = None
-        if "speed" not in kwargs:
-            self.speed = None
-        if "age" not in kwargs:
-            self.age = 0 # age in seconds
-        if "warp_on_edge" not in kwargs:
-            self.warp_on_edge = False
 
     def kill(self):
         if self.number in self.numbers:
@@ -442,31 +416,41 @@ class Smoke(VectorSprite):
 
 
 class Explosion(VectorSprite):
+    variants = 4 # pre-painted ring colors per radius, see imagecache.explosions
 
     def _overwrite_parameters(self):
         self._layer = 2
 
     def create_image(self):
-        self.image=pygame.Surface((self.radius*2, self.radius*2))
-        pygame.draw.circle(self.image, (197, 37,  37),(self.radius, self.radius),  self.radius, 0)
+        # a random one of the pre-painted variants, painted only once per radius
+        variant = random.randint(0, Explosion.variants - 1)
+        key = (__name__, self.radius, tuple(self.color), variant)
+        self.image = imagecache.explosions.get(key, lambda: self.paint_image(variant))
+        self.rect= self.image.get_rect()
+
+    def paint_image(self, variant):
+        """paint the rings. same variant and radius gives the same colors"""
+        rnd = random.Random(variant * 1000 + self.radius)
+        image=pygame.Surface((self.radius*2, self.radius*2))
+        pygame.draw.circle(image, (197, 37,  37),(self.radius, self.radius),  self.radius, 0)
         r, g, b = self.color
         for rad in range(5,66, 5):
             if self.radius > rad:
                 if r != 0 and r != 255:
-                   r1 = (random.randint(rad-10,rad) + r) % 255
+                   r1 = (rnd.randint(rad-10,rad) + r) % 255
                 else:
                     r1 = r
                 if g != 0 and g != 255:
-                    g1 = (random.randint(rad-10,rad) + g) % 255
+                    g1 = (rnd.randint(rad-10,rad) + g) % 255
                 else:
                     g1 = g
                 if b != 0 and b != 255:
-                    b1 = (random.randint(rad-10,rad) + b) % 255
+                    b1 = (rnd.randint(rad-10,rad) + b) % 255
                 else:
                     b1 = b
-                pygame.draw.circle(self.image, (r1,g1,b1), (self.radius, self.radius), self.radius-rad, 0)
-        self.image.set_colorkey((0,0,0))
-        self.rect= self.image.get_rect()
+                pygame.draw.circle(image, (r1,g1,b1), (self.radius, self.radius), self.radius-rad, 0)
+        image.set_colorkey((0,0,0))
+        return image
 
     def update(self,seconds):
          VectorSprite.update(self, seconds)
@@ -480,13 +464,11 @@ class Rocket(VectorSprite):
     def __init__(self, **kwargs):
         self.readyToLaunchTime = 0
         VectorSprite.__init__(self, **kwargs)
-        
-        self.damage = 3
-        self.color = (255,156,0)
-        self.create_image()
 
     def _overwrite_parameters(self):
-        self._layer = 1    
+        self._layer = 1
+        self.damage = 3
+        self.color = (255,156,0) # set before create_image, the image is painted only once
 
     def create_image(self):
         self.angle = 90
@@ -765,12 +747,7 @@ class PygView(object):
             
             # --- Martins verbesserter Mousetail -----
             for mouse in self.mousegroup:
-                if len(mouse.tail)>2:
-                    for a in range(1,len(mouse.tail)):
-                        r,g,b = mouse.color
-                        pygame.draw.line(self.screen,(r-a,g,b),
-                                     mouse.tail[a-1],
-                                     mouse.tail[a],10-a*10//10)
+                mouse.draw_tail(self.screen)
             
             # -------- next frame -------------
             pygame.display.flip()
@@ -9,6 +9,8 @@ collision detection between sprite groups. Also Subclassing and super.
 this example is tested using python 3.4 and pygame
 """
 import pygame
+import fonts
+import handles
 import math
 import random
 import os
@@ -16,27 +18,19 @@ import time
 import operator
 import math
 import vectorclass2d as v
+import imagecache
+import collections
 
 
 def make_text(msg="pygame is cool", fontcolor=(255, 0, 255), fontsize=42, font=None):
-    """returns pygame surface with text. You still need to blit the surface."""
-    myfont = pygame.font.SysFont(font, fontsize)
-    mytext = myfont.render(msg, True, fontcolor)
-    mytext = mytext.convert_alpha()
-    return mytext
+    """returns pygame surface with text. You still need to blit the surface.
+       the surface is shared (fonts.render), do not paint on it"""
+    return fonts.render(msg, fontcolor, fontsize, font)
 
 def write(background, text, x=50, y=150, color=(0,0,0),
           fontsize=None, center=False):
-        """write text on pygame surface. """
-        if fontsize is None:
-            fontsize = 24
-        font = pygame.font.SysFont('mono', fontsize, bold=True)
-        fw, fh = font.size(text)
-        surface = font.render(text, True, color)
-        if center: # center text around x,y
-            background.blit(surface, (x-fw//2, y-fh//2))
-        else:      # topleft corner is x,y
-            background.blit(surface, (x,y))
+        """write text on pygame surface. returns the painted rect"""
+        return fonts.write(background, text, x, y, color, fontsize, center)
 
 
 
@@ -108,6 +102,8 @@ class Flytext(pygame.sprite.Sprite):
 
 
 class Mouse(pygame.sprite.Sprite):
+    tailwidth = 10 # line width of the newest tail segment + 1
+
     def __init__(self, radius = 15, color=(255,0,0), x=320, y=240,
                     startx=100,starty=100, control="mouse"):
         """create a (black) surface and paint a blue Mouse on it"""
@@ -128,7 +124,7 @@ class Mouse(pygame.sprite.Sprite):
         self.age = 0
         self.pos = pygame.mouse.get_pos()
         self.move = 0
-        self.tail=[]
+        self.tail = collections.deque(maxlen=128) # newest position first
         self.create_image()
         self.rect = self.image.get_rect()
         self.control = control # "mouse" "keyboard"
@@ -136,8 +132,14 @@ class Mouse(pygame.sprite.Sprite):
         
         
     def create_image(self):
-        
-        self.image = pygame.surface.Surface((self.radius*2,
+        # self.r only takes 22 values: each frame is painted once and shared
+        key = (__name__, self.radius, self.r, self.g, self.b)
+        self.image = imagecache.cursors.get(key, self.paint_image)
+        self.rect = self.image.get_rect()
+        self.rect.center = self.x, self.y
+
+    def paint_image(self):
+        image = pygame.surface.Surface((self.radius*2,
                                              self.radius*2))
 
         delta1 = 12.5
@@ -146,35 +148,43 @@ class Mouse(pygame.sprite.Sprite):
         h = self.radius*2 / 100.0
         # pointing down / up
         for y in (0,5,10):
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (35*w,0+y),(50*w,15*h+y),2)
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (50*w,15*h+y),(65*w,0+y),2)
     
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (35*w,100*h-y),(50*w,85*h-y),2)
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (50*w,85*h-y),(65*w,100*h-y),2)
         # pointing right / left                 
         for x in (0,5,10):
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (0+x,35*h),(15*w+x,50*h),2)
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (15*w+x,50*h),(0+x,65*h),2)
             
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (100*w-x,35*h),(85*w-x,50*h),2)
-            pygame.draw.line(self.image,(self.r-delta2,self.g,self.b),
+            pygame.draw.line(image,(self.r-delta2,self.g,self.b),
                          (85*w-x,50*h),(100*w-x,65*h),2)
             
         for delta in (-5, 0, 5 ):
-            pygame.draw.circle(self.image, (self.r, self.g, self.b), 
+            pygame.draw.circle(image, (self.r, self.g, self.b), 
                       (self.radius,self.radius), self.radius-delta, 1)
         
-        self.image.set_colorkey((0,0,0))
-        self.rect=self.image.get_rect()
-        self.rect.center = self.x, self.y
+        image.set_colorkey((0,0,0))
+        return image
         
+    def draw_tail(self, surface):
+        """the tail gets 1 pixel thinner per segment. pygame.draw.line draws
+           nothing below width 1, so only the newest segments are drawn"""
+        if len(self.tail) > 2:
+            r, g, b = self.color
+            for a in range(1, min(len(self.tail), Mouse.tailwidth)):
+                pygame.draw.line(surface, (r-a,g,b), self.tail[a-1], self.tail[a],
+                                 Mouse.tailwidth-a)
+
     def update(self, seconds):
         
         if self.control == "mouse":
@@ -219,8 +229,7 @@ class Mouse(pygame.sprite.Sprite):
             
             
         
-        self.tail.insert(0,(self.x,self.y))
-        self.tail = self.tail[:128]
+        self.tail.appendleft((self.x,self.y)) # the oldest drops out
         self.rect.center = self.x, self.y
         
         # self.r can take the values from 255 to 101
@@ -236,8 +245,7 @@ class Mouse(pygame.sprite.Sprite):
 
 class VectorSprite(pygame.sprite.Sprite):
     """base class for sprites. this class inherits from pygames sprite class"""
-    number = 0
-    numbers = {} # { number, Sprite }
+    numbers = handles.HandleTable() # { number: Sprite }, only living sprites
 
     def __init__(self, **kwargs):
         """create a (black) surface and paint a blue ball on it"""
@@ -247,9 +255,7 @@ class VectorSprite(pygame.sprite.Sprite):
             self._layer = 4
         #self._layer = layer   # pygame Sprite layer
         pygame.sprite.Sprite.__init__(self, self.groups) #call parent class. NEVER FORGET !
-        self.number = VectorSprite.number # unique number for each sprite
-        VectorSprite.number += 1
-        VectorSprite.numbers[self.number] = self
+        self.number = VectorSprite.numbers.add(self) # unique number for each sprite, never reused
         # get unlimited named arguments and turn them into attributes
         # --- default values for missing keywords ----
         if "static" not in kwargs:
@@ -475,22 +481,33 @@ class Mothership(VectorSprite):
         self.rect= self.image.get_rect()
 
 class Explosion(VectorSprite):
+    variants = 4 # pre-painted ring colors per radius, see imagecache.explosions
 
     def create_image(self):
-        self.image=pygame.Surface((self.radius*2, self.radius*2))
-        pygame.draw.circle(self.image, (197, 37,  37),(self.radius, self.radius),  self.radius, 0)
+        # a random one of the pre-painted variants, painted only once per radius
+        # the rings are always red, so self.color is not part of the key
+        variant = random.randint(0, Explosion.variants - 1)
+        key = (__name__, self.radius, (197, 37, 37), variant)
+        self.image = imagecache.explosions.get(key, lambda: self.paint_image(variant))
+        self.rect= self.image.get_rect()
+
+    def paint_image(self, variant):
+        """paint the red rings. same variant and radius gives the same colors"""
+        rnd = random.Random(variant * 1000 + self.radius)
+        image=pygame.Surface((self.radius*2, self.radius*2))
+        pygame.draw.circle(image, (197, 37,  37),(self.radius, self.radius),  self.radius, 0)
         if self.radius>5:
-            pygame.draw.circle(self.image, (random.randint(200, 255), 0,  0), (self.radius, self.radius), self.radius-5, 0)
+            pygame.draw.circle(image, (rnd.randint(200, 255), 0,  0), (self.radius, self.radius), self.radius-5, 0)
         if self.radius>10:
-            pygame.draw.circle(self.image, (random.randint(150, 200), 0, 0), (self.radius, self.radius), self.radius-10, 0)
+            pygame.draw.circle(image, (rnd.randint(150, 200), 0, 0), (self.radius, self.radius), self.radius-10, 0)
         if self.radius>15:
-            pygame.draw.circle(self.image, (random.randint(100, 150), 0, 0), (self.radius, self.radius), self.radius-15, 0)
+            pygame.draw.circle(image, (rnd.randint(100, 150), 0, 0), (self.radius, self.radius), self.radius-15, 0)
         if self.radius>20:
-            pygame.draw.circle(self.image, (random.randint(50, 100), 0, 0), (self.radius, self.radius), self.radius-20, 0)
+            pygame.draw.circle(image, (rnd.randint(50, 100), 0, 0), (self.radius, self.radius), self.radius-20, 0)
         if self.radius>30:
-            pygame.draw.circle(self.image, (random.randint(1, 51), 0, 0), (self.radius, self.radius), self.radius-30, 0)
-        self.image.set_colorkey((0,0,0))
-        self.rect= self.image.get_rect()
+            pygame.draw.circle(image, (rnd.randint(1, 51), 0, 0), (self.radius, self.radius), self.radius-30, 0)
+        image.set_colorkey((0,0,0))
+        return image
 
     def update(self,seconds):
          VectorSprite.update(self, seconds)
@@ -1096,12 +1113,7 @@ class PygView(object):
             # --- Martins verbesserter mousetail -----
             if show_tail:
                 for mouse in self.mousegroup:
-                    if len(mouse.tail)>2:
-                        for a in range(1,len(mouse.tail)):
-                            r,g,b = mouse.color
-                            pygame.draw.line(self.screen,(r-a,g,b),
-                                         mouse.tail[a-1],
-                                         mouse.tail[a],10-a*10//10)
+                    mouse.draw_tail(self.screen)
             
             # -------- next frame -------------
             pygame.display.flip()